@@ -0,0 +1,20 @@
+from fastapi import APIRouter, status
+from fastapi.responses import Response
+from app.api.serialization import FastJSONResponse
+from app.core.config import settings
+from app.core.timing import stage_stats
+
+router = APIRouter(prefix="/debug", tags=["debug"])
+
+
+@router.get("/timings")
+def get_stage_timings():
+    """Aggregated per-stage durations of timed operations (needs SERVER_TIMING=true)"""
+    return FastJSONResponse({"enabled": settings.SERVER_TIMING, "operations": stage_stats.snapshot()})
+
+
+@router.delete("/timings", status_code=status.HTTP_204_NO_CONTENT)
+def reset_stage_timings():
+    """Forget the aggregated stage durations"""
+    stage_stats.reset()
+    return Response(status_code=status.HTTP_204_NO_CONTENT)
@@ -1,42 +1,94 @@
-from fastapi import APIRouter, HTTPException
-from typing import List, Optional
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status
+from pydantic import TypeAdapter
+from typing import Dict, List, Literal, Optional
+from app.api.menu_cache import cached_json_response, menu_cache
 from app.models.food_item import FoodItem
+from app.models.money import Money
 from app.schemas.food_item import FoodItemCreate, FoodItemUpdate
+from app.database.connection import get_menu_repository
+from app.database.repository import MenuRepository
 
 router = APIRouter()
 
-menu_db = {}
+food_item_list_adapter = TypeAdapter(List[FoodItem])
+food_item_dict_adapter = TypeAdapter(Dict[int, FoodItem])
 
-@router.post("/menu/", response_model=FoodItem)
-def create_food_item(food_item: FoodItemCreate):
-    item_id = len(menu_db) + 1
-    new_item = FoodItem(id=item_id, **food_item.dict())
-    menu_db[item_id] = new_item
-    return new_item
 
-@router.get("/menu/", response_model=List[FoodItem])
-def get_food_items(category: Optional[str] = None):
-    if category:
-        return [item for item in menu_db.values() if item.category == category]
-    return list(menu_db.values())
+@router.post("/", response_model=FoodItem, status_code=status.HTTP_201_CREATED)
+def create_food_item(food_item: FoodItemCreate, menu: MenuRepository = Depends(get_menu_repository)):
+    try:
+        new_item = FoodItem(**food_item.model_dump())
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail=str(e))
+    return menu.add_item(new_item)
 
-@router.get("/menu/{item_id}", response_model=FoodItem)
-def get_food_item(item_id: int):
-    if item_id not in menu_db:
-        raise HTTPException(status_code=404, detail="Food item not found")
-    return menu_db[item_id]
+@router.get("/", response_model=List[FoodItem])
+def get_food_items(
+    request: Request,
+    category: Optional[str] = None,
+    min_price: Optional[Money] = Query(None, ge=0),
+    max_price: Optional[Money] = Query(None, ge=0),
+    is_vegetarian: Optional[bool] = None,
+    is_spicy: Optional[bool] = None,
+    is_available: Optional[bool] = None,
+    sort: Literal["id", "price", "-price"] = "id",
+    limit: Optional[int] = Query(None, ge=1),
+    menu: MenuRepository = Depends(get_menu_repository)
+):
+    """List menu items matching all given filters, answered from the menu indexes"""
+    flags = {
+        name: value for name, value in (
+            ("is_vegetarian", is_vegetarian), ("is_spicy", is_spicy), ("is_available", is_available)
+        ) if value is not None
+    }
+    if min_price is None and max_price is None and not flags and sort == "id" and limit is None:
+        # The full menu and plain category slices are served pre-serialized
+        body, etag = menu_cache.get(menu, ("list", category or None), lambda: food_item_list_adapter.dump_json(
+            menu.query_items(category or None)
+        ))
+        return cached_json_response(request, body, etag)
+    return menu.query_items(category or None, min_price, max_price, flags, sort, limit)
+
+@router.get("/search", response_model=List[FoodItem])
+def search_food_items(
+    q: str = Query(..., min_length=1, max_length=200, description="Words to find; the last one also matches as a prefix"),
+    limit: int = Query(20, ge=1, le=100),
+    menu: MenuRepository = Depends(get_menu_repository)
+):
+    """Find items by the words of their name or description, best matches first"""
+    return menu.search_items(q, limit)
+
+@router.get("/category/{category}", response_model=Dict[int, FoodItem])
+def get_food_items_by_category(request: Request, category: str, menu: MenuRepository = Depends(get_menu_repository)):
+    body, etag = menu_cache.get(menu, ("category", category), lambda: food_item_dict_adapter.dump_json(
+        menu.get_items_by_category(category)
+    ))
+    return cached_json_response(request, body, etag)
+
+@router.get("/{item_id}", response_model=FoodItem)
+def get_food_item(request: Request, item_id: int, menu: MenuRepository = Depends(get_menu_repository)):
+    def build() -> bytes:
+        item = menu.get_item(item_id)
+        if item is None:
+            raise HTTPException(status_code=404, detail="Food item not found")
+        return item.model_dump_json().encode()
+
+    body, etag = menu_cache.get(menu, ("item", item_id), build)
+    return cached_json_response(request, body, etag)
 
-@router.put("/menu/{item_id}", response_model=FoodItem)
-def update_food_item(item_id: int, food_item: FoodItemUpdate):
-    if item_id not in menu_db:
+@router.put("/{item_id}", response_model=FoodItem)
+def update_food_item(item_id: int, food_item: FoodItemUpdate, menu: MenuRepository = Depends(get_menu_repository)):
+    item = menu.get_item(item_id)
+    if item is None:
         raise HTTPException(status_code=404, detail="Food item not found")
-    updated_item = menu_db[item_id].copy(update=food_item.dict())
-    menu_db[item_id] = updated_item
-    return updated_item
+    try:
+        updated_item = FoodItem(**{**item.model_dump(), **food_item.model_dump(exclude_unset=True)})
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail=str(e))
+    return menu.update_item(item_id, updated_item)
 
-@router.delete("/menu/{item_id}", response_model=dict)
-def delete_food_item(item_id: int):
-    if item_id not in menu_db:
+@router.delete("/{item_id}", status_code=status.HTTP_204_NO_CONTENT)
+def delete_food_item(item_id: int, menu: MenuRepository = Depends(get_menu_repository)):
+    if not menu.delete_item(item_id):
         raise HTTPException(status_code=404, detail="Food item not found")
-    del menu_db[item_id]
-    return {"message": "Food item deleted successfully"}
\ No newline at end of file
+    return Response(status_code=status.HTTP_204_NO_CONTENT)
@@ -0,0 +1,28 @@
+from typing import Dict, Iterator, Tuple
+from fastapi import APIRouter, Depends
+from fastapi.responses import Response
+from app.api.idempotency import idempotency_cache
+from app.core.metrics import request_metrics
+from app.database.connection import get_menu_repository, get_order_repository
+from app.database.repository import MenuRepository, OrderRepository
+
+router = APIRouter(tags=["metrics"])
+
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def storage_gauges(menu: MenuRepository, orders: OrderRepository) -> Iterator[Tuple[str, str, Dict[str, str], float]]:
+    yield "menu_items", "Items on the menu", {}, menu.count_items()
+    for order_status, count in sorted(orders.count_orders_by_status().items()):
+        yield "orders", "Stored orders, by status", {"status": order_status}, count
+    yield from idempotency_cache.gauges()
+
+
+@router.get("/metrics")
+def get_metrics(
+    menu: MenuRepository = Depends(get_menu_repository),
+    orders: OrderRepository = Depends(get_order_repository)
+):
+    """Request metrics and storage sizes in Prometheus text format"""
+    body = request_metrics.render(storage_gauges(menu, orders))
+    return Response(content=body, media_type=PROMETHEUS_CONTENT_TYPE)
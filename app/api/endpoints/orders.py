@@ -1,147 +1,432 @@
-from typing import Dict, List
-from fastapi import APIRouter, HTTPException, status
-from app.models.order import Order, OrderItem, OrderStatus
+import asyncio
+from datetime import datetime, timedelta
+from typing import AsyncIterator, Dict, Iterator, List, Optional, Tuple, Union
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, WebSocket, status
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
+from pydantic import ValidationError
+from app.models.food_item import FoodItem
+from app.models.order import Order, OrderItem, OrderStatus, construct_validated, utc_now
 from app.schemas.order import (
-    OrderCreate, OrderResponse, OrderSummaryResponse, 
-    OrderStatusUpdate, OrderItemResponse, CustomerResponse, ErrorResponse
+    OrderBatchCreate, OrderBatchResponse, OrderCreate, OrderResponse, OrderPage, OrderStatsResponse,
+    OrderStatusUpdate, OrderTimelinePage
 )
-from app.database.connection import (
-    add_order, get_order, get_all_orders, update_order_status,
-    get_item  # To validate menu items exist
+from app.api.idempotency import IdempotentRoute
+from app.api.order_events import (
+    HEARTBEAT_INTERVAL, SSE_HEARTBEAT, Subscription, encode_event, order_events, sse_message
 )
+from app.core.timing import NULL_TIMER, NullTimer, RequestTimer, request_timer
+from app.api.serialization import (
+    FastJSONResponse, dumps, order_stats_to_dict, order_to_dict, order_summary_to_dict
+)
+from app.database.connection import get_menu_repository, get_order_repository
+from app.database.order_stats import export_order_columns, recompute_order_stats, stats_differences
+from app.database.repository import MenuRepository, MenuSnapshot, OrderRepository, OrderVersionConflict
 
 router = APIRouter(prefix="/orders", tags=["orders"])
 
+# Handlers that call storage are plain functions, which FastAPI runs in its
+# threadpool: a blocking SQLite call or journal fsync then never stalls the
+# event loop, and concurrent writers can share one journal group commit.
+# Streaming endpoints stay async and read storage through run_in_threadpool.
+
+# Orders fetched from storage per round trip while streaming
+STREAM_CHUNK_SIZE = 500
+
 
-@router.post("/", response_model=OrderResponse, status_code=status.HTTP_201_CREATED)
-async def create_order(order_data: OrderCreate):
-    """Create new order"""
+def stream_order_summaries(
+    orders: OrderRepository, after: Optional[int], status_filter: Optional[str]
+) -> Iterator[bytes]:
+    """Yield one NDJSON line per order, fetching a chunk at a time"""
+    while True:
+        chunk = orders.list_orders(after, STREAM_CHUNK_SIZE, status_filter)
+        if not chunk:
+            return
+        for order in chunk:
+            yield dumps(order_summary_to_dict(order)) + b"\n"
+        after = chunk[-1].id
+
+
+async def stream_order_events(subscription: Optional[Subscription], first: Optional[bytes]) -> AsyncIterator[bytes]:
+    """Yield Server-Sent Events, with keep-alive comments while idle"""
     try:
-        # Validate that all menu items exist and build order items
-        order_items = []
-        for item_data in order_data.items:
-            menu_item = get_item(item_data.menu_item_id)
-            if not menu_item:
-                raise HTTPException(
-                    status_code=status.HTTP_404_NOT_FOUND,
-                    detail=f"Menu item with ID {item_data.menu_item_id} not found"
-                )
-            
-            if not menu_item.is_available:
-                raise HTTPException(
-                    status_code=status.HTTP_400_BAD_REQUEST,
-                    detail=f"Menu item '{menu_item.name}' is not available"
-                )
-            
-            order_item = OrderItem(
-                menu_item_id=item_data.menu_item_id,
-                menu_item_name=menu_item.name,
-                quantity=item_data.quantity,
-                unit_price=menu_item.price
+        if first is not None:
+            yield sse_message(first)
+        if subscription is None:
+            return
+        async for event in subscription.events(HEARTBEAT_INTERVAL):
+            yield SSE_HEARTBEAT if event is None else sse_message(event)
+        if subscription.evicted:
+            # Tell the client it fell behind, so it reconnects and resyncs
+            yield sse_message(dumps({"event": "evicted"}))
+    finally:
+        if subscription is not None:
+            subscription.close()
+
+
+def event_stream_response(events: AsyncIterator[bytes]) -> StreamingResponse:
+    return StreamingResponse(
+        events, media_type="text/event-stream", headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
+def build_order(
+    order_data: OrderCreate, menu: MenuSnapshot, timer: Union[RequestTimer, NullTimer] = NULL_TIMER
+) -> Order:
+    """Build an order from a validated request, priced against one menu snapshot.
+
+    Raises HTTPException for unknown or unavailable items. Nothing is
+    validated again: the request schema already enforced the order's
+    constraints, and names and prices come from validated menu items.
+    """
+    with timer.stage("items"):
+        order_items = build_order_items(order_data, menu.items)
+    
+    with timer.stage("order"):
+        return construct_validated(Order, {
+            "id": None,
+            "customer": order_data.customer,
+            "items": tuple(order_items),
+            "status": OrderStatus.PENDING.value,
+            "version": 1,
+            "menu_version": menu.version,
+            # Stamped by storage when the order is stored
+            "created_at": None,
+            "confirmed_at": None,
+            "ready_at": None,
+            "delivered_at": None
+        })
+
+
+def build_order_items(order_data: OrderCreate, menu_items: Dict[int, FoodItem]) -> List[OrderItem]:
+    # Check that all menu items exist and build order items
+    order_items = []
+    for item_data in order_data.items:
+        menu_item = menu_items.get(item_data.menu_item_id)
+        if not menu_item:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail=f"Menu item with ID {item_data.menu_item_id} not found"
             )
-            order_items.append(order_item)
-        
-        # Create order instance for validation
-        order = Order(
-            customer=order_data.customer,
-            items=order_items
-        )
-        
-        # Add to database
-        created_order = add_order(order)
         
-        # Build response
-        response_items = [
-            OrderItemResponse(
-                menu_item_id=item.menu_item_id,
-                menu_item_name=item.menu_item_name,
-                quantity=item.quantity,
-                unit_price=item.unit_price,
-                item_total=item.item_total
-            ) for item in created_order.items
-        ]
-        
-        return OrderResponse(
-            id=created_order.id,
-            customer=CustomerResponse(
-                name=created_order.customer.name,
-                phone=created_order.customer.phone,
-                address=created_order.customer.address
-            ),
-            items=response_items,
-            status=created_order.status,
-            items_total=created_order.items_total,
-            total_items_count=created_order.total_items_count
-        )
+        if not menu_item.is_available:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Menu item '{menu_item.name}' is not available"
+            )
         
-    except ValueError as e:
-        raise HTTPException(
-            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
-            detail=str(e)
+        order_items.append(construct_validated(OrderItem, {
+            "menu_item_id": item_data.menu_item_id,
+            "menu_item_name": menu_item.name,
+            "quantity": item_data.quantity,
+            "unit_price": menu_item.price
+        }))
+    return order_items
+
+
+def order_etag(order: Order) -> str:
+    return f'"{order.version}"'
+
+
+def if_match_satisfied(if_match: str, etag: str) -> bool:
+    """Strong comparison of an If-Match header against an ETag (RFC 9110)"""
+    if if_match.strip() == "*":
+        return True
+    return any(candidate.strip() == etag for candidate in if_match.split(","))
+
+
+def order_response(order: Order, status_code: int = status.HTTP_200_OK) -> FastJSONResponse:
+    return FastJSONResponse(order_to_dict(order), status_code=status_code, headers={"ETag": order_etag(order)})
+
+
+def create_order(
+    order_data: OrderCreate,
+    # Read by IdempotentRoute before the body is parsed; declared for the API docs
+    idempotency_key: Optional[str] = Header(None, description="Unique key of this order; retries with the same key get the first response"),
+    menu: MenuRepository = Depends(get_menu_repository),
+    orders: OrderRepository = Depends(get_order_repository)
+):
+    """Create new order.
+
+    With an Idempotency-Key header, a retry of the same request replays the
+    response of the first one instead of creating another order.
+
+    With SERVER_TIMING on, each stage is reported in a Server-Timing header
+    and aggregated for GET /debug/timings.
+    """
+    timer = request_timer("create_order")
+    with timer.stage("lookup"):
+        snapshot = menu.get_menu_snapshot(item.menu_item_id for item in order_data.items)
+    order = build_order(order_data, snapshot, timer)
+    
+    # Add to database
+    with timer.stage("insert"):
+        created_order = orders.add_order(order)
+    with timer.stage("publish"):
+        order_events.publish("created", created_order)
+    
+    with timer.stage("serialize"):
+        response = order_response(created_order, status.HTTP_201_CREATED)
+    return timer.finish(response)
+
+
+router.add_api_route(
+    "/", create_order, methods=["POST"], response_model=OrderResponse, status_code=status.HTTP_201_CREATED,
+    route_class_override=IdempotentRoute
+)
+
+
+@router.post("/batch", response_model=OrderBatchResponse)
+def create_orders_batch(
+    batch: OrderBatchCreate,
+    menu: MenuRepository = Depends(get_menu_repository),
+    orders: OrderRepository = Depends(get_order_repository)
+):
+    """Create many orders at once, reporting the outcome of each one.
+
+    Every order is checked exactly as POST /orders/ would check it. The menu
+    items of the whole batch come from one menu snapshot, so all its orders
+    are priced alike, and the valid orders are stored under one lock or
+    transaction.
+    """
+    results: List[Optional[dict]] = [None] * len(batch.orders)
+    requests: List[Tuple[int, OrderCreate]] = []
+    for index, payload in enumerate(batch.orders):
+        try:
+            requests.append((index, OrderCreate.model_validate(payload)))
+        except ValidationError as e:
+            results[index] = {
+                "index": index,
+                "status_code": status.HTTP_422_UNPROCESSABLE_ENTITY,
+                "detail": e.errors(include_url=False, include_context=False)
+            }
+
+    snapshot = menu.get_menu_snapshot(
+        item.menu_item_id for _, order_data in requests for item in order_data.items
+    )
+
+    accepted: List[Tuple[int, Order]] = []
+    for index, order_data in requests:
+        try:
+            accepted.append((index, build_order(order_data, snapshot)))
+        except HTTPException as e:
+            results[index] = {"index": index, "status_code": e.status_code, "detail": e.detail}
+
+    orders.add_orders([order for _, order in accepted])
+    for index, order in accepted:
+        order_events.publish("created", order)
+        results[index] = {"index": index, "status_code": status.HTTP_201_CREATED, "order": order_to_dict(order)}
+
+    return FastJSONResponse({
+        "created": len(accepted),
+        "failed": len(results) - len(accepted),
+        "results": results
+    })
+
+
+@router.get("/", response_model=OrderPage)
+def get_all_orders_endpoint(
+    after: Optional[int] = Query(None, description="Cursor: return orders after this order ID"),
+    limit: int = Query(100, ge=1, le=1000),
+    stream: bool = Query(False, description="Stream every order after the cursor as NDJSON"),
+    status_filter: Optional[OrderStatus] = Query(None, alias="status", description="Only orders in this status"),
+    orders: OrderRepository = Depends(get_order_repository)
+):
+    """Get order summaries in ascending ID order, one page at a time"""
+    status_value = status_filter.value if status_filter else None
+    if stream:
+        return StreamingResponse(
+            stream_order_summaries(orders, after, status_value), media_type="application/x-ndjson"
         )
 
+    # Fetch one extra order to know whether another page exists
+    page = orders.list_orders(after, limit + 1, status_value)
+    has_more = len(page) > limit
+    page = page[:limit]
+    return FastJSONResponse({
+        "orders": [order_summary_to_dict(order) for order in page],
+        "next_cursor": page[-1].id if has_more else None,
+        "counts": orders.count_orders_by_status()
+    })
+
+
+@router.get("/timeline", response_model=OrderTimelinePage)
+def order_timeline_endpoint(
+    start: Optional[datetime] = Query(None, description="Orders created at or after this time (UTC if no zone)"),
+    end: Optional[datetime] = Query(None, description="Orders created before this time"),
+    minutes: Optional[float] = Query(None, gt=0, description="Orders created in the last `minutes`, instead of `start`"),
+    after: Optional[int] = Query(None, description="Cursor: continue after this order"),
+    limit: int = Query(100, ge=1, le=1000),
+    orders: OrderRepository = Depends(get_order_repository)
+):
+    """Get summaries of the orders created in a time window, oldest first.
+
+    Served from an index on creation time, so a window costs the same
+    however many orders are stored. Orders moved to the archive are no
+    longer listed.
+    """
+    if minutes is not None:
+        if start is not None:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Pass either `start` or `minutes`, not both"
+            )
+        start = utc_now() - timedelta(minutes=minutes)
+
+    # Fetch one extra order to know whether another page exists
+    page = orders.list_orders_by_time(start, end, after, limit + 1)
+    has_more = len(page) > limit
+    page = page[:limit]
+    return FastJSONResponse({
+        "orders": [order_summary_to_dict(order) for order in page],
+        "next_cursor": page[-1].id if has_more else None
+    })
+
+
+@router.get("/stats", response_model=OrderStatsResponse)
+def order_stats_endpoint(
+    limit: Optional[int] = Query(None, ge=1, description="Only the `limit` best-selling menu items"),
+    recompute: bool = Query(False, description="Cross-check against totals recomputed from every order"),
+    orders: OrderRepository = Depends(get_order_repository)
+):
+    """Orders and revenue per status, and sales per menu item, best sellers first.
+
+    Served from running aggregates that every order write updates, so it
+    costs the same however many orders are stored. With recompute=true the
+    totals are also recomputed exactly from a columnar export of every
+    order line (vectorized with NumPy when installed) and each disagreement
+    is listed in `differences`. That reads every order, so it is meant for
+    offline checks; writes made meanwhile show up as differences.
+    """
+    stats = orders.get_order_stats()
+    body = order_stats_to_dict(stats, limit)
+    if recompute:
+        body["differences"] = stats_differences(stats, recompute_order_stats(export_order_columns(orders)))
+    return FastJSONResponse(body)
 
-@router.get("/", response_model=Dict[int, OrderSummaryResponse])
-async def get_all_orders_endpoint():
-    """Get all orders with summary information"""
-    orders = get_all_orders()
-    return {
-        k: OrderSummaryResponse(
-            id=v.id,
-            customer_name=v.customer.name,
-            customer_phone=v.customer.phone,
-            status=v.status,
-            items_total=v.items_total,
-            total_items_count=v.total_items_count
-        ) for k, v in orders.items()
-    }
+
+@router.get("/events")
+async def order_events_endpoint(
+    status_filter: Optional[OrderStatus] = Query(None, alias="status", description="Only orders entering this status")
+):
+    """Server-Sent Events for every new order and status change.
+
+    With `status`, only orders that enter that status, e.g. `pending` for a
+    kitchen display of incoming orders.
+    """
+    subscription = order_events.subscribe(status=status_filter.value if status_filter else None)
+    return event_stream_response(stream_order_events(subscription, None))
+
+
+@router.websocket("/ws")
+async def order_events_websocket(
+    websocket: WebSocket,
+    order_id: Optional[int] = Query(None, description="Only changes to this order"),
+    status_filter: Optional[OrderStatus] = Query(None, alias="status", description="Only orders entering this status"),
+    orders: OrderRepository = Depends(get_order_repository)
+):
+    """Order events as JSON text messages, filtered like the SSE endpoints.
+
+    A single-order socket starts with the order's current state and is closed
+    once it is delivered; a client that falls too far behind is disconnected
+    with code 1013 and should reconnect.
+    """
+    # Subscribe before reading the order, so no change in between is missed
+    subscription = order_events.subscribe(order_id, status_filter.value if status_filter else None)
+    try:
+        order = await run_in_threadpool(orders.get_order, order_id) if order_id is not None else None
+        if order_id is not None and order is None:
+            await websocket.close(code=1008, reason=f"Order with ID {order_id} not found")
+            return
+        await websocket.accept()
+
+        async def send_events() -> None:
+            if order is not None:
+                await websocket.send_text(encode_event("snapshot", order).decode())
+                if order.status == OrderStatus.DELIVERED:
+                    return
+            async for event in subscription.events():
+                await websocket.send_text(event.decode())
+
+        async def wait_for_disconnect() -> None:
+            while (await websocket.receive())["type"] != "websocket.disconnect":
+                pass
+
+        sender = asyncio.ensure_future(send_events())
+        receiver = asyncio.ensure_future(wait_for_disconnect())
+        done, pending = await asyncio.wait({sender, receiver}, return_when=asyncio.FIRST_COMPLETED)
+        for task in pending:
+            task.cancel()
+        if sender in done:
+            sender.result()
+            await websocket.close(code=1013 if subscription.evicted else 1000)
+    finally:
+        subscription.close()
 
 
 @router.get("/{order_id}", response_model=OrderResponse)
-async def get_order_details(order_id: int):
+def get_order_details(order_id: int, orders: OrderRepository = Depends(get_order_repository)):
     """Get specific order details"""
-    order = get_order(order_id)
+    order = orders.get_order(order_id)
     if not order:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail=f"Order with ID {order_id} not found"
         )
     
-    # Build response
-    response_items = [
-        OrderItemResponse(
-            menu_item_id=item.menu_item_id,
-            menu_item_name=item.menu_item_name,
-            quantity=item.quantity,
-            unit_price=item.unit_price,
-            item_total=item.item_total
-        ) for item in order.items
-    ]
-    
-    return OrderResponse(
-        id=order.id,
-        customer=CustomerResponse(
-            name=order.customer.name,
-            phone=order.customer.phone,
-            address=order.customer.address
-        ),
-        items=response_items,
-        status=order.status,
-        items_total=order.items_total,
-        total_items_count=order.total_items_count
-    )
+    return order_response(order)
+
+
+@router.get("/{order_id}/events")
+async def order_detail_events(order_id: int, orders: OrderRepository = Depends(get_order_repository)):
+    """Server-Sent Events for one order, replacing polling GET /orders/{order_id}.
+
+    Starts with a `snapshot` event holding the current order, then sends a
+    `status` event per change and ends after delivery.
+    """
+    # Subscribe before reading the order, so no change in between is missed
+    subscription = order_events.subscribe(order_id=order_id)
+    order = await run_in_threadpool(orders.get_order, order_id)
+    if not order:
+        subscription.close()
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Order with ID {order_id} not found"
+        )
+    if order.status == OrderStatus.DELIVERED:
+        subscription.close()
+        subscription = None
+    return event_stream_response(stream_order_events(subscription, encode_event("snapshot", order)))
 
 
 @router.put("/{order_id}/status", response_model=OrderResponse)
-async def update_order_status_endpoint(order_id: int, status_data: OrderStatusUpdate):
-    """Update order status"""
-    order = get_order(order_id)
+def update_order_status_endpoint(
+    order_id: int,
+    status_data: OrderStatusUpdate,
+    if_match: Optional[str] = Header(None, description="ETag of the order version the client last saw"),
+    orders: OrderRepository = Depends(get_order_repository)
+):
+    """Update order status.
+
+    The transition is applied only if the order is still in the version it
+    was validated against, so concurrent updates cannot both succeed; the
+    loser gets 409. Clients can also send If-Match to require the version
+    they last saw.
+    """
+    order = orders.get_order(order_id)
     if not order:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail=f"Order with ID {order_id} not found"
         )
     
+    if if_match is not None and not if_match_satisfied(if_match, order_etag(order)):
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=f"Order {order_id} has changed; current version is {order.version}",
+            headers={"ETag": order_etag(order)}
+        )
+    
     # Validate status transition (basic validation)
     current_status = OrderStatus(order.status)
     new_status = status_data.status
@@ -160,29 +445,22 @@ async def update_order_status_endpoint(order_id: int, status_data: OrderStatusUp
             detail=f"Cannot transition from {current_status} to {new_status}"
         )
     
-    # Update status
-    updated_order = update_order_status(order_id, new_status.value)
-    
-    # Build response
-    response_items = [
-        OrderItemResponse(
-            menu_item_id=item.menu_item_id,
-            menu_item_name=item.menu_item_name,
-            quantity=item.quantity,
-            unit_price=item.unit_price,
-            item_total=item.item_total
-        ) for item in updated_order.items
-    ]
+    # Update status, unless another request changed the order since it was read
+    try:
+        updated_order = orders.update_order_status(
+            order_id, new_status.value, expected_status=current_status.value, expected_version=order.version
+        )
+    except OrderVersionConflict as e:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=f"Order {order_id} has changed; current version is {e.order.version}",
+            headers={"ETag": order_etag(e.order)}
+        )
+    if updated_order is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Order with ID {order_id} not found"
+        )
+    order_events.publish("status", updated_order)
     
-    return OrderResponse(
-        id=updated_order.id,
-        customer=CustomerResponse(
-            name=updated_order.customer.name,
-            phone=updated_order.customer.phone,
-            address=updated_order.customer.address
-        ),
-        items=response_items,
-        status=updated_order.status,
-        items_total=updated_order.items_total,
-        total_items_count=updated_order.total_items_count
-    )
+    return order_response(updated_order)
@@ -0,0 +1,271 @@
+import asyncio
+import hashlib
+import time
+from collections import OrderedDict
+from typing import Awaitable, Callable, Dict, Iterator, List, Optional, Tuple
+from fastapi import HTTPException, Request, Response, status
+from fastapi.routing import APIRoute
+from starlette.concurrency import run_in_threadpool
+from app.core.config import settings
+from app.database.connection import get_idempotency_store
+from app.database.repository import IdempotencyStore, IdempotentResponse
+
+IDEMPOTENCY_HEADER = "idempotency-key"
+MAX_KEY_LENGTH = 255
+
+# Headers of the original response that a replay does not repeat: its length
+# is set again for the replayed body, and its timings belong to the first run
+_NOT_REPLAYED = {b"content-length", b"server-timing"}
+
+# A key claimed in shared storage by a worker that then dies is free again
+# after CLAIM_LEASE seconds; requests waiting on another worker's claim check
+# it every CLAIM_POLL_INTERVAL seconds
+CLAIM_LEASE = 60.0
+CLAIM_POLL_INTERVAL = 0.02
+
+
+class StoredResponse:
+    """Status, headers and body of a finished response, for replaying"""
+
+    __slots__ = ("fingerprint", "status_code", "headers", "body", "expires")
+
+    def __init__(self, fingerprint: bytes, status_code: int, headers: List[Tuple[bytes, bytes]], body: bytes):
+        self.fingerprint = fingerprint
+        self.status_code = status_code
+        self.headers = headers
+        self.body = body
+        self.expires = 0.0
+
+    @classmethod
+    def capture(cls, fingerprint: bytes, response: Response) -> Optional["StoredResponse"]:
+        """The response's parts, or None for a response without a body in memory (e.g. streaming)"""
+        body = getattr(response, "body", None)
+        if not isinstance(body, bytes):
+            return None
+        headers = [(name, value) for name, value in response.raw_headers if name not in _NOT_REPLAYED]
+        return cls(fingerprint, response.status_code, headers, body)
+
+    def replay(self) -> Response:
+        response = Response(content=self.body, status_code=self.status_code)
+        response.raw_headers.extend(self.headers)
+        response.raw_headers.append((b"idempotent-replayed", b"true"))
+        return response
+
+
+class _InFlight:
+    """A keyed request still being handled; waiters get its (response, error)"""
+
+    __slots__ = ("fingerprint", "outcome")
+
+    def __init__(self, fingerprint: bytes):
+        self.fingerprint = fingerprint
+        self.outcome: "asyncio.Future[Tuple[Optional[StoredResponse], Optional[Exception]]]" = (
+            asyncio.get_running_loop().create_future()
+        )
+
+
+class IdempotencyCache:
+    """Responses to requests sent with an Idempotency-Key, so that retries are replayed.
+
+    Successful (2xx) responses are kept in LRU order, at most `capacity` of
+    them and each for `ttl` seconds after it was stored. A request whose key
+    is still being handled waits for that first request and gets its outcome
+    instead of running again. Each key is tied to a hash of its request body;
+    reusing a key with another body is rejected with 422. Errors are shared
+    with waiting requests but not stored, so a later retry runs again.
+
+    Like RequestMetrics, it is only used from the event loop thread, so plain
+    dicts and ints need no lock. The cache itself is per process; given an
+    IdempotencyStore (shared storage, see run()), keys and responses are also
+    kept there, so a retry reaching another worker is replayed, or waits for
+    the worker still running the first request.
+    """
+
+    def __init__(
+        self,
+        capacity: int,
+        ttl: float,
+        clock: Callable[[], float] = time.monotonic,
+        lease: float = CLAIM_LEASE,
+        poll_interval: float = CLAIM_POLL_INTERVAL,
+    ):
+        self.capacity = capacity
+        self.ttl = ttl
+        self.lease = lease
+        self.poll_interval = poll_interval
+        self._clock = clock
+        self._responses: "OrderedDict[str, StoredResponse]" = OrderedDict()
+        self._in_flight: Dict[str, _InFlight] = {}
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def __len__(self) -> int:
+        return len(self._responses)
+
+    async def run(
+        self, key: str, body: bytes, call: Callable[[], Awaitable[Response]], store: Optional[IdempotencyStore] = None
+    ) -> Response:
+        """The stored response for key, or the response of call() once it is stored.
+
+        With a `store`, keys not answered by this process are claimed there
+        first, so one request per key runs across every worker sharing it.
+        """
+        fingerprint = hashlib.blake2b(body, digest_size=16).digest()
+        while True:
+            stored = self._lookup(key)
+            if stored is not None:
+                _check_fingerprint(stored.fingerprint, fingerprint)
+                self.hits += 1
+                return stored.replay()
+            in_flight = self._in_flight.get(key)
+            if in_flight is None:
+                break
+            _check_fingerprint(in_flight.fingerprint, fingerprint)
+            self.coalesced += 1
+            response, error = await asyncio.shield(in_flight.outcome)
+            if error is not None:
+                raise error
+            if response is not None:
+                return response.replay()
+            # The first request was cancelled or could not be kept: run this one
+
+        in_flight = self._in_flight[key] = _InFlight(fingerprint)
+        outcome: Tuple[Optional[StoredResponse], Optional[Exception]] = (None, None)
+        claimed = False
+        try:
+            if store is not None:
+                shared = await self._claim(store, key, fingerprint)
+                if shared is not None:
+                    outcome = (shared, None)
+                    return shared.replay()
+                claimed = True
+            self.misses += 1
+            response = await call()
+            stored = StoredResponse.capture(fingerprint, response)
+            outcome = (stored, None)
+            if stored is not None and 200 <= stored.status_code < 300:
+                self._store(key, stored)
+                if claimed:
+                    claimed = False
+                    await run_in_threadpool(store.save_idempotent_response, key, IdempotentResponse(
+                        fingerprint, stored.status_code, stored.headers, stored.body
+                    ), self.ttl)
+            elif claimed:
+                await run_in_threadpool(store.release_idempotency_key, key)
+            return response
+        except Exception as error:
+            outcome = (None, error)
+            # Errors are not kept: a retry on any worker runs again. (The claim
+            # of a cancelled request is left to lapse after its lease.)
+            if claimed:
+                await run_in_threadpool(store.release_idempotency_key, key)
+            raise
+        finally:
+            del self._in_flight[key]
+            in_flight.outcome.set_result(outcome)
+
+    async def _claim(self, store: IdempotencyStore, key: str, fingerprint: bytes) -> Optional[StoredResponse]:
+        """None once this process holds key's claim in `store`, or the response
+        another worker stored for it, waiting while that worker still runs"""
+        waited = False
+        while True:
+            shared = await run_in_threadpool(store.claim_idempotency_key, key, fingerprint, self.lease)
+            if shared is None:
+                return None
+            _check_fingerprint(shared.fingerprint, fingerprint)
+            if shared.status_code is not None:
+                if not waited:
+                    self.hits += 1
+                return StoredResponse(shared.fingerprint, shared.status_code, shared.headers, shared.body)
+            if not waited:
+                waited = True
+                self.coalesced += 1
+            await asyncio.sleep(self.poll_interval)
+
+    def _lookup(self, key: str) -> Optional[StoredResponse]:
+        stored = self._responses.get(key)
+        if stored is None:
+            return None
+        if stored.expires <= self._clock():
+            del self._responses[key]
+            self.expirations += 1
+            return None
+        self._responses.move_to_end(key)
+        return stored
+
+    def _store(self, key: str, stored: StoredResponse) -> None:
+        now = self._clock()
+        stored.expires = now + self.ttl
+        self._responses[key] = stored
+        self._responses.move_to_end(key)
+        # Expired entries left behind by hits are dropped lazily: on lookup,
+        # or here once they reach the least recently used end
+        while self._responses:
+            oldest_key, oldest = next(iter(self._responses.items()))
+            if oldest.expires > now:
+                break
+            del self._responses[oldest_key]
+            self.expirations += 1
+        while len(self._responses) > self.capacity:
+            self._responses.popitem(last=False)
+            self.evictions += 1
+
+    def reset(self) -> None:
+        """Forget every stored response and zero the counts (requests in flight still finish)"""
+        self._responses.clear()
+        self.hits = self.misses = self.coalesced = self.evictions = self.expirations = 0
+
+    def gauges(self) -> Iterator[Tuple[str, str, Dict[str, str], float]]:
+        """Counts for GET /metrics, as (name, help, labels, value)"""
+        yield "idempotency_cache_entries", "Responses stored for Idempotency-Key replays", {}, len(self._responses)
+        help_text = "Keyed requests, by how they were answered"
+        yield "idempotency_cache_requests", help_text, {"result": "hit"}, self.hits
+        yield "idempotency_cache_requests", help_text, {"result": "coalesced"}, self.coalesced
+        yield "idempotency_cache_requests", help_text, {"result": "miss"}, self.misses
+        help_text = "Stored responses dropped, by reason"
+        yield "idempotency_cache_evictions", help_text, {"reason": "capacity"}, self.evictions
+        yield "idempotency_cache_evictions", help_text, {"reason": "expired"}, self.expirations
+
+
+def _check_fingerprint(stored: bytes, sent: bytes) -> None:
+    if stored != sent:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail="Idempotency-Key was already used with a different request body"
+        )
+
+
+class IdempotentRoute(APIRoute):
+    """Route that replays its stored response to a request retried with the same Idempotency-Key.
+
+    The key is checked before the request body is parsed, so a replay skips
+    validation and the endpoint entirely. Requests without the header are
+    handled as usual.
+    """
+
+    def get_route_handler(self) -> Callable[[Request], Awaitable[Response]]:
+        handler = super().get_route_handler()
+        route_key = f"{','.join(sorted(self.methods))} {self.path_format} "
+
+        async def idempotent_handler(request: Request) -> Response:
+            key = request.headers.get(IDEMPOTENCY_HEADER)
+            if key is None:
+                return await handler(request)
+            if not key or len(key) > MAX_KEY_LENGTH:
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail=f"Idempotency-Key must be 1 to {MAX_KEY_LENGTH} characters"
+                )
+            # The body is cached on the request, so the handler reads it again for free
+            body = await request.body()
+            return await idempotency_cache.run(
+                route_key + key, body, lambda: handler(request), get_idempotency_store()
+            )
+
+        return idempotent_handler
+
+
+idempotency_cache = IdempotencyCache(settings.IDEMPOTENCY_CACHE_SIZE, settings.IDEMPOTENCY_TTL)
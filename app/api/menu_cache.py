@@ -0,0 +1,72 @@
+import hashlib
+import threading
+from typing import Callable, Dict, Hashable, Optional, Tuple
+from fastapi import Request, Response, status
+from app.database.repository import MenuRepository
+
+
+class MenuCache:
+    """Serialized menu responses, valid for one menu version.
+
+    Entries hold the JSON bytes and a strong ETag (a hash of those bytes). Any
+    create/update/delete bumps the repository's menu version, which drops every
+    entry on the next read; the version lives in the storage backend, so every
+    worker sharing a database sees the change.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._repository: Optional[MenuRepository] = None
+        self._version: Optional[int] = None
+        self._entries: Dict[Hashable, Tuple[bytes, str]] = {}
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, menu: MenuRepository, key: Hashable, build: Callable[[], bytes]) -> Tuple[bytes, str]:
+        """Get (body, etag) for key, calling build() on a miss"""
+        # Read the version before building, so a concurrent write can only
+        # make the cached bytes newer than their version, never older
+        version = menu.get_menu_version()
+        with self._lock:
+            if menu is not self._repository or version != self._version:
+                self._repository = menu
+                self._version = version
+                self._entries = {}
+            entry = self._entries.get(key)
+            if entry is not None:
+                self.hits += 1
+                return entry
+            self.misses += 1
+
+        body = build()
+        entry = (body, f'"{hashlib.blake2b(body, digest_size=16).hexdigest()}"')
+        with self._lock:
+            if self._repository is menu and self._version == version:
+                self._entries[key] = entry
+        return entry
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Weak comparison of an If-None-Match header against an ETag (RFC 9110)"""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        if candidate == etag:
+            return True
+    return False
+
+
+def cached_json_response(request: Request, body: bytes, etag: str) -> Response:
+    """200 with the cached body, or 304 when the client already has it"""
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    return Response(content=body, media_type="application/json", headers=headers)
+
+
+menu_cache = MenuCache()
@@ -0,0 +1,161 @@
+import asyncio
+import threading
+from typing import AsyncIterator, Dict, Optional, Set
+from app.api.serialization import dumps, order_to_dict
+from app.models.order import Order, OrderStatus
+
+# Events queued per subscriber before it counts as too slow and is evicted
+SUBSCRIBER_QUEUE_SIZE = 64
+
+# Seconds between keep-alive comments on an idle event stream
+HEARTBEAT_INTERVAL = 15.0
+
+# Queued in place of the backlog of an evicted subscriber
+EVICTED = object()
+
+# Queued after the last event a subscriber will ever get (its order was delivered)
+FINISHED = object()
+
+
+class Subscription:
+    """Events for one listener: a single order, one status, or every order.
+
+    Lives on the event loop that created it; the hub hands events over with
+    call_soon_threadsafe when publishing from another thread.
+    """
+
+    def __init__(self, hub: "OrderEventHub", order_id: Optional[int], status: Optional[str], maxsize: int):
+        self.hub = hub
+        self.order_id = order_id
+        self.status = status
+        self.loop = asyncio.get_running_loop()
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize)
+        self.evicted = False
+
+    def offer(self, event: bytes, last: bool = False) -> None:
+        """Queue an event, evicting the subscriber if its queue is full"""
+        if self.evicted:
+            return
+        try:
+            self.queue.put_nowait(event)
+            if last:
+                self.queue.put_nowait(FINISHED)
+                self.hub.unsubscribe(self)
+        except asyncio.QueueFull:
+            self.evicted = True
+            self.hub.unsubscribe(self)
+            # Drop the backlog so the reader sees the eviction straight away
+            while not self.queue.empty():
+                self.queue.get_nowait()
+            self.queue.put_nowait(EVICTED)
+
+    async def events(self, heartbeat: Optional[float] = None) -> AsyncIterator[Optional[bytes]]:
+        """Yield events until finished or evicted, and None after `heartbeat` idle seconds"""
+        while True:
+            try:
+                event = await asyncio.wait_for(self.queue.get(), heartbeat)
+            except asyncio.TimeoutError:
+                yield None
+                continue
+            if event is EVICTED or event is FINISHED:
+                return
+            yield event
+
+    def close(self) -> None:
+        self.hub.unsubscribe(self)
+
+
+class OrderEventHub:
+    """In-process pub/sub of order changes for SSE and WebSocket clients.
+
+    Subscribers wait on asyncio queues, so idle connections cost no thread.
+    Each event is serialized once, and only when someone is listening, then
+    fanned out to the subscribers of its order, of its new status and of all
+    orders. A subscriber whose bounded queue fills up is evicted rather than
+    let the backlog grow. Only this process's changes are seen; with several
+    workers, clients get the events of the worker they are connected to.
+    """
+
+    def __init__(self, queue_size: int = SUBSCRIBER_QUEUE_SIZE):
+        self.queue_size = queue_size
+        self._lock = threading.Lock()
+        self._by_order: Dict[int, Set[Subscription]] = {}
+        self._by_status: Dict[str, Set[Subscription]] = {}
+        self._all: Set[Subscription] = set()
+        self.evictions = 0
+
+    def subscribe(self, order_id: Optional[int] = None, status: Optional[str] = None) -> Subscription:
+        """Listen to one order, to orders entering a status, or to every order"""
+        subscription = Subscription(self, order_id, status, self.queue_size)
+        with self._lock:
+            self._subscribers(subscription).add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        with self._lock:
+            if subscription.order_id is not None:
+                index, key = self._by_order, subscription.order_id
+            elif subscription.status is not None:
+                index, key = self._by_status, subscription.status
+            else:
+                index, key = None, None
+            subscribers = self._all if index is None else index.get(key, set())
+            if subscription not in subscribers:
+                return
+            subscribers.discard(subscription)
+            if index is not None and not subscribers:
+                del index[key]
+            if subscription.evicted:
+                self.evictions += 1
+
+    def _subscribers(self, subscription: Subscription) -> Set[Subscription]:
+        if subscription.order_id is not None:
+            return self._by_order.setdefault(subscription.order_id, set())
+        if subscription.status is not None:
+            return self._by_status.setdefault(subscription.status, set())
+        return self._all
+
+    def subscriber_count(self) -> int:
+        with self._lock:
+            return sum(map(len, self._by_order.values())) + sum(map(len, self._by_status.values())) + len(self._all)
+
+    def publish(self, event: str, order: Order) -> None:
+        """Send an order change ("created" or "status") to everyone listening"""
+        with self._lock:
+            targets = list(self._all)
+            targets.extend(self._by_order.get(order.id, ()))
+            targets.extend(self._by_status.get(order.status, ()))
+        if not targets:
+            return
+        data = encode_event(event, order)
+        # Nothing follows delivery, so single-order subscriptions end there
+        delivered = order.status == OrderStatus.DELIVERED
+        try:
+            running = asyncio.get_running_loop()
+        except RuntimeError:
+            running = None
+        for subscription in targets:
+            last = delivered and subscription.order_id is not None
+            if subscription.loop is running:
+                subscription.offer(data, last)
+                continue
+            try:
+                subscription.loop.call_soon_threadsafe(subscription.offer, data, last)
+            except RuntimeError:  # Its event loop has shut down
+                self.unsubscribe(subscription)
+
+
+def encode_event(event: str, order: Order) -> bytes:
+    return dumps({"event": event, "order": order_to_dict(order)})
+
+
+def sse_message(data: bytes) -> bytes:
+    """One Server-Sent Event; the event type travels inside the JSON"""
+    return b"data: " + data + b"\n\n"
+
+
+# Comment line that keeps proxies from closing an idle event stream
+SSE_HEARTBEAT = b": keep-alive\n\n"
+
+
+order_events = OrderEventHub()
@@ -0,0 +1,75 @@
+import heapq
+from typing import Any, Dict, Optional
+from fastapi.responses import Response
+from app.core.encoding import dumps
+from app.database.repository import OrderStats
+from app.models.money import Money
+from app.models.order import Order, OrderStatus
+
+
+class FastJSONResponse(Response):
+    """JSON response that renders plain Python data with orjson"""
+    media_type = "application/json"
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
+
+
+# Stored orders go straight to plain data with the same shape as OrderResponse /
+# OrderSummaryResponse, skipping the intermediate pydantic response models
+def order_to_dict(order: Order) -> Dict[str, Any]:
+    customer = order.customer
+    return {
+        "id": order.id,
+        "customer": {"name": customer.name, "phone": customer.phone, "address": customer.address},
+        "items": [
+            {
+                "menu_item_id": item.menu_item_id,
+                "menu_item_name": item.menu_item_name,
+                "quantity": item.quantity,
+                "unit_price": item.unit_price,
+                "item_total": item.item_total,
+            }
+            for item in order.items
+        ],
+        "status": order.status,
+        "items_total": order.items_total,
+        "total_items_count": order.total_items_count,
+        "version": order.version,
+        "menu_version": order.menu_version,
+        "created_at": order.created_at,
+        "confirmed_at": order.confirmed_at,
+        "ready_at": order.ready_at,
+        "delivered_at": order.delivered_at,
+    }
+
+
+def order_summary_to_dict(order: Order) -> Dict[str, Any]:
+    return {
+        "id": order.id,
+        "customer_name": order.customer.name,
+        "customer_phone": order.customer.phone,
+        "status": order.status,
+        "items_total": order.items_total,
+        "total_items_count": order.total_items_count,
+        "created_at": order.created_at,
+    }
+
+
+def order_stats_to_dict(stats: OrderStats, limit: Optional[int] = None) -> Dict[str, Any]:
+    """Plain data for OrderStatsResponse, with the `limit` best-selling items first"""
+    statuses = [status.value for status in OrderStatus]
+    ranked = heapq.nsmallest(
+        len(stats.items) if limit is None else limit,
+        stats.items.items(),
+        key=lambda entry: (-entry[1].quantity, entry[0]),
+    )
+    return {
+        "orders": {status: stats.orders_by_status.get(status, 0) for status in statuses},
+        "revenue": {status: stats.revenue_by_status[status] for status in statuses},
+        "total_revenue": sum(stats.revenue_by_status.values(), Money(0)),
+        "items": [
+            {"menu_item_id": item_id, "menu_item_name": sales.name, "quantity": sales.quantity, "revenue": sales.revenue}
+            for item_id, sales in ranked
+        ],
+    }
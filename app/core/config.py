@@ -1,10 +1,44 @@
-from pydantic import BaseSettings
+from typing import Optional
+from pydantic_settings import BaseSettings
 
 class Settings(BaseSettings):
     # Application settings
     APP_NAME: str = "Restaurant Food Ordering System"
     APP_VERSION: str = "1.0.0"
-    DATABASE_URL: str = "sqlite:///./test.db"  # Example for SQLite, change as needed
+    DATABASE_URL: str = "sqlite:///./restaurant.db"  # memory:// keeps nothing across restarts
+    DATABASE_POOL_SIZE: int = 5  # Maximum open connections for SQLite
+    WORKERS: int = 1  # uvicorn worker processes for `python -m app.main`; more than one needs shared storage
+
+    # journal:/// backend: fsync every commit (batched across concurrent writers)
+    # and compact the journal into a snapshot after this many records
+    JOURNAL_FSYNC: bool = True
+    JOURNAL_SNAPSHOT_EVERY: int = 100_000
+
+    # `python -m app.main`: move everything loaded at startup (e.g. a journal's
+    # orders) out of the cyclic GC's reach before serving
+    GC_FREEZE_ON_STARTUP: bool = False
+
+    # ID allocation: "sequential" for a single process, "time_ordered" for multiple workers
+    ID_ALLOCATOR: str = "sequential"
+    WORKER_ID: Optional[int] = None  # Claimed automatically when not set
+
+    # Time the stages of create_order: Server-Timing header and GET /debug/timings
+    SERVER_TIMING: bool = False
+
+    # memory:// backend: move orders delivered more than this many seconds ago
+    # out of memory into archive segment files, where they stay readable by ID
+    # (0 keeps every order in memory); segments go to a temporary directory
+    # unless ORDER_ARCHIVE_DIR is set, and are discarded on restart
+    ORDER_ARCHIVE_AFTER: float = 0
+    ORDER_ARCHIVE_DIR: Optional[str] = None
+
+    # POST /orders/ with an Idempotency-Key header: created-order responses kept
+    # for replaying retries, at most this many and each for this many seconds
+    IDEMPOTENCY_CACHE_SIZE: int = 10_000
+    IDEMPOTENCY_TTL: float = 24 * 60 * 60
+
+    # Re-verify materialized order totals on every read (enabled in tests)
+    CHECK_ORDER_TOTALS: bool = False
 
     class Config:
         env_file = ".env"
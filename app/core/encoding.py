@@ -0,0 +1,21 @@
+from typing import Any
+import orjson
+from app.models.money import Money, cached_text
+
+
+def _default(obj: Any) -> Any:
+    # Only types orjson cannot serialize itself (datetimes it writes with
+    # OPT_UTC_Z, as pydantic does), in the representation pydantic uses
+    if obj.__class__ is Money:
+        text = cached_text(obj.cents) if obj.places == 2 else None
+        return str(obj) if text is None else text
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+def dumps(content: Any) -> bytes:
+    """Serialize plain dicts/lists to compact JSON bytes"""
+    return orjson.dumps(content, default=_default, option=orjson.OPT_UTC_Z)
+
+
+def loads(data: bytes) -> Any:
+    return orjson.loads(data)
@@ -0,0 +1,159 @@
+import time
+from bisect import bisect_left
+from typing import Dict, Iterable, List, Optional, Tuple
+
+# Upper bounds in seconds of the request latency histogram buckets
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# Route label of requests that matched no route, so unknown paths cannot
+# create unbounded label values
+UNMATCHED_ROUTE = "<unmatched>"
+
+
+class Histogram:
+    """Counts per fixed bucket plus sum and count, rendered cumulatively"""
+
+    __slots__ = ("counts", "sum", "count")
+
+    def __init__(self):
+        self.counts = [0] * (len(LATENCY_BUCKETS) + 1)  # The last one is +Inf
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, seconds: float) -> None:
+        self.counts[bisect_left(LATENCY_BUCKETS, seconds)] += 1
+        self.sum += seconds
+        self.count += 1
+
+
+class RequestMetrics:
+    """Request counts, in-flight requests and latency histograms per route.
+
+    Routes are labelled by their path template (/orders/{order_id}), not the
+    requested path. Everything is updated from the event loop thread only, so
+    plain dicts and ints need no lock.
+    """
+
+    def __init__(self):
+        self.requests: Dict[Tuple[str, str, int], int] = {}
+        self.latency: Dict[Tuple[str, str], Histogram] = {}
+        self.in_progress: Dict[str, int] = {}
+
+    def record(self, method: str, route: str, status_code: int, seconds: float) -> None:
+        key = (method, route, status_code)
+        self.requests[key] = self.requests.get(key, 0) + 1
+        histogram = self.latency.get((method, route))
+        if histogram is None:
+            histogram = self.latency[(method, route)] = Histogram()
+        histogram.observe(seconds)
+
+    def reset(self) -> None:
+        self.requests.clear()
+        self.latency.clear()
+        self.in_progress.clear()
+
+    def render(self, gauges: Iterable[Tuple[str, str, Dict[str, str], float]] = ()) -> str:
+        """Prometheus text exposition of the request metrics and extra gauges.
+
+        `gauges` yields (name, help, labels, value); samples of one name must
+        be consecutive.
+        """
+        lines: List[str] = []
+        lines += metric_header("http_requests_total", "counter", "HTTP requests handled, by method, route and status")
+        for (method, route, status_code), count in sorted(self.requests.items()):
+            labels = {"method": method, "route": route, "status": str(status_code)}
+            lines.append(sample("http_requests_total", labels, count))
+
+        lines += metric_header("http_requests_in_progress", "gauge", "HTTP requests being handled, by method")
+        for method, count in sorted(self.in_progress.items()):
+            lines.append(sample("http_requests_in_progress", {"method": method}, count))
+
+        lines += metric_header("http_request_duration_seconds", "histogram", "HTTP request latency, by method and route")
+        for (method, route), histogram in sorted(self.latency.items()):
+            labels = {"method": method, "route": route}
+            cumulative = 0
+            for bound, count in zip(LATENCY_BUCKETS + (float("inf"),), histogram.counts):
+                cumulative += count
+                le = "+Inf" if bound == float("inf") else repr(bound)
+                lines.append(sample("http_request_duration_seconds_bucket", {**labels, "le": le}, cumulative))
+            lines.append(sample("http_request_duration_seconds_sum", labels, histogram.sum))
+            lines.append(sample("http_request_duration_seconds_count", labels, histogram.count))
+
+        last_name: Optional[str] = None
+        for name, help_text, labels, value in gauges:
+            if name != last_name:
+                lines += metric_header(name, "gauge", help_text)
+                last_name = name
+            lines.append(sample(name, labels, value))
+        return "\n".join(lines) + "\n"
+
+
+def metric_header(name: str, kind: str, help_text: str) -> List[str]:
+    return [f"# HELP {name} {help_text}", f"# TYPE {name} {kind}"]
+
+
+def escape_label(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n")
+
+
+def sample(name: str, labels: Dict[str, str], value: float) -> str:
+    if not labels:
+        return f"{name} {value}"
+    rendered = ",".join(f'{key}="{escape_label(label)}"' for key, label in labels.items())
+    return f"{name}{{{rendered}}} {value}"
+
+
+def route_template(scope) -> str:
+    """Path template of the route that handled a request, e.g. /orders/{order_id}.
+
+    The matched route may belong to an included router and know only its own
+    part of the path, so the prefix in front of it is taken from the request.
+    """
+    route = scope.get("route")
+    path_format = getattr(route, "path_format", None)
+    if path_format is None:
+        return UNMATCHED_ROUTE
+    params = scope.get("path_params") or {}
+    matched = path_format.format(**{name: str(value) for name, value in params.items()}) if params else path_format
+    path = scope["path"]
+    return path[:len(path) - len(matched)] + path_format if path.endswith(matched) else path_format
+
+
+class MetricsMiddleware:
+    """Pure ASGI middleware feeding RequestMetrics.
+
+    Latency runs from receiving the request until the app returns, so for
+    streaming responses it includes sending the body. The route is read from
+    the scope after routing; requests that raise are counted as 500.
+    """
+
+    def __init__(self, app, metrics: Optional[RequestMetrics] = None):
+        self.app = app
+        self.metrics = request_metrics if metrics is None else metrics
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status_code = 500
+
+        async def send_and_capture_status(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        metrics = self.metrics
+        method = scope["method"]
+        metrics.in_progress[method] = metrics.in_progress.get(method, 0) + 1
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_and_capture_status)
+        finally:
+            elapsed = time.perf_counter() - start
+            metrics.in_progress[method] = metrics.in_progress.get(method, 1) - 1
+            metrics.record(method, route_template(scope), status_code, elapsed)
+
+
+request_metrics = RequestMetrics()
@@ -0,0 +1,20 @@
+import asyncio
+import socket
+from uvicorn.protocols.http.auto import AutoHTTPProtocol
+
+
+class NoDelayHTTPProtocol(AutoHTTPProtocol):
+    """uvicorn's default HTTP protocol with Nagle's algorithm turned off.
+
+    With --workers, uvicorn binds the listening socket with protocol number 0,
+    so asyncio does not set TCP_NODELAY on accepted connections. Responses go
+    out in more than one send and Nagle then holds the tail until the client's
+    delayed ACK, adding ~40 ms to every keep-alive request. Select it with
+    `--http app.core.server:NoDelayHTTPProtocol`.
+    """
+
+    def connection_made(self, transport: asyncio.Transport) -> None:
+        sock = transport.get_extra_info("socket")
+        if sock is not None and sock.family in (socket.AF_INET, socket.AF_INET6):
+            sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        super().connection_made(transport)
@@ -0,0 +1,128 @@
+import threading
+import time
+from collections import deque
+from typing import Dict, List, Tuple, Union
+from fastapi import Response
+from app.core.config import settings
+
+# Recent durations kept per stage for the percentiles of the debug endpoint
+RECENT_SAMPLES = 1024
+
+
+class _Stage:
+    """Context manager adding one stage's duration to its RequestTimer"""
+
+    __slots__ = ("timer", "name", "start")
+
+    def __init__(self, timer: "RequestTimer", name: str):
+        self.timer = timer
+        self.name = name
+
+    def __enter__(self) -> None:
+        self.start = time.perf_counter()
+
+    def __exit__(self, *exc_info) -> None:
+        self.timer.stages.append((self.name, time.perf_counter() - self.start))
+
+
+class RequestTimer:
+    """Durations of the stages of one request, in the order they ran"""
+
+    __slots__ = ("operation", "stages", "start")
+
+    def __init__(self, operation: str):
+        self.operation = operation
+        self.stages: List[Tuple[str, float]] = []
+        self.start = time.perf_counter()
+
+    def stage(self, name: str) -> _Stage:
+        return _Stage(self, name)
+
+    def finish(self, response: Response) -> Response:
+        """Add the Server-Timing header and feed the aggregated statistics"""
+        total = time.perf_counter() - self.start
+        self.stages.append(("total", total))
+        response.headers["Server-Timing"] = ", ".join(
+            f"{name};dur={seconds * 1e3:.3f}" for name, seconds in self.stages
+        )
+        stage_stats.record(self.operation, self.stages)
+        return response
+
+
+class _NoStage:
+    __slots__ = ()
+
+    def __enter__(self) -> None:
+        pass
+
+    def __exit__(self, *exc_info) -> None:
+        pass
+
+
+class NullTimer:
+    """Stand-in for RequestTimer when timing is off; every call is a no-op"""
+
+    __slots__ = ()
+    _stage = _NoStage()
+
+    def stage(self, name: str) -> _NoStage:
+        return self._stage
+
+    def finish(self, response: Response) -> Response:
+        return response
+
+
+NULL_TIMER = NullTimer()
+
+
+def request_timer(operation: str) -> Union[RequestTimer, NullTimer]:
+    """A timer for one request to `operation`, or NULL_TIMER when SERVER_TIMING is off"""
+    return RequestTimer(operation) if settings.SERVER_TIMING else NULL_TIMER
+
+
+class StageStats:
+    """Per-operation, per-stage count, total and maximum, plus recent samples for percentiles"""
+
+    def __init__(self, recent: int = RECENT_SAMPLES):
+        self.recent = recent
+        self._lock = threading.Lock()
+        self._stats: Dict[Tuple[str, str], list] = {}  # [count, total, max, recent durations]
+
+    def record(self, operation: str, stages: List[Tuple[str, float]]) -> None:
+        with self._lock:
+            for name, seconds in stages:
+                entry = self._stats.get((operation, name))
+                if entry is None:
+                    entry = self._stats[(operation, name)] = [0, 0.0, 0.0, deque(maxlen=self.recent)]
+                entry[0] += 1
+                entry[1] += seconds
+                entry[2] = max(entry[2], seconds)
+                entry[3].append(seconds)
+
+    def snapshot(self) -> Dict[str, Dict[str, Dict[str, float]]]:
+        """{operation: {stage: {count, mean_ms, max_ms, p50_ms, p99_ms}}}; percentiles cover recent requests"""
+        with self._lock:
+            entries = [
+                (key, count, total, peak, sorted(recent)) for key, (count, total, peak, recent) in self._stats.items()
+            ]
+        result: Dict[str, Dict[str, Dict[str, float]]] = {}
+        for (operation, name), count, total, peak, recent in entries:
+            result.setdefault(operation, {})[name] = {
+                "count": count,
+                "mean_ms": total / count * 1e3,
+                "max_ms": peak * 1e3,
+                "p50_ms": _percentile(recent, 0.50) * 1e3,
+                "p99_ms": _percentile(recent, 0.99) * 1e3,
+            }
+        return result
+
+    def reset(self) -> None:
+        with self._lock:
+            self._stats.clear()
+
+
+def _percentile(sorted_values: List[float], fraction: float) -> float:
+    return sorted_values[min(len(sorted_values) - 1, int(fraction * len(sorted_values)))]
+
+
+stage_stats = StageStats()
@@ -1,140 +1,206 @@
-from typing import Dict, Any
+import tempfile
+from datetime import datetime
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+from app.core.config import settings
+from app.database.id_allocator import create_id_allocator
+from app.database.journal import Journal, JournaledMenuRepository, JournaledOrderRepository, parse_journal_url
+from app.database.memory import InMemoryMenuRepository, InMemoryOrderRepository
+from app.database.order_archive import OrderArchive
+from app.database.repository import IdempotencyStore, MenuRepository, MenuSnapshot, OrderRepository, OrderStats
+from app.database.sqlite import (
+    SQLiteConnectionPool, SQLiteMenuRepository, SQLiteOrderRepository, parse_sqlite_url
+)
 from app.models.food_item import FoodItem
 from app.models.order import Order
 
-# In-memory databases using dictionaries
-menu_db: Dict[int, FoodItem] = {}
-orders_db: Dict[int, Order] = {}
 
-# Auto-incrementing IDs
-next_menu_id = 1
-next_order_id = 1
+# Storage backends, keyed by DATABASE_URL scheme
+def create_memory_storage(database_url: str) -> Tuple[MenuRepository, OrderRepository]:
+    """Process-local dictionaries, lost on restart; old delivered orders can
+    move to an on-disk archive (ORDER_ARCHIVE_AFTER) to keep memory bounded"""
+    archive = None
+    if settings.ORDER_ARCHIVE_AFTER > 0:
+        archive = OrderArchive(settings.ORDER_ARCHIVE_DIR or tempfile.mkdtemp(prefix="order-archive-"))
+    return (
+        InMemoryMenuRepository(settings.ID_ALLOCATOR, settings.WORKER_ID),
+        InMemoryOrderRepository(settings.ID_ALLOCATOR, settings.WORKER_ID, archive, settings.ORDER_ARCHIVE_AFTER),
+    )
 
 
-# Menu Database Functions
-def get_next_menu_id() -> int:
-    """Generate next available menu ID"""
-    global next_menu_id
-    if not menu_db:
-        next_menu_id = 1
-    else:
-        next_menu_id = max(menu_db.keys()) + 1
-    return next_menu_id
+def create_sqlite_storage(database_url: str) -> Tuple[MenuRepository, OrderRepository]:
+    """SQLite file (or sqlite:// for in-memory) shared through a connection pool"""
+    pool = SQLiteConnectionPool(parse_sqlite_url(database_url), size=settings.DATABASE_POOL_SIZE)
+    if settings.ID_ALLOCATOR == "sequential":
+        # AUTOINCREMENT already hands out sequential IDs that are never reused
+        return SQLiteMenuRepository(pool), SQLiteOrderRepository(pool)
+    return (
+        SQLiteMenuRepository(pool, create_id_allocator(settings.ID_ALLOCATOR, settings.WORKER_ID)),
+        SQLiteOrderRepository(pool, create_id_allocator(settings.ID_ALLOCATOR, settings.WORKER_ID)),
+    )
+
+
+def create_journal_storage(database_url: str) -> Tuple[MenuRepository, OrderRepository]:
+    """In-memory dictionaries recovered on startup from a snapshot and write-ahead journal"""
+    journal = Journal(
+        parse_journal_url(database_url),
+        fsync=settings.JOURNAL_FSYNC,
+        snapshot_every=settings.JOURNAL_SNAPSHOT_EVERY,
+    )
+    menu = JournaledMenuRepository(journal, settings.ID_ALLOCATOR, settings.WORKER_ID)
+    orders = JournaledOrderRepository(journal, settings.ID_ALLOCATOR, settings.WORKER_ID)
+    journal.open(menu, orders)
+    return menu, orders
+
+
+STORAGE_BACKENDS: Dict[str, Callable[[str], Tuple[MenuRepository, OrderRepository]]] = {
+    "memory": create_memory_storage,
+    "sqlite": create_sqlite_storage,
+    "journal": create_journal_storage,
+}
+
+
+def is_shared_storage(database_url: str) -> bool:
+    """Whether separate worker processes all see the same data at this URL.
+
+    SQLite files are shared: WAL lets readers in every process run alongside
+    the writer, BEGIN IMMEDIATE serializes writers across processes, and
+    order transitions and the menu version live in the database itself.
+    """
+    return database_url.startswith("sqlite:") and parse_sqlite_url(database_url) is not None
+
+
+def create_storage(database_url: str) -> Tuple[MenuRepository, OrderRepository]:
+    """Build the menu and order repositories for a database URL"""
+    scheme = database_url.split(":", 1)[0]
+    if scheme not in STORAGE_BACKENDS:
+        raise ValueError(f"Unsupported database URL: {database_url}")
+    return STORAGE_BACKENDS[scheme](database_url)
+
+
+def create_idempotency_store(database_url: str, orders: OrderRepository) -> Optional[IdempotencyStore]:
+    """Where Idempotency-Key responses are kept for every worker: the order
+    repository when storage is shared, else None, leaving them to the
+    per-process cache (process-local storage runs a single worker)"""
+    return orders if is_shared_storage(database_url) else None
+
+
+menu_repository, order_repository = create_storage(settings.DATABASE_URL)
+idempotency_store = create_idempotency_store(settings.DATABASE_URL, order_repository)
+
+
+def configure_storage(database_url: str) -> None:
+    """Switch every router and storage function to another backend"""
+    global menu_repository, order_repository, idempotency_store
+    menu_repository, order_repository = create_storage(database_url)
+    idempotency_store = create_idempotency_store(database_url, order_repository)
+
+
+def reset_database() -> None:
+    """Remove all menu items and orders"""
+    order_repository.clear()
+    menu_repository.clear()
+
+
+# FastAPI dependencies
+def get_menu_repository() -> MenuRepository:
+    """Menu repository of the active storage backend"""
+    return menu_repository
 
 
+def get_order_repository() -> OrderRepository:
+    """Order repository of the active storage backend"""
+    return order_repository
+
+
+def get_idempotency_store() -> Optional[IdempotencyStore]:
+    """Idempotency-Key storage shared by every worker of the active backend, if any"""
+    return idempotency_store
+
+
+# Menu Database Functions
 def add_item(item: FoodItem) -> FoodItem:
     """Add item to menu database"""
-    if item.id is None:
-        item.id = get_next_menu_id()
-    menu_db[item.id] = item
-    return item
+    return menu_repository.add_item(item)
 
 
-def get_item(item_id: int) -> FoodItem:
+def get_item(item_id: int) -> Optional[FoodItem]:
     """Get menu item by ID"""
-    return menu_db.get(item_id)
+    return menu_repository.get_item(item_id)
 
 
 def get_all_items() -> Dict[int, FoodItem]:
     """Get all menu items"""
-    return menu_db
+    return menu_repository.get_all_items()
+
+
+def get_items(item_ids: Iterable[int]) -> Dict[int, FoodItem]:
+    """Get several menu items by ID in one lookup"""
+    return menu_repository.get_items(item_ids)
+
+
+def get_menu_snapshot(item_ids: Iterable[int]) -> MenuSnapshot:
+    """Get several menu items by ID, all from one menu version"""
+    return menu_repository.get_menu_snapshot(item_ids)
+
 
+def search_items(query: str, limit: Optional[int] = None) -> List[FoodItem]:
+    """Search menu item names and descriptions"""
+    return menu_repository.search_items(query, limit)
 
-def update_item(item_id: int, item: FoodItem) -> FoodItem:
+
+def update_item(item_id: int, item: FoodItem) -> Optional[FoodItem]:
     """Update menu item in database"""
-    if item_id in menu_db:
-        item.id = item_id
-        menu_db[item_id] = item
-        return item
-    return None
+    return menu_repository.update_item(item_id, item)
 
 
 def delete_item(item_id: int) -> bool:
     """Delete menu item from database"""
-    if item_id in menu_db:
-        del menu_db[item_id]
-        return True
-    return False
+    return menu_repository.delete_item(item_id)
 
 
 def get_items_by_category(category: str) -> Dict[int, FoodItem]:
     """Get menu items by category"""
-    return {k: v for k, v in menu_db.items() if v.category == category}
+    return menu_repository.get_items_by_category(category)
 
 
 # Order Database Functions
-def get_next_order_id() -> int:
-    """Generate next available order ID"""
-    global next_order_id
-    if not orders_db:
-        next_order_id = 1
-    else:
-        next_order_id = max(orders_db.keys()) + 1
-    return next_order_id
-
-
 def add_order(order: Order) -> Order:
     """Add order to database"""
-    if order.id is None:
-        order.id = get_next_order_id()
-    orders_db[order.id] = order
-    return order
+    return order_repository.add_order(order)
+
+
+def add_orders(orders: List[Order]) -> List[Order]:
+    """Add several orders to database at once"""
+    return order_repository.add_orders(orders)
 
 
-def get_order(order_id: int) -> Order:
+def get_order(order_id: int) -> Optional[Order]:
     """Get order by ID"""
-    return orders_db.get(order_id)
+    return order_repository.get_order(order_id)
 
 
 def get_all_orders() -> Dict[int, Order]:
     """Get all orders"""
-    return orders_db
+    return order_repository.get_all_orders()
+
+
+def list_orders_by_time(
+    start: Optional[datetime] = None, end: Optional[datetime] = None, limit: Optional[int] = None
+) -> List[Order]:
+    """Get orders created between two times, oldest first"""
+    return order_repository.list_orders_by_time(start, end, limit=limit)
+
+
+def get_order_stats() -> OrderStats:
+    """Get order counts, revenue per status and sales per menu item"""
+    return order_repository.get_order_stats()
 
 
-def update_order(order_id: int, order: Order) -> Order:
+def update_order(order_id: int, order: Order) -> Optional[Order]:
     """Update order in database"""
-    if order_id in orders_db:
-        order.id = order_id
-        orders_db[order_id] = order
-        return order
-    return None
+    return order_repository.update_order(order_id, order)
 
 
-def update_order_status(order_id: int, status: str) -> Order:
+def update_order_status(order_id: int, status: str) -> Optional[Order]:
     """Update order status"""
-    if order_id in orders_db:
-        orders_db[order_id].status = status
-        return orders_db[order_id]
-    return None
-
-class Database:
-    def __init__(self):
-        self.menu_db: Dict[int, Dict[str, Any]] = {}
-        self.current_id: int = 1
-
-    def add_item(self, item: Dict[str, Any]) -> int:
-        item_id = self.current_id
-        self.menu_db[item_id] = item
-        self.current_id += 1
-        return item_id
-
-    def get_item(self, item_id: int) -> Dict[str, Any]:
-        return self.menu_db.get(item_id)
-
-    def update_item(self, item_id: int, item: Dict[str, Any]) -> bool:
-        if item_id in self.menu_db:
-            self.menu_db[item_id] = item
-            return True
-        return False
-
-    def delete_item(self, item_id: int) -> bool:
-        if item_id in self.menu_db:
-            del self.menu_db[item_id]
-            return True
-        return False
-
-    def get_all_items(self) -> Dict[int, Dict[str, Any]]:
-        return self.menu_db
-
-    def filter_by_category(self, category: str) -> Dict[int, Dict[str, Any]]:
-        return {item_id: item for item_id, item in self.menu_db.items() if item.get('category') == category}
\ No newline at end of file
+    return order_repository.update_order_status(order_id, status)
@@ -0,0 +1,129 @@
+import fcntl
+import os
+import tempfile
+import threading
+import time
+from typing import Optional
+
+
+class SequentialIdAllocator:
+    """Thread-safe O(1) auto-increment IDs that are never reused after deletes"""
+
+    def __init__(self, start: int = 1):
+        self._start = start
+        self._next = start
+        self._lock = threading.Lock()
+
+    def allocate(self) -> int:
+        """Hand out the next ID"""
+        with self._lock:
+            new_id = self._next
+            self._next += 1
+            return new_id
+
+    def observe(self, used_id: int) -> None:
+        """Record an explicitly assigned ID so it is never handed out again"""
+        with self._lock:
+            if used_id >= self._next:
+                self._next = used_id + 1
+
+    def reset(self) -> None:
+        """Start over from the first ID (only for clearing the whole store)"""
+        with self._lock:
+            self._next = self._start
+
+
+class TimeOrderedIdAllocator:
+    """Snowflake-style IDs that are unique across worker processes.
+
+    Layout (53 bits, so IDs stay exact in JavaScript clients):
+    41 bits of milliseconds since EPOCH_MS | 5 bits worker ID | 7 bits sequence.
+    When a worker exhausts the sequence within one millisecond it borrows the
+    next millisecond instead of sleeping, so allocation never blocks.
+    """
+
+    EPOCH_MS = 1704067200000  # 2024-01-01T00:00:00Z
+    WORKER_BITS = 5
+    SEQUENCE_BITS = 7
+    MAX_WORKERS = 1 << WORKER_BITS
+    MAX_SEQUENCE = (1 << SEQUENCE_BITS) - 1
+
+    def __init__(self, worker_id: int):
+        if not 0 <= worker_id < self.MAX_WORKERS:
+            raise ValueError(f"worker_id must be between 0 and {self.MAX_WORKERS - 1}")
+        self.worker_id = worker_id
+        self._last_ms = -1
+        self._sequence = 0
+        self._lock = threading.Lock()
+
+    def _now_ms(self) -> int:
+        return time.time_ns() // 1_000_000 - self.EPOCH_MS
+
+    def allocate(self) -> int:
+        """Hand out the next ID"""
+        with self._lock:
+            now = self._now_ms()
+            if now > self._last_ms:
+                self._last_ms = now
+                self._sequence = 0
+            elif self._sequence < self.MAX_SEQUENCE:
+                self._sequence += 1
+            else:
+                self._last_ms += 1
+                self._sequence = 0
+            return (
+                (self._last_ms << (self.WORKER_BITS + self.SEQUENCE_BITS))
+                | (self.worker_id << self.SEQUENCE_BITS)
+                | self._sequence
+            )
+
+    def observe(self, used_id: int) -> None:
+        """Keep later IDs of this worker above an explicitly assigned ID"""
+        with self._lock:
+            used_ms = used_id >> (self.WORKER_BITS + self.SEQUENCE_BITS)
+            if used_ms > self._last_ms:
+                self._last_ms = used_ms
+                self._sequence = self.MAX_SEQUENCE
+
+    def reset(self) -> None:
+        """IDs are time based, so there is nothing to rewind"""
+
+
+# Held for the lifetime of the process so no other worker can claim the slot
+_worker_lock_file = None
+
+
+def claim_worker_id(max_workers: int = TimeOrderedIdAllocator.MAX_WORKERS) -> int:
+    """Claim a worker ID that no other live process on this host holds.
+
+    Uses one advisory lock file per slot, so uvicorn workers started with the
+    same environment still end up with distinct IDs. The lock is released by
+    the OS when the process exits.
+    """
+    global _worker_lock_file
+    if _worker_lock_file is not None:
+        return int(os.path.basename(_worker_lock_file.name).split(".")[0])
+
+    lock_dir = os.path.join(tempfile.gettempdir(), "restaurant-ordering-workers")
+    os.makedirs(lock_dir, exist_ok=True)
+    for worker_id in range(max_workers):
+        lock_file = open(os.path.join(lock_dir, f"{worker_id}.lock"), "w")
+        try:
+            fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            lock_file.close()
+            continue
+        _worker_lock_file = lock_file
+        return worker_id
+    raise RuntimeError(f"All {max_workers} worker IDs are in use")
+
+
+def create_id_allocator(mode: str, worker_id: Optional[int] = None):
+    """Build an allocator for the given mode ("sequential" or "time_ordered")"""
+    if mode == "sequential":
+        return SequentialIdAllocator()
+    if mode == "time_ordered":
+        if worker_id is None:
+            worker_id = claim_worker_id()
+        return TimeOrderedIdAllocator(worker_id)
+    raise ValueError(f"Unknown ID allocator mode: {mode}")
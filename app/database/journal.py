@@ -0,0 +1,361 @@
+import glob
+import os
+import threading
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, List, Optional
+from app.core.encoding import dumps, loads
+from app.database.memory import InMemoryMenuRepository, InMemoryOrderRepository
+from app.database.order_codec import decode_order, encode_order
+from app.models.food_item import FoodItem
+from app.models.order import STATUS_TIMESTAMPS, Order, to_micros
+
+
+def encode_item(item: FoodItem) -> Dict[str, Any]:
+    return item.model_dump(mode="json", exclude={"dietary_info"})
+
+
+def parse_journal_url(database_url: str) -> str:
+    """Get the directory from a journal:/// URL"""
+    path = database_url[len("journal://"):]
+    if path.startswith("/"):
+        path = path[1:]
+    if not path:
+        raise ValueError(f"journal:// URLs need a directory, e.g. journal:///./data (got {database_url})")
+    return path
+
+
+class Journal:
+    """Append-only NDJSON write-ahead log with compacted snapshots.
+
+    Every mutation is applied in memory and appended to the log buffer under
+    one lock, so the log order is the order the changes happened in. The
+    caller then waits for the log to reach disk; whichever waiting thread
+    gets there first writes and fsyncs everything buffered so far, so
+    concurrent writers share one fsync (group commit).
+
+    The log lives in segments `journal-<seq>.ndjson`, where seq counts the
+    records written before the segment. `snapshot()` starts a new segment and
+    writes the state as of that point to `snapshot-<seq>.ndjson`, after which
+    older files are deleted. Snapshots are written without blocking writers,
+    so they can include some changes from the new segment; records store
+    absolute values and replay is idempotent, which makes that harmless.
+    """
+
+    def __init__(self, directory: str, fsync: bool = True, snapshot_every: Optional[int] = 100_000):
+        self.directory = directory
+        self.fsync = fsync
+        self.snapshot_every = snapshot_every
+        self.menu: Optional["JournaledMenuRepository"] = None
+        self.orders: Optional["JournaledOrderRepository"] = None
+        self._lock = threading.RLock()
+        self._sync_cond = threading.Condition()
+        self._syncing = False
+        self._buffer = bytearray()
+        self._seq = 0
+        self._durable_seq = 0
+        self._since_snapshot = 0
+        self._snapshot_thread: Optional[threading.Thread] = None
+        self._file = None
+
+    # Recovery
+
+    def open(self, menu: "JournaledMenuRepository", orders: "JournaledOrderRepository") -> None:
+        """Load the latest snapshot, replay the newer segments and start appending"""
+        self.menu, self.orders = menu, orders
+        os.makedirs(self.directory, exist_ok=True)
+        snapshot_seq = self._load_snapshot()
+        self._seq = snapshot_seq
+        for segment_seq, path in self._segments():
+            if segment_seq >= snapshot_seq:
+                self._seq = segment_seq + self._replay(path)
+        self._durable_seq = self._seq
+        self._since_snapshot = self._seq - snapshot_seq
+        self._file = open(self._segment_path(self._latest_segment_seq(snapshot_seq)), "ab")
+
+    def _files(self, prefix: str) -> List[tuple]:
+        found = []
+        for path in glob.glob(os.path.join(self.directory, f"{prefix}-*.ndjson")):
+            found.append((int(os.path.basename(path)[len(prefix) + 1:-len(".ndjson")]), path))
+        return sorted(found)
+
+    def _segments(self) -> List[tuple]:
+        return self._files("journal")
+
+    def _segment_path(self, seq: int) -> str:
+        return os.path.join(self.directory, f"journal-{seq:012d}.ndjson")
+
+    def _latest_segment_seq(self, snapshot_seq: int) -> int:
+        segments = self._segments()
+        return segments[-1][0] if segments and segments[-1][0] >= snapshot_seq else snapshot_seq
+
+    def _load_snapshot(self) -> int:
+        snapshots = self._files("snapshot")
+        if not snapshots:
+            return 0
+        seq, path = snapshots[-1]
+        with open(path, "rb") as snapshot:
+            header = loads(snapshot.readline())
+            self.menu.id_allocator.observe(header["item_id_floor"])
+            self.orders.id_allocator.observe(header["order_id_floor"])
+            for _ in range(header["items"]):
+                InMemoryMenuRepository.add_item(self.menu, FoodItem.model_validate(loads(snapshot.readline())))
+            batch = []
+            for line in snapshot:
+                batch.append(decode_order(loads(line)))
+                if len(batch) == 10_000:
+                    InMemoryOrderRepository.add_orders(self.orders, batch)
+                    batch = []
+            InMemoryOrderRepository.add_orders(self.orders, batch)
+        return seq
+
+    def _replay(self, path: str) -> int:
+        """Apply every complete record of a segment, returning how many there were"""
+        count = 0
+        valid_bytes = 0
+        menu, orders = self.menu, self.orders
+        with open(path, "rb+") as segment:
+            for line in segment:
+                if not line.endswith(b"\n"):
+                    # Torn write from a crash, never acknowledged; cut it off so
+                    # new records do not get appended to it
+                    segment.truncate(valid_bytes)
+                    break
+                valid_bytes += len(line)
+                record = loads(line)
+                op = record["op"]
+                if op == "order":
+                    InMemoryOrderRepository.add_order(orders, decode_order(record["order"]))
+                elif op == "status":
+                    orders.apply_status(record["id"], record["status"], record["version"], record.get("at"))
+                elif op == "item":
+                    InMemoryMenuRepository.add_item(menu, FoodItem.model_validate(record["item"]))
+                elif op == "delete_item":
+                    InMemoryMenuRepository.delete_item(menu, record["id"])
+                elif op == "clear_menu":
+                    InMemoryMenuRepository.clear(menu)
+                elif op == "clear_orders":
+                    InMemoryOrderRepository.clear(orders)
+                count += 1
+        return count
+
+    # Appending
+
+    @contextmanager
+    def write(self) -> Iterator[Callable[[Dict[str, Any]], None]]:
+        """Apply a change and journal it atomically, returning once it is durable.
+
+        Yields a function that appends a record; call it after the in-memory
+        change succeeded. Nothing is journaled if the block raises.
+        """
+        with self._lock:
+            start = self._seq
+            yield self._append
+            seq = self._seq
+        if seq > start:
+            self._sync(seq)
+            if self.snapshot_every is not None and self._since_snapshot >= self.snapshot_every:
+                self._snapshot_in_background()
+
+    def _append(self, record: Dict[str, Any]) -> None:
+        self._buffer += dumps(record)
+        self._buffer += b"\n"
+        self._seq += 1
+        self._since_snapshot += 1
+
+    @contextmanager
+    def _leading(self) -> Iterator[None]:
+        """Exclusive right to write to the segment file"""
+        with self._sync_cond:
+            while self._syncing:
+                self._sync_cond.wait()
+            self._syncing = True
+        try:
+            yield
+        finally:
+            with self._sync_cond:
+                self._syncing = False
+                self._sync_cond.notify_all()
+
+    def _sync(self, seq: int) -> None:
+        while True:
+            with self._sync_cond:
+                if self._durable_seq >= seq:
+                    return
+                if not self._syncing:
+                    break
+                self._sync_cond.wait()
+        with self._leading():
+            self._flush()
+
+    def _flush(self) -> None:
+        """Write and fsync the buffered records; only called while leading"""
+        with self._lock:
+            data, self._buffer = self._buffer, bytearray()
+            upto = self._seq
+        if data:
+            self._file.write(data)
+            self._file.flush()
+            if self.fsync:
+                os.fsync(self._file.fileno())
+        with self._sync_cond:
+            self._durable_seq = max(self._durable_seq, upto)
+
+    # Snapshots
+
+    def _snapshot_in_background(self) -> None:
+        with self._lock:
+            if self._snapshot_thread is not None and self._snapshot_thread.is_alive():
+                return
+            self._since_snapshot = 0
+            self._snapshot_thread = threading.Thread(target=self.snapshot, daemon=True)
+            self._snapshot_thread.start()
+
+    def snapshot(self) -> int:
+        """Compact everything journaled so far into a snapshot, returning its seq"""
+        with self._leading():
+            self._flush()
+            with self._lock:
+                seq = self._seq
+                self._file.close()
+                self._file = open(self._segment_path(seq), "ab")
+                self._since_snapshot = 0
+                items = list(self.menu.items.values())
+                records = list(self.orders.orders.values())
+                # Burn one ID each so IDs of deleted rows stay retired after a restart
+                header = {
+                    "items": len(items),
+                    "item_id_floor": self.menu.id_allocator.allocate(),
+                    "order_id_floor": self.orders.id_allocator.allocate(),
+                }
+
+        path = os.path.join(self.directory, f"snapshot-{seq:012d}.ndjson")
+        with open(path + ".tmp", "wb") as snapshot:
+            snapshot.write(dumps(header) + b"\n")
+            for item in items:
+                snapshot.write(dumps(encode_item(item)) + b"\n")
+            for record in records:
+                snapshot.write(dumps(encode_order(record.to_order())) + b"\n")
+            snapshot.flush()
+            if self.fsync:
+                os.fsync(snapshot.fileno())
+        os.replace(path + ".tmp", path)
+        self._fsync_directory()
+
+        for old_seq, old_path in self._files("snapshot") + self._segments():
+            if old_seq < seq:
+                os.remove(old_path)
+        return seq
+
+    def _fsync_directory(self) -> None:
+        if self.fsync:
+            fd = os.open(self.directory, os.O_RDONLY)
+            try:
+                os.fsync(fd)
+            finally:
+                os.close(fd)
+
+    def close(self) -> None:
+        if self._file is None:
+            return
+        with self._leading():
+            self._flush()
+            self._file.close()
+            self._file = None
+
+
+class JournaledMenuRepository(InMemoryMenuRepository):
+    """In-memory menu whose every change is journaled before it is acknowledged"""
+
+    def __init__(self, journal: Journal, id_allocator_mode: str = "sequential", worker_id: Optional[int] = None):
+        super().__init__(id_allocator_mode, worker_id)
+        self.journal = journal
+
+    def add_item(self, item: FoodItem) -> FoodItem:
+        with self.journal.write() as log:
+            super().add_item(item)
+            log({"op": "item", "item": encode_item(item)})
+        return item
+
+    def update_item(self, item_id: int, item: FoodItem) -> Optional[FoodItem]:
+        with self.journal.write() as log:
+            updated = super().update_item(item_id, item)
+            if updated is not None:
+                log({"op": "item", "item": encode_item(updated)})
+        return updated
+
+    def delete_item(self, item_id: int) -> bool:
+        with self.journal.write() as log:
+            deleted = super().delete_item(item_id)
+            if deleted:
+                log({"op": "delete_item", "id": item_id})
+        return deleted
+
+    def clear(self) -> None:
+        with self.journal.write() as log:
+            super().clear()
+            log({"op": "clear_menu"})
+
+
+class JournaledOrderRepository(InMemoryOrderRepository):
+    """In-memory orders whose every change is journaled before it is acknowledged"""
+
+    def __init__(self, journal: Journal, id_allocator_mode: str = "sequential", worker_id: Optional[int] = None):
+        super().__init__(id_allocator_mode, worker_id)
+        self.journal = journal
+
+    def add_order(self, order: Order) -> Order:
+        with self.journal.write() as log:
+            super().add_order(order)
+            log({"op": "order", "order": encode_order(order)})
+        return order
+
+    def add_orders(self, orders: List[Order]) -> List[Order]:
+        with self.journal.write() as log:
+            super().add_orders(orders)
+            for order in orders:
+                log({"op": "order", "order": encode_order(order)})
+        return orders
+
+    def update_order(self, order_id: int, order: Order, expected_version: Optional[int] = None) -> Optional[Order]:
+        with self.journal.write() as log:
+            updated = super().update_order(order_id, order, expected_version)
+            if updated is not None:
+                log({"op": "order", "order": encode_order(updated)})
+        return updated
+
+    def update_order_status(
+        self,
+        order_id: int,
+        status: str,
+        expected_status: Optional[str] = None,
+        expected_version: Optional[int] = None,
+    ) -> Optional[Order]:
+        with self.journal.write() as log:
+            updated = super().update_order_status(order_id, status, expected_status, expected_version)
+            if updated is not None:
+                at = getattr(updated, STATUS_TIMESTAMPS[updated.status])
+                log({
+                    "op": "status", "id": order_id, "status": updated.status, "version": updated.version,
+                    "at": to_micros(at),
+                })
+        return updated
+
+    def apply_status(self, order_id: int, status: str, version: int, at: Optional[int] = None) -> None:
+        """Set a replayed status, version and transition time, ignoring orders that no longer exist"""
+        with self._lock:
+            record = self.orders.get(order_id)
+            if record is None:
+                return
+            self._move_status(order_id, record.status, status)
+            self.stats.move_status(record.total_cents(), record.status, status)
+            if at is None:  # Journaled before transitions were timed
+                record.record_status(status, getattr(record, STATUS_TIMESTAMPS[status]))
+            else:
+                record.record_status(status, at)
+            record.version = version
+            self._track_delivery(record)
+
+    def clear(self) -> None:
+        with self.journal.write() as log:
+            super().clear()
+            log({"op": "clear_orders"})
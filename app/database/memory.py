@@ -0,0 +1,405 @@
+import heapq
+import threading
+import time
+from bisect import bisect_left, bisect_right, insort
+from datetime import datetime
+from contextlib import contextmanager
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+from app.database.id_allocator import create_id_allocator
+from app.database.menu_index import MenuIndex
+from app.database.menu_search import MenuSearchIndex
+from app.database.order_archive import OrderArchive
+from app.database.order_records import OrderRecord
+from app.database.order_stats import RunningOrderStats
+from app.database.repository import MenuSnapshot, OrderStats, OrderVersionConflict
+from app.models.food_item import FoodItem
+from app.models.money import Money
+from app.models.order import Order, OrderStatus, to_micros, utc_now
+
+
+class InMemoryMenuRepository:
+    """Menu storage in a process-local dictionary with secondary indexes.
+
+    A lock keeps the indexes and the menu version consistent with the items
+    when requests run on several threads. Snapshot reads take no lock: they
+    retry when a write overlapped them (a sequence lock), which is cheap
+    because stored items are never modified in place, only replaced.
+    """
+
+    def __init__(self, id_allocator_mode: str = "sequential", worker_id: Optional[int] = None):
+        self.items: Dict[int, FoodItem] = {}
+        self.index = MenuIndex()
+        self.search_index = MenuSearchIndex()
+        self.version = 0
+        self.id_allocator = create_id_allocator(id_allocator_mode, worker_id)
+        self._lock = threading.Lock()
+        self._writing = False
+
+    @contextmanager
+    def _write(self) -> Iterator[None]:
+        with self._lock:
+            self._writing = True
+            try:
+                yield
+            finally:
+                self._writing = False
+
+    def add_item(self, item: FoodItem) -> FoodItem:
+        with self._write():
+            if item.id is None:
+                item.id = self.id_allocator.allocate()
+            else:
+                self.id_allocator.observe(item.id)
+                if item.id in self.items:
+                    self.index.remove(self.items[item.id])
+                    self.search_index.remove(self.items[item.id])
+            self.items[item.id] = item
+            self.index.add(item)
+            self.search_index.add(item)
+            self.version += 1
+        return item
+
+    def get_item(self, item_id: int) -> Optional[FoodItem]:
+        return self.items.get(item_id)
+
+    def get_all_items(self) -> Dict[int, FoodItem]:
+        return self.items
+
+    def get_items(self, item_ids: Iterable[int]) -> Dict[int, FoodItem]:
+        items = self.items
+        return {item_id: items[item_id] for item_id in item_ids if item_id in items}
+
+    def get_menu_snapshot(self, item_ids: Iterable[int]) -> MenuSnapshot:
+        item_ids = list(item_ids)
+        items = self.items
+        while True:
+            version = self.version
+            if not self._writing:
+                found = {item_id: items[item_id] for item_id in item_ids if item_id in items}
+                # Consistent unless a write started or finished while reading
+                if not self._writing and self.version == version:
+                    return MenuSnapshot(version, found)
+            time.sleep(0)  # Let the writer finish
+
+    def update_item(self, item_id: int, item: FoodItem) -> Optional[FoodItem]:
+        with self._write():
+            if item_id not in self.items:
+                return None
+            item.id = item_id
+            self.index.update(self.items[item_id], item)
+            self.search_index.update(self.items[item_id], item)
+            self.items[item_id] = item
+            self.version += 1
+            return item
+
+    def delete_item(self, item_id: int) -> bool:
+        with self._write():
+            if item_id not in self.items:
+                return False
+            item = self.items.pop(item_id)
+            self.index.remove(item)
+            self.search_index.remove(item)
+            self.version += 1
+            return True
+
+    def get_items_by_category(self, category: str) -> Dict[int, FoodItem]:
+        with self._lock:
+            return {item_id: self.items[item_id] for item_id in sorted(self.index.category_ids(category))}
+
+    def query_items(
+        self,
+        category: Optional[str] = None,
+        min_price: Optional[Money] = None,
+        max_price: Optional[Money] = None,
+        flags: Optional[Dict[str, bool]] = None,
+        sort: str = "id",
+        limit: Optional[int] = None,
+    ) -> List[FoodItem]:
+        with self._lock:
+            item_ids = self.index.query(category, min_price, max_price, flags, sort, limit)
+            return [self.items[item_id] for item_id in item_ids]
+
+    def search_items(self, query: str, limit: Optional[int] = None) -> List[FoodItem]:
+        with self._lock:
+            return [self.items[item_id] for item_id in self.search_index.search(query, limit)]
+
+    def count_items(self) -> int:
+        return len(self.items)
+
+    def get_menu_version(self) -> int:
+        return self.version
+
+    def clear(self) -> None:
+        with self._write():
+            self.items.clear()
+            self.index.clear()
+            self.search_index.clear()
+            self.version += 1
+            self.id_allocator.reset()
+
+
+# Archiving runs during writes, at most this often (in seconds), so each pass
+# moves a batch of orders with a single fsync
+ARCHIVE_INTERVAL = 10.0
+
+
+def _insert_sorted(ids: list, key) -> None:
+    """Insert into an ascending list; new keys mostly grow, so this is usually an append"""
+    if not ids or key > ids[-1]:
+        ids.append(key)
+    else:
+        insort(ids, key)
+
+
+def _remove_sorted(ids: list, key) -> None:
+    del ids[bisect_left(ids, key)]
+
+
+class InMemoryOrderRepository:
+    """Order storage in a process-local dictionary.
+
+    Keeps the order IDs in ascending order overall and per status, and
+    (creation time, ID) keys in ascending order, so pages, status queues and
+    time ranges are found with a bisect and cost only their own size.
+    Writes take a lock so a status change and its index move are atomic, and
+    keep the running order stats current.
+
+    Orders are stored as compact OrderRecords, a few hundred bytes each
+    instead of several kilobytes of pydantic models; reads materialize the
+    Order models they return, so callers never share the stored state.
+
+    With an archive, orders delivered more than `archive_after` seconds ago
+    move out of memory into it during writes, so memory stays bounded
+    however long the process runs. Archived orders stay readable by ID but
+    leave every listing, count and aggregate.
+    """
+
+    def __init__(
+        self,
+        id_allocator_mode: str = "sequential",
+        worker_id: Optional[int] = None,
+        archive: Optional[OrderArchive] = None,
+        archive_after: float = 0.0,
+    ):
+        self.orders: Dict[int, OrderRecord] = {}
+        self.order_ids: List[int] = []
+        self.ids_by_status: Dict[str, List[int]] = {s.value: [] for s in OrderStatus}
+        self.created_index: List[Tuple[int, int]] = []  # (created_at in epoch microseconds, ID)
+        self.stats = RunningOrderStats()
+        self.id_allocator = create_id_allocator(id_allocator_mode, worker_id)
+        self.archive = archive
+        self.archive_after = archive_after
+        self.deliveries: List[Tuple[int, int]] = []  # Heap of (delivered_at in epoch microseconds, ID), to archive
+        self._next_archive = time.monotonic() + ARCHIVE_INTERVAL
+        self._lock = threading.Lock()
+
+    def add_order(self, order: Order) -> Order:
+        with self._lock:
+            self._insert(order, utc_now())
+            self._archive_if_due()
+        return order
+
+    def add_orders(self, orders: List[Order]) -> List[Order]:
+        with self._lock:
+            now = utc_now()
+            for order in orders:
+                self._insert(order, now)
+            self._archive_if_due()
+        return orders
+
+    def _insert(self, order: Order, now: datetime) -> None:
+        if order.id is None:
+            order.id = self.id_allocator.allocate()
+        else:
+            self.id_allocator.observe(order.id)
+            if self.archive is not None and order.id in self.archive:
+                self.archive.discard(order.id)
+        existing = self.orders.get(order.id)
+        if existing is None:
+            order.fill_timestamps(now)
+            record = OrderRecord.from_order(order)
+            _insert_sorted(self.order_ids, order.id)
+            _insert_sorted(self.created_index, (record.created_at, order.id))
+        else:
+            previous = existing.to_order()
+            order.fill_timestamps(now, previous)
+            record = OrderRecord.from_order(order)
+            _remove_sorted(self.ids_by_status[existing.status], order.id)
+            self._move_created(existing, record)
+            self.stats.remove(previous)
+        _insert_sorted(self.ids_by_status[record.status], order.id)
+        self.stats.add(order)
+        self.orders[order.id] = record
+        self._track_delivery(record)
+
+    def _move_created(self, existing: OrderRecord, record: OrderRecord) -> None:
+        if existing.created_at != record.created_at:
+            _remove_sorted(self.created_index, (existing.created_at, existing.id))
+            _insert_sorted(self.created_index, (record.created_at, record.id))
+
+    def get_order(self, order_id: int) -> Optional[Order]:
+        record = self.orders.get(order_id)
+        if record is not None:
+            return record.to_order()
+        if self.archive is not None:
+            return self.archive.get(order_id)
+        return None
+
+    def get_all_orders(self) -> Dict[int, Order]:
+        return {order_id: record.to_order() for order_id, record in list(self.orders.items())}
+
+    def list_orders(
+        self, after_id: Optional[int] = None, limit: Optional[int] = None, status: Optional[str] = None
+    ) -> List[Order]:
+        with self._lock:
+            ids = self.order_ids if status is None else self.ids_by_status[status]
+            start = 0 if after_id is None else bisect_right(ids, after_id)
+            stop = len(ids) if limit is None else start + limit
+            records = [self.orders[order_id] for order_id in ids[start:stop]]
+        return [record.to_order() for record in records]
+
+    def list_orders_by_time(
+        self,
+        start: Optional[datetime] = None,
+        end: Optional[datetime] = None,
+        after_id: Optional[int] = None,
+        limit: Optional[int] = None,
+    ) -> List[Order]:
+        with self._lock:
+            index = self.created_index
+            # (t,) sorts before every (t, ID) key, so these bisect to time bounds
+            first = 0 if start is None else bisect_left(index, (to_micros(start),))
+            cursor = None if after_id is None else self._created_key(after_id)
+            if cursor is not None:
+                first = max(first, bisect_right(index, cursor))
+            stop = len(index) if end is None else bisect_left(index, (to_micros(end),))
+            if limit is not None:
+                stop = min(stop, first + limit)
+            records = [self.orders[order_id] for _, order_id in index[first:stop]]
+        return [record.to_order() for record in records]
+
+    def _created_key(self, order_id: int) -> Optional[Tuple[int, int]]:
+        record = self.orders.get(order_id)
+        if record is not None:
+            return record.created_at, order_id
+        order = None if self.archive is None else self.archive.get(order_id)
+        return None if order is None else (to_micros(order.created_at), order_id)
+
+    def count_orders_by_status(self) -> Dict[str, int]:
+        return {status: len(ids) for status, ids in self.ids_by_status.items()}
+
+    def get_order_stats(self) -> OrderStats:
+        with self._lock:
+            return self.stats.snapshot(self.count_orders_by_status())
+
+    def update_order(self, order_id: int, order: Order, expected_version: Optional[int] = None) -> Optional[Order]:
+        with self._lock:
+            existing = self.orders.get(order_id)
+            if existing is None:
+                return None
+            if expected_version is not None and existing.version != expected_version:
+                raise OrderVersionConflict(existing)
+            order.id = order_id
+            order.version = existing.version + 1
+            previous = existing.to_order()
+            order.fill_timestamps(utc_now(), previous)
+            record = OrderRecord.from_order(order)
+            self._move_status(order_id, existing.status, record.status)
+            self._move_created(existing, record)
+            self.stats.remove(previous)
+            self.stats.add(order)
+            self.orders[order_id] = record
+            self._track_delivery(record)
+            self._archive_if_due()
+            return order
+
+    def update_order_status(
+        self,
+        order_id: int,
+        status: str,
+        expected_status: Optional[str] = None,
+        expected_version: Optional[int] = None,
+    ) -> Optional[Order]:
+        with self._lock:
+            record = self.orders.get(order_id)
+            if record is None:
+                return None
+            if (expected_status is not None and record.status != expected_status) or (
+                expected_version is not None and record.version != expected_version
+            ):
+                raise OrderVersionConflict(record.to_order())
+            self._move_status(order_id, record.status, status)
+            self.stats.move_status(record.total_cents(), record.status, status)
+            record.record_status(status, to_micros(utc_now()))
+            record.version += 1
+            self._track_delivery(record)
+            self._archive_if_due()
+            return record.to_order()
+
+    def _move_status(self, order_id: int, old_status: str, new_status: str) -> None:
+        if old_status != new_status:
+            _remove_sorted(self.ids_by_status[old_status], order_id)
+            _insert_sorted(self.ids_by_status[new_status], order_id)
+
+    # Retention
+
+    def _track_delivery(self, record: OrderRecord) -> None:
+        if self.archive is not None and record.status == OrderStatus.DELIVERED.value:
+            heapq.heappush(self.deliveries, (record.delivered_at, record.id))
+
+    def _archive_if_due(self) -> None:
+        if self.archive is not None and time.monotonic() >= self._next_archive:
+            self._next_archive = time.monotonic() + ARCHIVE_INTERVAL
+            self._archive_delivered(utc_now())
+
+    def archive_delivered(self, now: Optional[datetime] = None) -> int:
+        """Move orders delivered `archive_after` seconds before `now` into the archive, returning how many"""
+        with self._lock:
+            return self._archive_delivered(now or utc_now())
+
+    def _archive_delivered(self, now: datetime) -> int:
+        if self.archive is None:
+            return 0
+        cutoff = to_micros(now) - int(self.archive_after * 1_000_000)
+        due: List[Order] = []
+        while self.deliveries and self.deliveries[0][0] <= cutoff:
+            delivered_at, order_id = heapq.heappop(self.deliveries)
+            record = self.orders.get(order_id)
+            # Entries outlive orders that were archived, replaced or redelivered since
+            if (
+                record is not None and record.status == OrderStatus.DELIVERED.value
+                and record.delivered_at == delivered_at
+            ):
+                due.append(record.to_order())
+        if not due:
+            return 0
+        self.archive.add(due)
+
+        archived = set()
+        for order in due:
+            archived.add(order.id)
+            del self.orders[order.id]
+            self.stats.remove(order)
+        # One pass per index instead of a removal per order; slice assignment
+        # keeps the lists themselves, so nothing holds on to a stale copy
+        self.order_ids[:] = [order_id for order_id in self.order_ids if order_id not in archived]
+        delivered = self.ids_by_status[OrderStatus.DELIVERED.value]
+        delivered[:] = [order_id for order_id in delivered if order_id not in archived]
+        self.created_index[:] = [key for key in self.created_index if key[1] not in archived]
+        return len(due)
+
+    def count_archived_orders(self) -> int:
+        return 0 if self.archive is None else len(self.archive)
+
+    def clear(self) -> None:
+        with self._lock:
+            self.orders.clear()
+            self.order_ids.clear()
+            for ids in self.ids_by_status.values():
+                ids.clear()
+            self.created_index.clear()
+            self.deliveries.clear()
+            self.stats.clear()
+            if self.archive is not None:
+                self.archive.clear()
+            self.id_allocator.reset()
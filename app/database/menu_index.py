@@ -0,0 +1,135 @@
+from bisect import bisect_left, bisect_right, insort
+from decimal import Decimal
+from typing import Dict, List, Optional, Set, Tuple
+from app.models.food_item import FoodItem
+from app.models.money import Money
+
+# Boolean FoodItem fields that get a bitmap-style index
+FLAG_FIELDS = ("is_vegetarian", "is_spicy", "is_available")
+
+SORT_FIELDS = ("id", "price", "-price")
+
+
+def _as_decimal(amount: Optional[Money]) -> Optional[Decimal]:
+    return amount.to_decimal() if isinstance(amount, Money) else amount
+
+
+class MenuIndex:
+    """Secondary indexes over the menu, maintained on every add/update/delete.
+
+    - category: hash index from category to item IDs
+    - flags: one ID set per (flag, value) pair, so both `is_spicy=true` and
+      `is_spicy=false` are answered without scanning
+    - price: list of (price, id) kept sorted for range queries and ordering,
+      with prices as Decimals so that bisecting compares in C
+    """
+
+    def __init__(self):
+        self.by_category: Dict[str, Set[int]] = {}
+        self.by_flag: Dict[Tuple[str, bool], Set[int]] = {
+            (flag, value): set() for flag in FLAG_FIELDS for value in (True, False)
+        }
+        self.by_price: List[Tuple[Decimal, int]] = []
+        self.prices: Dict[int, Decimal] = {}
+
+    def add(self, item: FoodItem) -> None:
+        self.by_category.setdefault(item.category, set()).add(item.id)
+        for flag in FLAG_FIELDS:
+            self.by_flag[(flag, getattr(item, flag))].add(item.id)
+        price = item.price.to_decimal()
+        insort(self.by_price, (price, item.id))
+        self.prices[item.id] = price
+
+    def remove(self, item: FoodItem) -> None:
+        category_ids = self.by_category[item.category]
+        category_ids.discard(item.id)
+        if not category_ids:
+            del self.by_category[item.category]
+        for flag in FLAG_FIELDS:
+            self.by_flag[(flag, getattr(item, flag))].discard(item.id)
+        entry = (self.prices.pop(item.id), item.id)
+        del self.by_price[bisect_left(self.by_price, entry)]
+
+    def update(self, old: FoodItem, new: FoodItem) -> None:
+        self.remove(old)
+        self.add(new)
+
+    def clear(self) -> None:
+        self.by_category.clear()
+        for ids in self.by_flag.values():
+            ids.clear()
+        self.by_price.clear()
+        self.prices.clear()
+
+    def category_ids(self, category: str) -> Set[int]:
+        return self.by_category.get(category, set())
+
+    def _price_bounds(self, min_price: Optional[Decimal], max_price: Optional[Decimal]) -> Tuple[int, int]:
+        lo = 0 if min_price is None else bisect_left(self.by_price, (min_price,))
+        if max_price is None:
+            hi = len(self.by_price)
+        else:
+            # Tuples with the same price sort after (max_price,), so step past them
+            hi = bisect_right(self.by_price, (max_price, float("inf")))
+        return lo, hi
+
+    def query(
+        self,
+        category: Optional[str] = None,
+        min_price: Optional[Money] = None,
+        max_price: Optional[Money] = None,
+        flags: Optional[Dict[str, bool]] = None,
+        sort: str = "id",
+        limit: Optional[int] = None,
+    ) -> List[int]:
+        """Get the IDs of matching items.
+
+        The planner drives the query from the smallest candidate set (category,
+        a flag set or the price range, all sized in O(1) or O(log n)) and probes
+        the remaining predicates per candidate. A price-sorted query driven by
+        the price index stops as soon as `limit` matches are found; one driven
+        by a smaller set sorts just that set's matches, so a small category
+        never walks the price index of the whole menu.
+        """
+        if sort not in SORT_FIELDS:
+            raise ValueError(f"Unsupported sort field: {sort}")
+        min_price, max_price = _as_decimal(min_price), _as_decimal(max_price)
+
+        sets: List[Set[int]] = []
+        if category is not None:
+            sets.append(self.category_ids(category))
+        for flag, value in (flags or {}).items():
+            sets.append(self.by_flag[(flag, value)])
+        lo, hi = self._price_bounds(min_price, max_price)
+        has_price_filter = min_price is not None or max_price is not None
+        sets.sort(key=len)
+
+        # Drive from the price index only when it is the most selective
+        # predicate: a limited price-sorted walk can still visit the whole
+        # range before finding `limit` items of a small set
+        if not sets or hi - lo <= len(sets[0]):
+            positions = range(lo, hi) if sort != "-price" else range(hi - 1, lo - 1, -1)
+            result = []
+            for position in positions:
+                item_id = self.by_price[position][1]
+                if all(item_id in s for s in sets):
+                    result.append(item_id)
+                    if limit is not None and sort != "id" and len(result) == limit:
+                        break
+            if sort == "id":
+                result.sort()
+        else:
+            driver, rest = sets[0], sets[1:]
+            result = [item_id for item_id in driver if all(item_id in s for s in rest)]
+            if has_price_filter:
+                result = [
+                    item_id for item_id in result
+                    if (min_price is None or self.prices[item_id] >= min_price)
+                    and (max_price is None or self.prices[item_id] <= max_price)
+                ]
+            if sort == "id":
+                result.sort()
+            else:
+                result.sort(key=lambda item_id: (self.prices[item_id], item_id), reverse=sort == "-price")
+
+        return result if limit is None else result[:limit]
@@ -0,0 +1,184 @@
+import heapq
+import math
+import re
+import unicodedata
+from bisect import bisect_left, insort
+from itertools import groupby
+from typing import Dict, List, Optional, Set, Tuple
+from app.models.food_item import FoodItem
+
+# A word in the name counts as much as this many in the description
+NAME_WEIGHT = 3.0
+# Completions of the last query word rank below the word typed out in full
+PREFIX_WEIGHT = 0.5
+# Sorts after every word starting with a prefix, bounding its completions
+_AFTER_PREFIX = "\U0010ffff"
+
+_WORD = re.compile(r"\w+")
+
+
+def tokenize(text: Optional[str]) -> List[str]:
+    """Lower-case words with accents removed, so "Crème" matches "creme"
+    (the same folding as SQLite FTS5's default unicode61 tokenizer)"""
+    if not text:
+        return []
+    decomposed = unicodedata.normalize("NFKD", text.casefold())
+    return _WORD.findall("".join(char for char in decomposed if not unicodedata.combining(char)))
+
+
+def item_terms(item: FoodItem) -> Dict[str, float]:
+    """Weight of every word of an item: occurrences, with name words counting NAME_WEIGHT"""
+    weights: Dict[str, float] = {}
+    for term in tokenize(item.name):
+        weights[term] = weights.get(term, 0.0) + NAME_WEIGHT
+    for term in tokenize(item.description):
+        weights[term] = weights.get(term, 0.0) + 1.0
+    return weights
+
+
+class MenuSearchIndex:
+    """Inverted index over menu item names and descriptions, maintained on every add/update/delete.
+
+    - postings: term -> {weight: IDs of the items with that weight for the term}
+    - terms: every indexed term, kept sorted so completions of a prefix are
+      one bisect away
+    Every query word but the last must match a whole word; the last one also
+    matches as a prefix, for search-as-you-type. Items must match all words
+    and are ranked by the sum of weight x inverse document frequency.
+
+    Weights take only a few values, so matches fall into a few groups of
+    equal score: one per combination of a weight for every query word. The
+    groups are intersected as sets, best score first, and a search stops
+    once it has `limit` items instead of scoring every match. When the whole
+    words leave fewer items than a short prefix has completions, each of
+    those items is scored by its own words instead.
+    """
+
+    def __init__(self):
+        self.postings: Dict[str, Dict[float, Set[int]]] = {}
+        self.counts: Dict[str, int] = {}  # Items containing each term
+        self.terms: List[str] = []
+        self.item_terms: Dict[int, Dict[str, float]] = {}
+
+    def add(self, item: FoodItem) -> None:
+        weights = item_terms(item)
+        for term, weight in weights.items():
+            buckets = self.postings.get(term)
+            if buckets is None:
+                buckets = self.postings[term] = {}
+                self.counts[term] = 0
+                insort(self.terms, term)
+            buckets.setdefault(weight, set()).add(item.id)
+            self.counts[term] += 1
+        self.item_terms[item.id] = weights
+
+    def remove(self, item: FoodItem) -> None:
+        for term, weight in self.item_terms.pop(item.id, {}).items():
+            buckets = self.postings[term]
+            buckets[weight].discard(item.id)
+            if not buckets[weight]:
+                del buckets[weight]
+            self.counts[term] -= 1
+            if not buckets:
+                del self.postings[term]
+                del self.counts[term]
+                del self.terms[bisect_left(self.terms, term)]
+
+    def update(self, old: FoodItem, new: FoodItem) -> None:
+        self.remove(old)
+        self.add(new)
+
+    def clear(self) -> None:
+        self.postings.clear()
+        self.counts.clear()
+        self.terms.clear()
+        self.item_terms.clear()
+
+    def _idf(self, term: str) -> float:
+        return math.log(1 + len(self.item_terms) / self.counts[term])
+
+    def _prefix_factor(self, term: str, prefix: str) -> float:
+        return self._idf(term) * (1.0 if term == prefix else PREFIX_WEIGHT)
+
+    def _completions(self, prefix: str) -> Dict[str, float]:
+        """Score factor of every indexed word starting with `prefix`, like FTS5's prefix queries"""
+        terms = self.terms
+        completions = {}
+        for position in range(bisect_left(terms, prefix), len(terms)):
+            term = terms[position]
+            if not term.startswith(prefix):
+                break
+            completions[term] = self._prefix_factor(term, prefix)
+        return completions
+
+    def _rank_candidates(
+        self, groups: List[Tuple[float, Set[int]]], prefix: str, limit: Optional[int]
+    ) -> List[int]:
+        """search() over few candidate items: each scores with its best completion of `prefix`"""
+        factors: Dict[str, float] = {}
+        scored = []
+        for score, matched in groups:
+            for item_id in matched:
+                best = None
+                for term, weight in self.item_terms[item_id].items():
+                    if term.startswith(prefix):
+                        factor = factors.get(term)
+                        if factor is None:
+                            factor = factors[term] = self._prefix_factor(term, prefix)
+                        if best is None or weight * factor > best:
+                            best = weight * factor
+                if best is not None:
+                    scored.append((-(score + best), item_id))
+        ranked = sorted(scored) if limit is None else heapq.nsmallest(limit, scored)
+        return [item_id for _, item_id in ranked]
+
+    def search(self, query: str, limit: Optional[int] = None) -> List[int]:
+        """Get the IDs of the items matching every word of `query`, best first, ties by ID"""
+        words = tokenize(query)
+        if not words:
+            return []
+        *whole_words, prefix = words
+
+        # (score, IDs) per combination of weights of the whole words; None
+        # stands for every item until the first word narrows it down
+        groups: List[Tuple[float, Optional[Set[int]]]] = [(0.0, None)]
+        for word in whole_words:
+            buckets = self.postings.get(word)
+            if buckets is None:
+                return []
+            idf = self._idf(word)
+            groups = [
+                (score + weight * idf, ids if matched is None else matched & ids)
+                for score, matched in groups for weight, ids in buckets.items()
+            ]
+            groups = [(score, matched) for score, matched in groups if matched]
+        if whole_words:
+            start = bisect_left(self.terms, prefix)
+            completion_count = bisect_left(self.terms, prefix + _AFTER_PREFIX, start) - start
+            if sum(len(matched) for _, matched in groups) < completion_count * len(groups):
+                return self._rank_candidates(groups, prefix, limit)
+        completions = self._completions(prefix)
+        combinations = sorted(
+            (
+                (score + weight * factor, matched, ids)
+                for score, matched in groups
+                for term, factor in completions.items()
+                for weight, ids in self.postings[term].items()
+            ),
+            key=lambda combination: -combination[0],
+        )
+
+        # An item under several completions counts with its best one, which
+        # comes first; equal scores are ordered by ID
+        result: List[int] = []
+        seen: Set[int] = set()
+        for _, tied in groupby(combinations, key=lambda combination: combination[0]):
+            if limit is not None and len(result) >= limit:
+                break
+            found: Set[int] = set()
+            for _, matched, ids in tied:
+                found.update(ids if matched is None else matched & ids)
+            found -= seen
+            seen |= found
+            result += sorted(found) if limit is None else heapq.nsmallest(limit - len(result), found)
+        return result
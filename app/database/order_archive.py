@@ -0,0 +1,118 @@
+import glob
+import os
+import threading
+from array import array
+from bisect import bisect_left
+from heapq import merge
+from typing import List, Optional, Tuple
+from app.core.encoding import dumps, loads
+from app.database.order_codec import decode_order, encode_order
+from app.models.order import Order
+
+# A new segment file is started once the current one reaches this size
+SEGMENT_BYTES = 64 * 1024 * 1024
+# Locations pack the segment number above the byte offset within it
+_OFFSET_BITS = 40
+
+
+class OrderArchive:
+    """Orders moved out of memory, kept readable by ID in append-only segment files.
+
+    Orders are appended as encoded NDJSON lines to `archive-<n>.ndjson`. All
+    that stays in memory is where each one is: two parallel int64 arrays
+    sorted by order ID (16 bytes per order), so a lookup is a bisect, a seek
+    and one line to decode. Archived orders are read-only.
+
+    The archive belongs to one process-local repository, so it starts empty,
+    deleting segments left behind by an earlier run.
+    """
+
+    def __init__(self, directory: str, segment_bytes: int = SEGMENT_BYTES):
+        self.directory = directory
+        self.segment_bytes = segment_bytes
+        os.makedirs(directory, exist_ok=True)
+        self._lock = threading.Lock()
+        self._reset()
+
+    def _reset(self) -> None:
+        for path in glob.glob(os.path.join(self.directory, "archive-*.ndjson")):
+            os.remove(path)
+        # Only ever appended to or replaced as a pair, so readers need no lock
+        self._index: Tuple[array, array] = (array("q"), array("q"))
+        self._segment = 0
+        self._file = open(self._segment_path(0), "ab")
+
+    def _segment_path(self, segment: int) -> str:
+        return os.path.join(self.directory, f"archive-{segment:06d}.ndjson")
+
+    def __len__(self) -> int:
+        return len(self._index[0])
+
+    def __contains__(self, order_id: int) -> bool:
+        return self._locate(order_id) is not None
+
+    def _locate(self, order_id: int) -> Optional[int]:
+        ids, locations = self._index
+        position = bisect_left(ids, order_id)
+        if position < len(ids) and ids[position] == order_id:
+            return locations[position]
+        return None
+
+    def add(self, orders: List[Order]) -> None:
+        """Append orders and make them durable; an archived ID is replaced"""
+        if not orders:
+            return
+        with self._lock:
+            entries = []
+            for order in sorted(orders, key=lambda order: order.id):
+                if self._file.tell() >= self.segment_bytes:
+                    self._file.close()
+                    self._segment += 1
+                    self._file = open(self._segment_path(self._segment), "ab")
+                entries.append((order.id, self._segment << _OFFSET_BITS | self._file.tell()))
+                self._file.write(dumps(encode_order(order)) + b"\n")
+            self._file.flush()
+            os.fsync(self._file.fileno())
+
+            ids, locations = self._index
+            if not ids or entries[0][0] > ids[-1]:
+                # Delivery follows creation, so newly archived IDs usually come
+                # last and are appended in place; locations first, so a reader
+                # never finds an ID without its location
+                locations.extend(location for _, location in entries)
+                ids.extend(order_id for order_id, _ in entries)
+            else:
+                replaced = {order_id for order_id, _ in entries}
+                kept = ((order_id, location) for order_id, location in zip(ids, locations) if order_id not in replaced)
+                merged = list(merge(kept, entries))
+                ids = array("q", (order_id for order_id, _ in merged))
+                locations = array("q", (location for _, location in merged))
+                self._index = (ids, locations)
+
+    def get(self, order_id: int) -> Optional[Order]:
+        location = self._locate(order_id)
+        if location is None:
+            return None
+        with open(self._segment_path(location >> _OFFSET_BITS), "rb") as segment:
+            segment.seek(location & ((1 << _OFFSET_BITS) - 1))
+            return decode_order(loads(segment.readline()))
+
+    def discard(self, order_id: int) -> None:
+        """Forget an archived order, e.g. when an order with its ID is stored again"""
+        with self._lock:
+            ids, locations = self._index
+            position = bisect_left(ids, order_id)
+            if position < len(ids) and ids[position] == order_id:
+                ids, locations = array("q", ids), array("q", locations)
+                del ids[position]
+                del locations[position]
+                self._index = (ids, locations)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._file.close()
+            self._reset()
+
+    def close(self) -> None:
+        with self._lock:
+            self._file.close()
@@ -0,0 +1,39 @@
+from typing import Any, List
+from app.models.money import Money
+from app.models.order import Customer, Order, OrderItem, TIMESTAMP_FIELDS, construct_validated, from_micros, to_micros
+
+
+# Orders go into the journal, snapshots and the order archive as flat arrays,
+# which parse faster than objects: [id, status, version, name, phone, address,
+# [[menu_item_id, menu_item_name, quantity, unit_price], ...], menu_version,
+# created_at, confirmed_at, ready_at, delivered_at], times in epoch microseconds
+def encode_order(order: Order) -> List[Any]:
+    customer = order.customer
+    return [
+        order.id, order.status, order.version, customer.name, customer.phone, customer.address,
+        [[item.menu_item_id, item.menu_item_name, item.quantity, str(item.unit_price)] for item in order.items],
+        order.menu_version,
+    ] + [None if moment is None else to_micros(moment) for moment in (
+        order.created_at, order.confirmed_at, order.ready_at, order.delivered_at
+    )]
+
+
+def decode_order(data: List[Any]) -> Order:
+    # Encoded orders were validated when first stored, so skip validation
+    values = {
+        "id": data[0],
+        "customer": construct_validated(Customer, {"name": data[3], "phone": data[4], "address": data[5]}),
+        "items": tuple(
+            construct_validated(OrderItem, {
+                "menu_item_id": line[0], "menu_item_name": line[1], "quantity": line[2], "unit_price": Money.parse(line[3]),
+            })
+            for line in data[6]
+        ),
+        "status": data[1],
+        "version": data[2],
+        # Orders encoded before they recorded a menu version or timestamps lack them
+        "menu_version": data[7] if len(data) > 7 else None,
+    }
+    for position, field in enumerate(TIMESTAMP_FIELDS, 8):
+        values[field] = from_micros(data[position]) if len(data) > position else None
+    return construct_validated(Order, values)
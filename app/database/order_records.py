@@ -0,0 +1,136 @@
+import sys
+from typing import Dict, Optional, Tuple, Union
+from app.models.money import Money, money
+from app.models.order import (
+    STATUS_TIMESTAMPS, Customer, Order, OrderItem, OrderStatus, construct_validated, from_micros, to_micros
+)
+
+# Fields of an order line, flattened into OrderRecord.lines
+LINE_WIDTH = 4
+
+# One int object per distinct price in cents, shared by every line at that
+# price; OrderItem allows at most 999999 cents, which bounds it
+_cents: Dict[int, int] = {}
+
+
+Price = Union[int, Money]
+
+
+# Prices at two decimal places, nearly all of them, are kept as their
+# integer cents; any other Money is kept as is, so it renders exactly as
+# it was stored ("12.5" stays "12.5")
+def _compact_price(price: Money) -> Price:
+    if price.places != 2:
+        return price
+    return _cents.setdefault(price.cents, price.cents)
+
+
+def _price_to_money(price: Price) -> Money:
+    return money(price) if type(price) is int else price
+
+
+def _price_to_cents(price: Price) -> int:
+    return price if type(price) is int else price.cents
+
+
+# The interned value string, also for an OrderStatus assigned without validation
+def _status(status: str) -> str:
+    return OrderStatus(status).value
+
+
+def _micros(moment) -> Optional[int]:
+    return None if moment is None else to_micros(moment)
+
+
+class OrderRecord:
+    """A stored order in a fraction of the memory of its pydantic models.
+
+    Strings are interned, so every order for the same customer or menu
+    item shares them; lines are one flat tuple of (menu_item_id,
+    menu_item_name, quantity, price) per line, prices in integer cents (at
+    two places) and
+    times in epoch microseconds. Records live only inside storage: readers
+    get a pydantic Order built by `to_order`.
+    """
+
+    __slots__ = (
+        "id", "status", "version", "menu_version", "customer", "lines",
+        "created_at", "confirmed_at", "ready_at", "delivered_at",
+    )
+
+    def __init__(
+        self,
+        order_id: int,
+        status: str,
+        version: int,
+        menu_version: Optional[int],
+        customer: Tuple[str, str, str],
+        lines: tuple,
+        created_at: Optional[int],
+        confirmed_at: Optional[int],
+        ready_at: Optional[int],
+        delivered_at: Optional[int],
+    ):
+        self.id = order_id
+        self.status = status
+        self.version = version
+        self.menu_version = menu_version
+        self.customer = customer
+        self.lines = lines
+        self.created_at = created_at
+        self.confirmed_at = confirmed_at
+        self.ready_at = ready_at
+        self.delivered_at = delivered_at
+
+    @classmethod
+    def from_order(cls, order: Order) -> "OrderRecord":
+        customer = order.customer
+        lines = []
+        for item in order.items:
+            lines += (
+                item.menu_item_id, sys.intern(item.menu_item_name), item.quantity, _compact_price(item.unit_price)
+            )
+        return cls(
+            order.id, _status(order.status), order.version, order.menu_version,
+            (sys.intern(customer.name), sys.intern(customer.phone), sys.intern(customer.address)),
+            tuple(lines),
+            _micros(order.created_at), _micros(order.confirmed_at), _micros(order.ready_at), _micros(order.delivered_at),
+        )
+
+    def to_order(self) -> Order:
+        """Materialize the pydantic models, without validating them again"""
+        lines = self.lines
+        name, phone, address = self.customer
+        return construct_validated(Order, {
+            "id": self.id,
+            "customer": construct_validated(Customer, {"name": name, "phone": phone, "address": address}),
+            "items": tuple(
+                construct_validated(OrderItem, {
+                    "menu_item_id": lines[start],
+                    "menu_item_name": lines[start + 1],
+                    "quantity": lines[start + 2],
+                    "unit_price": _price_to_money(lines[start + 3]),
+                })
+                for start in range(0, len(lines), LINE_WIDTH)
+            ),
+            "status": self.status,
+            "version": self.version,
+            "menu_version": self.menu_version,
+            "created_at": from_micros(self.created_at),
+            "confirmed_at": from_micros(self.confirmed_at),
+            "ready_at": from_micros(self.ready_at),
+            "delivered_at": from_micros(self.delivered_at),
+        })
+
+    def total_cents(self) -> int:
+        lines = self.lines
+        return sum(
+            lines[start + 2] * _price_to_cents(lines[start + 3]) for start in range(0, len(lines), LINE_WIDTH)
+        )
+
+    def record_status(self, status: str, at: int) -> None:
+        """Move to `status` at `at` (epoch microseconds), like Order.record_status"""
+        self.status = _status(status)
+        field = STATUS_TIMESTAMPS[status]
+        if field != "created_at":
+            setattr(self, field, at)
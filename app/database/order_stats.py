@@ -0,0 +1,148 @@
+from array import array
+from typing import Dict, List, NamedTuple
+import numpy
+from app.database.repository import ItemSales, OrderRepository, OrderStats
+from app.models.money import Money
+from app.models.order import Order, OrderStatus
+
+STATUSES = tuple(status.value for status in OrderStatus)
+STATUS_CODES = {status: code for code, status in enumerate(STATUSES)}
+
+# Orders read from storage per round trip while exporting
+EXPORT_CHUNK_SIZE = 10_000
+
+
+class RunningOrderStats:
+    """Revenue per status and sales per menu item, updated in O(items) per order write.
+
+    Sums are kept in integer cents. Every Money is a whole number of cents
+    (finer amounts are rejected when parsed), so the sums are exact and add
+    up the same cents as the SQLite backend's triggers.
+
+    Storage calls add/remove when orders are stored or replaced and
+    move_status, with the order's total in cents, when only the status
+    changes, under its own write lock.
+    """
+
+    def __init__(self):
+        self.revenue_by_status: Dict[str, int] = {status: 0 for status in STATUSES}
+        self.items: Dict[int, list] = {}  # [name, quantity, revenue in cents]
+
+    def add(self, order: Order) -> None:
+        total = 0
+        items = self.items
+        for line in order.items:
+            cents = line.quantity * line.unit_price.cents
+            entry = items.get(line.menu_item_id)
+            if entry is None:
+                items[line.menu_item_id] = [line.menu_item_name, line.quantity, cents]
+            else:
+                entry[0] = line.menu_item_name
+                entry[1] += line.quantity
+                entry[2] += cents
+            total += cents
+        self.revenue_by_status[order.status] += total
+
+    def remove(self, order: Order) -> None:
+        total = 0
+        for line in order.items:
+            cents = line.quantity * line.unit_price.cents
+            entry = self.items[line.menu_item_id]
+            entry[1] -= line.quantity
+            entry[2] -= cents
+            if entry[1] == 0:
+                del self.items[line.menu_item_id]
+            total += cents
+        self.revenue_by_status[order.status] -= total
+
+    def move_status(self, total_cents: int, old_status: str, new_status: str) -> None:
+        if old_status != new_status:
+            self.revenue_by_status[old_status] -= total_cents
+            self.revenue_by_status[new_status] += total_cents
+
+    def clear(self) -> None:
+        for status in self.revenue_by_status:
+            self.revenue_by_status[status] = 0
+        self.items.clear()
+
+    def snapshot(self, orders_by_status: Dict[str, int]) -> OrderStats:
+        return OrderStats(
+            orders_by_status,
+            {status: Money(cents) for status, cents in self.revenue_by_status.items()},
+            {
+                item_id: ItemSales(name, quantity, Money(cents))
+                for item_id, (name, quantity, cents) in self.items.items()
+            },
+        )
+
+
+class OrderColumns(NamedTuple):
+    """Every stored order line as parallel int64 columns, for vectorized recomputes"""
+    order_status: array  # Per order: index into STATUSES
+    line_status: array  # Per line: status of its order
+    menu_item_id: array
+    quantity: array
+    unit_price_cents: array
+    names: Dict[int, str]  # Per menu item, from its line in the newest order
+
+
+def export_order_columns(orders: OrderRepository) -> OrderColumns:
+    """Read every order, a chunk at a time, into columns"""
+    columns = OrderColumns(array("q"), array("q"), array("q"), array("q"), array("q"), {})
+    after = None
+    while True:
+        chunk = orders.list_orders(after, EXPORT_CHUNK_SIZE)
+        if not chunk:
+            return columns
+        for order in chunk:
+            code = STATUS_CODES[order.status]
+            columns.order_status.append(code)
+            for line in order.items:
+                columns.line_status.append(code)
+                columns.menu_item_id.append(line.menu_item_id)
+                columns.quantity.append(line.quantity)
+                columns.unit_price_cents.append(line.unit_price.cents)
+                columns.names[line.menu_item_id] = line.menu_item_name
+        after = chunk[-1].id
+
+
+def recompute_order_stats(columns: OrderColumns) -> OrderStats:
+    """Exact aggregates computed from scratch, to cross-check the running ones"""
+    order_status = numpy.frombuffer(columns.order_status, dtype=numpy.int64)
+    line_status = numpy.frombuffer(columns.line_status, dtype=numpy.int64)
+    quantity = numpy.frombuffer(columns.quantity, dtype=numpy.int64)
+    revenue = quantity * numpy.frombuffer(columns.unit_price_cents, dtype=numpy.int64)
+    item_ids, item_index = numpy.unique(numpy.frombuffer(columns.menu_item_id, dtype=numpy.int64), return_inverse=True)
+
+    # bincount sums weights as float64, which is exact below 2**53 cents
+    orders_by_status = numpy.bincount(order_status, minlength=len(STATUSES))
+    revenue_by_status = numpy.bincount(line_status, weights=revenue, minlength=len(STATUSES))
+    quantity_by_item = numpy.bincount(item_index, weights=quantity, minlength=len(item_ids))
+    revenue_by_item = numpy.bincount(item_index, weights=revenue, minlength=len(item_ids))
+    return OrderStats(
+        {status: int(orders_by_status[code]) for code, status in enumerate(STATUSES)},
+        {status: Money(int(revenue_by_status[code])) for code, status in enumerate(STATUSES)},
+        {
+            item_id: ItemSales(columns.names[item_id], int(item_quantity), Money(int(item_revenue)))
+            for item_id, item_quantity, item_revenue in zip(
+                item_ids.tolist(), quantity_by_item.tolist(), revenue_by_item.tolist()
+            )
+        },
+    )
+
+
+def stats_differences(live: OrderStats, exact: OrderStats) -> List[str]:
+    """Describe every count and total on which two sets of aggregates disagree (names aside)"""
+    differences = []
+    for field in ("orders_by_status", "revenue_by_status"):
+        live_values, exact_values = getattr(live, field), getattr(exact, field)
+        for status in STATUSES:
+            if live_values.get(status) != exact_values.get(status):
+                differences.append(f"{field}[{status}]: live {live_values.get(status)}, exact {exact_values.get(status)}")
+    for item_id in sorted(live.items.keys() | exact.items.keys()):
+        live_sales, exact_sales = live.items.get(item_id), exact.items.get(item_id)
+        live_values = None if live_sales is None else (live_sales.quantity, live_sales.revenue)
+        exact_values = None if exact_sales is None else (exact_sales.quantity, exact_sales.revenue)
+        if live_values != exact_values:
+            differences.append(f"items[{item_id}] (quantity, revenue): live {live_values}, exact {exact_values}")
+    return differences
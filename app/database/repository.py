@@ -0,0 +1,185 @@
+from datetime import datetime
+from typing import Dict, Iterable, List, NamedTuple, Optional, Protocol, Tuple
+from app.models.food_item import FoodItem
+from app.models.money import Money
+from app.models.order import Order
+
+
+class OrderVersionConflict(Exception):
+    """Raised when a compare-and-swap update finds the order changed since it was read"""
+
+    def __init__(self, order: Order):
+        super().__init__(f"Order {order.id} is now at version {order.version} with status {order.status}")
+        self.order = order  # The order as currently stored
+
+
+class MenuSnapshot(NamedTuple):
+    """Menu items read together from one version of the menu"""
+    version: int
+    items: Dict[int, FoodItem]
+
+
+class ItemSales(NamedTuple):
+    """Sales of one menu item over every stored order"""
+    name: str  # As on its most recently stored order line
+    quantity: int
+    revenue: Money
+
+
+class OrderStats(NamedTuple):
+    """Order aggregates: orders and revenue per status, sales per menu item"""
+    orders_by_status: Dict[str, int]
+    revenue_by_status: Dict[str, Money]
+    items: Dict[int, ItemSales]
+
+
+class IdempotentResponse(NamedTuple):
+    """A response stored under an Idempotency-Key, or the key's claim while its first request runs"""
+    fingerprint: bytes  # Hash of the request body the key was first sent with
+    status_code: Optional[int]  # None while the first request has not finished
+    headers: List[Tuple[bytes, bytes]]
+    body: bytes
+
+
+class MenuRepository(Protocol):
+    """Storage interface for menu items, implemented by every backend"""
+
+    def add_item(self, item: FoodItem) -> FoodItem:
+        """Store a new item, assigning an ID when it has none"""
+
+    def get_item(self, item_id: int) -> Optional[FoodItem]:
+        """Get an item by ID, or None"""
+
+    def get_all_items(self) -> Dict[int, FoodItem]:
+        """Get all items keyed by ID"""
+
+    def get_items(self, item_ids: Iterable[int]) -> Dict[int, FoodItem]:
+        """Get the existing items among `item_ids` in one lookup, keyed by ID"""
+
+    def get_menu_snapshot(self, item_ids: Iterable[int]) -> MenuSnapshot:
+        """Like get_items, but every item comes from the same menu version, which is
+        returned with them; concurrent menu writes never show up half-applied"""
+
+    def update_item(self, item_id: int, item: FoodItem) -> Optional[FoodItem]:
+        """Replace an existing item, or return None when it does not exist"""
+
+    def delete_item(self, item_id: int) -> bool:
+        """Delete an item, returning whether it existed"""
+
+    def get_items_by_category(self, category: str) -> Dict[int, FoodItem]:
+        """Get all items of one category keyed by ID"""
+
+    def query_items(
+        self,
+        category: Optional[str] = None,
+        min_price: Optional[Money] = None,
+        max_price: Optional[Money] = None,
+        flags: Optional[Dict[str, bool]] = None,
+        sort: str = "id",
+        limit: Optional[int] = None,
+    ) -> List[FoodItem]:
+        """Get items matching every given filter, ordered by `sort` ("id", "price" or "-price")"""
+
+    def search_items(self, query: str, limit: Optional[int] = None) -> List[FoodItem]:
+        """Get up to `limit` items whose name or description contains every word of
+        `query`, the last word also as a prefix, best matches first"""
+
+    def count_items(self) -> int:
+        """Number of items on the menu"""
+
+    def get_menu_version(self) -> int:
+        """Monotonically increasing number bumped by every menu mutation"""
+
+    def clear(self) -> None:
+        """Remove all items and restart ID allocation"""
+
+
+class OrderRepository(Protocol):
+    """Storage interface for orders, implemented by every backend"""
+
+    def add_order(self, order: Order) -> Order:
+        """Store a new order, assigning an ID when it has none and stamping
+        its creation time (and the time it entered its status) when missing"""
+
+    def add_orders(self, orders: List[Order]) -> List[Order]:
+        """Store many new orders under one lock or transaction"""
+
+    def get_order(self, order_id: int) -> Optional[Order]:
+        """Get an order by ID, or None"""
+
+    def get_all_orders(self) -> Dict[int, Order]:
+        """Get all orders keyed by ID"""
+
+    def list_orders(
+        self, after_id: Optional[int] = None, limit: Optional[int] = None, status: Optional[str] = None
+    ) -> List[Order]:
+        """Get up to `limit` orders (of one status, if given) with ID greater than
+        `after_id`, in ascending ID order, in time proportional to the result"""
+
+    def list_orders_by_time(
+        self,
+        start: Optional[datetime] = None,
+        end: Optional[datetime] = None,
+        after_id: Optional[int] = None,
+        limit: Optional[int] = None,
+    ) -> List[Order]:
+        """Get up to `limit` orders created at or after `start` and before `end`,
+        oldest first with ties in ID order, in time proportional to the result.
+
+        `after_id` continues a previous page after that order.
+        """
+
+    def count_orders_by_status(self) -> Dict[str, int]:
+        """Get the number of orders in every status"""
+
+    def get_order_stats(self) -> OrderStats:
+        """Get running aggregates kept up to date by every write, without scanning orders"""
+
+    def update_order(self, order_id: int, order: Order, expected_version: Optional[int] = None) -> Optional[Order]:
+        """Replace an existing order, or return None when it does not exist.
+
+        Raises OrderVersionConflict when `expected_version` is given and the
+        stored order is at another version.
+        """
+
+    def update_order_status(
+        self,
+        order_id: int,
+        status: str,
+        expected_status: Optional[str] = None,
+        expected_version: Optional[int] = None,
+    ) -> Optional[Order]:
+        """Set the status of an order, or return None when it does not exist.
+
+        The check and the write are one atomic compare-and-swap: when the
+        stored order does not have `expected_status` / `expected_version`
+        (where given), nothing changes and OrderVersionConflict is raised.
+        Every successful update bumps the order's version and records when
+        the order entered the new status.
+        """
+
+    def clear(self) -> None:
+        """Remove all orders and restart ID allocation"""
+
+
+class IdempotencyStore(Protocol):
+    """Storage for Idempotency-Key responses that every worker process sees.
+
+    Implemented by order repositories whose storage is shared between
+    processes (SQLite files); process-local backends leave replays to the
+    per-process cache and run a single worker.
+    """
+
+    def claim_idempotency_key(self, key: str, fingerprint: bytes, lease: float) -> Optional[IdempotentResponse]:
+        """Claim `key` for a request about to run and return None, or return
+        what is stored for it: a response, or another request's claim.
+
+        A claim not completed or released within `lease` seconds (its worker
+        died) lapses, and the key can be claimed again.
+        """
+
+    def save_idempotent_response(self, key: str, response: IdempotentResponse, ttl: float) -> None:
+        """Store the response of a claimed key, replayable for `ttl` seconds"""
+
+    def release_idempotency_key(self, key: str) -> None:
+        """Drop the claim on `key` without storing a response, so a retry runs again"""
@@ -0,0 +1,865 @@
+import itertools
+import queue
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+from app.database.menu_index import FLAG_FIELDS
+from app.database.menu_search import NAME_WEIGHT, tokenize
+from app.database.repository import IdempotentResponse, ItemSales, MenuSnapshot, OrderStats, OrderVersionConflict
+from app.models.food_item import FoodItem
+from app.models.money import Money
+from app.models.order import (
+    STATUS_TIMESTAMPS, Customer, Order, OrderItem, construct_validated, from_micros, to_micros, utc_now
+)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS menu_items (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    category TEXT NOT NULL,
+    price REAL NOT NULL,
+    is_available INTEGER NOT NULL,
+    is_vegetarian INTEGER NOT NULL,
+    is_spicy INTEGER NOT NULL,
+    data TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_menu_items_category ON menu_items (category, price);
+CREATE INDEX IF NOT EXISTS idx_menu_items_price ON menu_items (price);
+
+-- Bumped by every menu mutation so caches in any process can tell when to refresh
+CREATE TABLE IF NOT EXISTS menu_version (
+    id INTEGER PRIMARY KEY CHECK (id = 1),
+    version INTEGER NOT NULL
+);
+INSERT OR IGNORE INTO menu_version (id, version) VALUES (1, 0);
+CREATE TRIGGER IF NOT EXISTS trg_menu_version_insert AFTER INSERT ON menu_items BEGIN
+    UPDATE menu_version SET version = version + 1;
+END;
+CREATE TRIGGER IF NOT EXISTS trg_menu_version_update AFTER UPDATE ON menu_items BEGIN
+    UPDATE menu_version SET version = version + 1;
+END;
+CREATE TRIGGER IF NOT EXISTS trg_menu_version_delete AFTER DELETE ON menu_items BEGIN
+    UPDATE menu_version SET version = version + 1;
+END;
+
+-- Full-text index over names and descriptions, kept current by triggers
+CREATE VIRTUAL TABLE IF NOT EXISTS menu_search USING fts5(
+    name, description, tokenize = 'unicode61 remove_diacritics 2', prefix = '2 3'
+);
+CREATE TRIGGER IF NOT EXISTS trg_menu_search_insert AFTER INSERT ON menu_items BEGIN
+    INSERT INTO menu_search (rowid, name, description)
+        VALUES (NEW.id, json_extract(NEW.data, '$.name'), json_extract(NEW.data, '$.description'));
+END;
+CREATE TRIGGER IF NOT EXISTS trg_menu_search_update AFTER UPDATE ON menu_items BEGIN
+    UPDATE menu_search SET name = json_extract(NEW.data, '$.name'), description = json_extract(NEW.data, '$.description')
+        WHERE rowid = NEW.id;
+END;
+CREATE TRIGGER IF NOT EXISTS trg_menu_search_delete AFTER DELETE ON menu_items BEGIN
+    DELETE FROM menu_search WHERE rowid = OLD.id;
+END;
+
+CREATE TABLE IF NOT EXISTS customers (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    name TEXT NOT NULL,
+    phone TEXT NOT NULL,
+    address TEXT NOT NULL,
+    UNIQUE (phone, name, address)
+);
+
+CREATE TABLE IF NOT EXISTS orders (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    customer_id INTEGER NOT NULL REFERENCES customers (id),
+    status TEXT NOT NULL,
+    version INTEGER NOT NULL DEFAULT 1,
+    menu_version INTEGER,
+    -- When the order was created and entered each later status, in epoch microseconds
+    created_at INTEGER,
+    confirmed_at INTEGER,
+    ready_at INTEGER,
+    delivered_at INTEGER
+);
+CREATE INDEX IF NOT EXISTS idx_orders_status ON orders (status, id);
+CREATE INDEX IF NOT EXISTS idx_orders_customer ON orders (customer_id);
+
+-- Per-status counters kept current by triggers, so counts never scan orders
+CREATE TABLE IF NOT EXISTS order_status_counts (
+    status TEXT PRIMARY KEY,
+    count INTEGER NOT NULL
+) WITHOUT ROWID;
+INSERT OR IGNORE INTO order_status_counts (status, count)
+    VALUES ('pending', 0), ('confirmed', 0), ('ready', 0), ('delivered', 0);
+CREATE TRIGGER IF NOT EXISTS trg_orders_count_insert AFTER INSERT ON orders BEGIN
+    UPDATE order_status_counts SET count = count + 1 WHERE status = NEW.status;
+END;
+CREATE TRIGGER IF NOT EXISTS trg_orders_count_update AFTER UPDATE OF status ON orders
+WHEN OLD.status <> NEW.status BEGIN
+    UPDATE order_status_counts SET count = count - 1 WHERE status = OLD.status;
+    UPDATE order_status_counts SET count = count + 1 WHERE status = NEW.status;
+END;
+CREATE TRIGGER IF NOT EXISTS trg_orders_count_delete AFTER DELETE ON orders BEGIN
+    UPDATE order_status_counts SET count = count - 1 WHERE status = OLD.status;
+END;
+
+CREATE TABLE IF NOT EXISTS order_items (
+    order_id INTEGER NOT NULL REFERENCES orders (id) ON DELETE CASCADE,
+    position INTEGER NOT NULL,
+    menu_item_id INTEGER NOT NULL,
+    menu_item_name TEXT NOT NULL,
+    quantity INTEGER NOT NULL,
+    unit_price TEXT NOT NULL,
+    PRIMARY KEY (order_id, position)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS idx_order_items_menu_item ON order_items (menu_item_id);
+
+-- Revenue per status and sales per menu item, in integer cents, kept current
+-- by triggers so order stats never scan orders. unit_price holds whole cents
+-- (Money rejects anything finer), so round(unit_price * 100) is its exact
+-- cents: the same integer Money.cents gives the in-memory stats
+CREATE TABLE IF NOT EXISTS order_revenue (
+    status TEXT PRIMARY KEY,
+    revenue_cents INTEGER NOT NULL
+) WITHOUT ROWID;
+INSERT OR IGNORE INTO order_revenue (status, revenue_cents)
+    VALUES ('pending', 0), ('confirmed', 0), ('ready', 0), ('delivered', 0);
+CREATE TABLE IF NOT EXISTS menu_item_sales (
+    menu_item_id INTEGER PRIMARY KEY,
+    menu_item_name TEXT NOT NULL,
+    quantity INTEGER NOT NULL,
+    revenue_cents INTEGER NOT NULL
+);
+CREATE TRIGGER IF NOT EXISTS trg_order_items_stats_insert AFTER INSERT ON order_items BEGIN
+    INSERT INTO menu_item_sales (menu_item_id, menu_item_name, quantity, revenue_cents)
+        VALUES (NEW.menu_item_id, NEW.menu_item_name, NEW.quantity, NEW.quantity * CAST(round(NEW.unit_price * 100) AS INTEGER))
+        ON CONFLICT (menu_item_id) DO UPDATE SET
+            menu_item_name = excluded.menu_item_name,
+            quantity = quantity + excluded.quantity,
+            revenue_cents = revenue_cents + excluded.revenue_cents;
+    UPDATE order_revenue SET revenue_cents = revenue_cents + NEW.quantity * CAST(round(NEW.unit_price * 100) AS INTEGER)
+        WHERE status = (SELECT status FROM orders WHERE id = NEW.order_id);
+END;
+CREATE TRIGGER IF NOT EXISTS trg_order_items_stats_delete AFTER DELETE ON order_items BEGIN
+    UPDATE menu_item_sales
+        SET quantity = quantity - OLD.quantity, revenue_cents = revenue_cents - OLD.quantity * CAST(round(OLD.unit_price * 100) AS INTEGER)
+        WHERE menu_item_id = OLD.menu_item_id;
+    DELETE FROM menu_item_sales WHERE menu_item_id = OLD.menu_item_id AND quantity = 0;
+    UPDATE order_revenue SET revenue_cents = revenue_cents - OLD.quantity * CAST(round(OLD.unit_price * 100) AS INTEGER)
+        WHERE status = (SELECT status FROM orders WHERE id = OLD.order_id);
+END;
+CREATE TRIGGER IF NOT EXISTS trg_orders_revenue_update AFTER UPDATE OF status ON orders
+WHEN OLD.status <> NEW.status BEGIN
+    UPDATE order_revenue SET revenue_cents = revenue_cents + (CASE status WHEN NEW.status THEN 1 ELSE -1 END) * (
+        SELECT coalesce(sum(quantity * CAST(round(unit_price * 100) AS INTEGER)), 0)
+        FROM order_items WHERE order_id = NEW.id
+    ) WHERE status IN (OLD.status, NEW.status);
+END;
+
+-- Responses to requests sent with an Idempotency-Key, so a retry reaching any
+-- worker process is replayed. status_code is NULL while the key's first
+-- request runs; expires_at (epoch seconds) then ends that claim's lease, and
+-- afterwards the response's replay window
+CREATE TABLE IF NOT EXISTS idempotency_keys (
+    key TEXT PRIMARY KEY,
+    fingerprint BLOB NOT NULL,
+    status_code INTEGER,
+    headers BLOB,
+    body BLOB,
+    expires_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_idempotency_keys_expires ON idempotency_keys (expires_at);
+"""
+
+# Statements are kept as constants so sqlite3's per-connection statement cache
+# reuses the prepared form instead of re-parsing on every call
+INSERT_MENU_ITEM = (
+    "INSERT INTO menu_items (id, category, price, is_available, is_vegetarian, is_spicy, data) "
+    "VALUES (?, ?, ?, ?, ?, ?, ?)"
+)
+SELECT_MENU_ITEM = "SELECT id, data FROM menu_items WHERE id = ?"
+SELECT_ALL_MENU_ITEMS = "SELECT id, data FROM menu_items ORDER BY id"
+SELECT_MENU_ITEMS_BY_CATEGORY = "SELECT id, data FROM menu_items WHERE category = ? ORDER BY id"
+UPDATE_MENU_ITEM = (
+    "UPDATE menu_items SET category = ?, price = ?, is_available = ?, is_vegetarian = ?, is_spicy = ?, data = ? "
+    "WHERE id = ?"
+)
+SELECT_MENU_ITEM_COUNT = "SELECT COUNT(*) FROM menu_items"
+SELECT_MAX_MENU_ITEM_ID = "SELECT MAX(id) FROM menu_items"
+SELECT_MENU_VERSION = "SELECT version FROM menu_version"
+BUMP_MENU_VERSION = "UPDATE menu_version SET version = version + 1"
+MENU_SORT_ORDER = {"id": "id", "price": "price, id", "-price": "price DESC, id DESC"}
+DELETE_MENU_ITEM = "DELETE FROM menu_items WHERE id = ?"
+# bm25 is lower for better matches; name words weigh like NAME_WEIGHT in memory
+SEARCH_MENU_ITEMS = (
+    f"SELECT m.id, m.data FROM menu_search s JOIN menu_items m ON m.id = s.rowid "
+    f"WHERE menu_search MATCH ? ORDER BY bm25(menu_search, {NAME_WEIGHT}, 1.0), m.id LIMIT ?"
+)
+
+UPSERT_CUSTOMER = (
+    "INSERT INTO customers (name, phone, address) VALUES (?, ?, ?) "
+    "ON CONFLICT (phone, name, address) DO UPDATE SET name = excluded.name RETURNING id"
+)
+INSERT_ORDER = (
+    "INSERT INTO orders (id, customer_id, status, menu_version, created_at, confirmed_at, ready_at, delivered_at) "
+    "VALUES (?, ?, ?, ?, ?, ?, ?, ?)"
+)
+INSERT_ORDER_ITEM = (
+    "INSERT INTO order_items (order_id, position, menu_item_id, menu_item_name, quantity, unit_price) "
+    "VALUES (?, ?, ?, ?, ?, ?)"
+)
+ORDER_COLUMNS = (
+    "o.id, o.status, c.name, c.phone, c.address, o.version, o.menu_version, "
+    "o.created_at, o.confirmed_at, o.ready_at, o.delivered_at"
+)
+SELECT_ORDER = (
+    f"SELECT {ORDER_COLUMNS} "
+    "FROM orders o JOIN customers c ON c.id = o.customer_id WHERE o.id = ?"
+)
+SELECT_ALL_ORDERS = (
+    f"SELECT {ORDER_COLUMNS} "
+    "FROM orders o JOIN customers c ON c.id = o.customer_id ORDER BY o.id"
+)
+SELECT_ORDERS_PAGE = (
+    f"SELECT {ORDER_COLUMNS} "
+    "FROM orders o JOIN customers c ON c.id = o.customer_id WHERE o.id > ? ORDER BY o.id LIMIT ?"
+)
+SELECT_ORDERS_PAGE_BY_STATUS = (
+    f"SELECT {ORDER_COLUMNS} "
+    "FROM orders o JOIN customers c ON c.id = o.customer_id "
+    "WHERE o.status = ? AND o.id > ? ORDER BY o.id LIMIT ?"
+)
+# Orders after a (created_at, ID) key and created before a time, on idx_orders_created
+SELECT_ORDERS_BY_TIME = (
+    f"SELECT {ORDER_COLUMNS} "
+    "FROM orders o JOIN customers c ON c.id = o.customer_id "
+    "WHERE (o.created_at, o.id) > (?, ?) AND o.created_at < ? ORDER BY o.created_at, o.id LIMIT ?"
+)
+SELECT_ORDER_CREATED_AT = "SELECT created_at FROM orders WHERE id = ?"
+SELECT_MAX_ORDER_ID = "SELECT MAX(id) FROM orders"
+SELECT_ORDER_ITEMS_RANGE_BY_STATUS = (
+    "SELECT i.order_id, i.menu_item_id, i.menu_item_name, i.quantity, i.unit_price "
+    "FROM orders o JOIN order_items i ON i.order_id = o.id "
+    "WHERE o.status = ? AND o.id BETWEEN ? AND ? ORDER BY i.order_id, i.position"
+)
+SELECT_ORDER_STATUS_COUNTS = "SELECT status, count FROM order_status_counts"
+SELECT_ORDER_REVENUE = "SELECT status, revenue_cents FROM order_revenue"
+SELECT_MENU_ITEM_SALES = "SELECT menu_item_id, menu_item_name, quantity, revenue_cents FROM menu_item_sales"
+SELECT_ORDER_ITEMS_RANGE = (
+    "SELECT order_id, menu_item_id, menu_item_name, quantity, unit_price "
+    "FROM order_items WHERE order_id BETWEEN ? AND ? ORDER BY order_id, position"
+)
+SELECT_ORDER_ITEMS = (
+    "SELECT order_id, menu_item_id, menu_item_name, quantity, unit_price "
+    "FROM order_items WHERE order_id = ? ORDER BY position"
+)
+SELECT_ALL_ORDER_ITEMS = (
+    "SELECT order_id, menu_item_id, menu_item_name, quantity, unit_price "
+    "FROM order_items ORDER BY order_id, position"
+)
+UPDATE_ORDER = (
+    "UPDATE orders SET customer_id = ?, status = ?, menu_version = ?, version = version + 1, "
+    "created_at = ?, confirmed_at = ?, ready_at = ?, delivered_at = ? WHERE id = ? RETURNING version"
+)
+# Compare-and-swap status updates, one per status so each records the time in
+# its own column (never moving the creation time); a NULL expectation matches
+# any stored value
+UPDATE_ORDER_STATUS = {
+    status: (
+        f"UPDATE orders SET status = ?, version = version + 1, "
+        f"{field} = {'coalesce(created_at, ?)' if field == 'created_at' else '?'} "
+        "WHERE id = ? AND status = coalesce(?, status) AND version = coalesce(?, version)"
+    )
+    for status, field in STATUS_TIMESTAMPS.items()
+}
+DELETE_ORDER_ITEMS = "DELETE FROM order_items WHERE order_id = ?"
+SELECT_IDEMPOTENCY_KEY = "SELECT fingerprint, status_code, headers, body, expires_at FROM idempotency_keys WHERE key = ?"
+CLAIM_IDEMPOTENCY_KEY = (
+    "INSERT INTO idempotency_keys (key, fingerprint, expires_at) VALUES (?, ?, ?) "
+    "ON CONFLICT (key) DO UPDATE SET fingerprint = excluded.fingerprint, status_code = NULL, "
+    "headers = NULL, body = NULL, expires_at = excluded.expires_at"
+)
+SAVE_IDEMPOTENT_RESPONSE = (
+    "UPDATE idempotency_keys SET status_code = ?, headers = ?, body = ?, expires_at = ? "
+    "WHERE key = ? AND status_code IS NULL"
+)
+RELEASE_IDEMPOTENCY_KEY = "DELETE FROM idempotency_keys WHERE key = ? AND status_code IS NULL"
+# Expired keys are dropped a few at a time as responses are saved, on idx_idempotency_keys_expires
+PURGE_IDEMPOTENCY_KEYS = (
+    "DELETE FROM idempotency_keys WHERE key IN "
+    "(SELECT key FROM idempotency_keys WHERE expires_at <= ? LIMIT 16)"
+)
+
+_memory_database_ids = itertools.count(1)
+
+
+def parse_sqlite_url(database_url: str) -> Optional[str]:
+    """Get the file path from a sqlite:/// URL, or None for an in-memory database"""
+    path = database_url[len("sqlite://"):]
+    if path.startswith("/"):
+        path = path[1:]
+    if path in ("", ":memory:"):
+        return None
+    return path
+
+
+class SQLiteConnectionPool:
+    """Bounded pool of SQLite connections shared by all request threads.
+
+    Connections are opened lazily up to `size` and handed out LIFO so the
+    warmest statement caches are reused first. File databases run in WAL mode
+    so readers never block the writer. All writes go through `write()`, which
+    serializes them in-process so concurrent requests never hit SQLITE_BUSY.
+    """
+
+    def __init__(self, path: Optional[str], size: int = 5, statement_cache_size: int = 128):
+        if path is None:
+            # One shared in-memory database for every pooled connection
+            self._target = f"file:restaurant-{next(_memory_database_ids)}?mode=memory&cache=shared"
+            self._uri = True
+            size = 1
+        else:
+            self._target = path
+            self._uri = False
+        self.size = size
+        self.statement_cache_size = statement_cache_size
+        self._idle: "queue.LifoQueue[sqlite3.Connection]" = queue.LifoQueue(maxsize=size)
+        self._opened = 0
+        self._open_lock = threading.Lock()
+        self._write_lock = threading.RLock()
+        self._batch_connection: Optional[sqlite3.Connection] = None
+        self._batch_owner: Optional[int] = None
+        # Keeps a shared in-memory database alive while the pool exists
+        self._keepalive = self._connect()
+        self._keepalive.executescript(SCHEMA)
+        _upgrade_schema(self._keepalive)
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(
+            self._target,
+            uri=self._uri,
+            check_same_thread=False,
+            isolation_level=None,
+            cached_statements=self.statement_cache_size,
+        )
+        conn.execute("PRAGMA journal_mode = WAL")
+        conn.execute("PRAGMA synchronous = NORMAL")
+        conn.execute("PRAGMA foreign_keys = ON")
+        conn.execute("PRAGMA busy_timeout = 5000")
+        return conn
+
+    @contextmanager
+    def connection(self) -> Iterator[sqlite3.Connection]:
+        """Borrow a connection, blocking when all `size` connections are in use"""
+        if self._batch_connection is not None and self._batch_owner == threading.get_ident():
+            # Reads inside a write batch must see the batch's uncommitted rows
+            yield self._batch_connection
+            return
+        try:
+            conn = self._idle.get_nowait()
+        except queue.Empty:
+            with self._open_lock:
+                can_open = self._opened < self.size
+                if can_open:
+                    self._opened += 1
+            conn = self._connect() if can_open else self._idle.get()
+        try:
+            yield conn
+        finally:
+            self._idle.put(conn)
+
+    @contextmanager
+    def snapshot(self) -> Iterator[sqlite3.Connection]:
+        """Borrow a connection inside one read transaction, so every statement
+        sees the same database snapshot; in WAL mode it does not block the writer"""
+        with self.connection() as conn:
+            own_transaction = not conn.in_transaction
+            if own_transaction:
+                conn.execute("BEGIN")
+            try:
+                yield conn
+            finally:
+                if own_transaction:
+                    conn.execute("COMMIT")
+
+    @contextmanager
+    def write(self) -> Iterator[sqlite3.Connection]:
+        """Run statements in one transaction, or join the surrounding batch"""
+        with self._write_lock:
+            if self._batch_connection is not None:
+                yield self._batch_connection
+                return
+            with self.connection() as conn:
+                conn.execute("BEGIN IMMEDIATE")
+                try:
+                    yield conn
+                except BaseException:
+                    conn.execute("ROLLBACK")
+                    raise
+                conn.execute("COMMIT")
+
+    @contextmanager
+    def batch(self) -> Iterator[None]:
+        """Group every write made inside the block into a single commit"""
+        with self._write_lock:
+            if self._batch_connection is not None:
+                yield
+                return
+            with self.write() as conn:
+                self._batch_connection = conn
+                self._batch_owner = threading.get_ident()
+                try:
+                    yield
+                finally:
+                    self._batch_connection = None
+                    self._batch_owner = None
+
+    def close(self) -> None:
+        while True:
+            try:
+                self._idle.get_nowait().close()
+            except queue.Empty:
+                break
+        self._keepalive.close()
+
+
+def _upgrade_schema(conn: sqlite3.Connection) -> None:
+    """Add columns introduced after a database file was first created"""
+    order_columns = {row[1] for row in conn.execute("PRAGMA table_info(orders)")}
+    if "version" not in order_columns:
+        conn.execute("ALTER TABLE orders ADD COLUMN version INTEGER NOT NULL DEFAULT 1")
+    if "menu_version" not in order_columns:
+        conn.execute("ALTER TABLE orders ADD COLUMN menu_version INTEGER")
+    for column in STATUS_TIMESTAMPS.values():
+        # Orders stored before timestamps were recorded keep NULL times
+        if column not in order_columns:
+            conn.execute(f"ALTER TABLE orders ADD COLUMN {column} INTEGER")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_orders_created ON orders (created_at, id)")
+    if conn.execute("SELECT NOT EXISTS (SELECT 1 FROM menu_item_sales) AND EXISTS (SELECT 1 FROM order_items)").fetchone()[0]:
+        # Order stats tables added to a database that already has orders
+        conn.execute(
+            "INSERT INTO menu_item_sales (menu_item_id, menu_item_name, quantity, revenue_cents) "
+            "SELECT menu_item_id, menu_item_name, quantity, revenue_cents FROM ("
+            "  SELECT menu_item_id, menu_item_name, max(order_id), sum(quantity) AS quantity, "
+            "  sum(quantity * CAST(round(unit_price * 100) AS INTEGER)) AS revenue_cents "
+            "  FROM order_items GROUP BY menu_item_id)"
+        )
+        conn.execute(
+            "UPDATE order_revenue SET revenue_cents = ("
+            "  SELECT coalesce(sum(i.quantity * CAST(round(i.unit_price * 100) AS INTEGER)), 0) "
+            "  FROM orders o JOIN order_items i ON i.order_id = o.id WHERE o.status = order_revenue.status)"
+        )
+    if conn.execute("SELECT NOT EXISTS (SELECT 1 FROM menu_search) AND EXISTS (SELECT 1 FROM menu_items)").fetchone()[0]:
+        conn.execute(
+            "INSERT INTO menu_search (rowid, name, description) "
+            "SELECT id, json_extract(data, '$.name'), json_extract(data, '$.description') FROM menu_items"
+        )
+
+
+def _item_columns(item: FoodItem) -> Tuple:
+    return (
+        item.category, float(item.price), item.is_available, item.is_vegetarian, item.is_spicy,
+        item.model_dump_json(exclude={"id", "dietary_info"})
+    )
+
+
+def _select_items(conn: sqlite3.Connection, item_ids: Iterable[int]) -> List[Tuple[int, str]]:
+    item_ids = list(dict.fromkeys(item_ids))
+    rows = []
+    # Stay well below SQLite's bound-parameter limit
+    for start in range(0, len(item_ids), 500):
+        chunk = item_ids[start:start + 500]
+        rows += conn.execute(
+            f"SELECT id, data FROM menu_items WHERE id IN ({', '.join('?' * len(chunk))})", chunk
+        ).fetchall()
+    return rows
+
+
+def _row_to_item(row) -> FoodItem:
+    item = FoodItem.model_validate_json(row[1])
+    item.id = row[0]
+    return item
+
+
+# Stored orders were validated on the way in, so rows are turned back into
+# models without validating them again
+def _row_to_order_item(row) -> OrderItem:
+    return construct_validated(OrderItem, {
+        "menu_item_id": row[1],
+        "menu_item_name": row[2],
+        "quantity": row[3],
+        "unit_price": Money.parse(row[4])
+    })
+
+
+def _row_to_order(row, items: List[OrderItem]) -> Order:
+    return construct_validated(Order, {
+        "id": row[0],
+        "customer": construct_validated(Customer, {"name": row[2], "phone": row[3], "address": row[4]}),
+        "items": tuple(items),
+        "status": row[1],
+        "version": row[5],
+        "menu_version": row[6],
+        "created_at": from_micros(row[7]),
+        "confirmed_at": from_micros(row[8]),
+        "ready_at": from_micros(row[9]),
+        "delivered_at": from_micros(row[10])
+    })
+
+
+def _timestamp_columns(order: Order) -> Tuple:
+    return tuple(
+        None if moment is None else to_micros(moment)
+        for moment in (order.created_at, order.confirmed_at, order.ready_at, order.delivered_at)
+    )
+
+
+def _observe_stored_ids(pool: SQLiteConnectionPool, id_allocator, query: str) -> None:
+    """Keep an allocator above every ID already stored, e.g. IDs a time-ordered
+    allocator handed out from borrowed milliseconds just before a restart"""
+    with pool.connection() as conn:
+        max_id = conn.execute(query).fetchone()[0]
+    if max_id is not None:
+        id_allocator.observe(max_id)
+
+
+def _pack_headers(headers: List[Tuple[bytes, bytes]]) -> bytes:
+    # As on the wire: HTTP forbids CR and LF in names and values, and ":" in names
+    return b"".join(name + b":" + value + b"\r\n" for name, value in headers)
+
+
+def _unpack_headers(packed: Optional[bytes]) -> List[Tuple[bytes, bytes]]:
+    if not packed:
+        return []
+    return [tuple(line.split(b":", 1)) for line in packed[:-2].split(b"\r\n")]
+
+
+class SQLiteMenuRepository:
+    """Menu storage in SQLite.
+
+    IDs come from AUTOINCREMENT, which never reuses IDs and is safe across
+    processes, unless an allocator is passed (e.g. for time-ordered IDs).
+    """
+
+    def __init__(self, pool: SQLiteConnectionPool, id_allocator=None):
+        self.pool = pool
+        self.id_allocator = id_allocator
+        if id_allocator is not None:
+            _observe_stored_ids(pool, id_allocator, SELECT_MAX_MENU_ITEM_ID)
+
+    def add_item(self, item: FoodItem) -> FoodItem:
+        if item.id is None and self.id_allocator is not None:
+            item.id = self.id_allocator.allocate()
+        with self.pool.write() as conn:
+            cursor = conn.execute(INSERT_MENU_ITEM, (item.id,) + _item_columns(item))
+        item.id = cursor.lastrowid
+        return item
+
+    def get_item(self, item_id: int) -> Optional[FoodItem]:
+        with self.pool.connection() as conn:
+            row = conn.execute(SELECT_MENU_ITEM, (item_id,)).fetchone()
+        return _row_to_item(row) if row else None
+
+    def get_all_items(self) -> Dict[int, FoodItem]:
+        with self.pool.connection() as conn:
+            rows = conn.execute(SELECT_ALL_MENU_ITEMS).fetchall()
+        return {row[0]: _row_to_item(row) for row in rows}
+
+    def get_items(self, item_ids: Iterable[int]) -> Dict[int, FoodItem]:
+        with self.pool.connection() as conn:
+            rows = _select_items(conn, item_ids)
+        return {row[0]: _row_to_item(row) for row in rows}
+
+    def get_menu_snapshot(self, item_ids: Iterable[int]) -> MenuSnapshot:
+        # The version and every item come from the same database snapshot
+        with self.pool.snapshot() as conn:
+            version = conn.execute(SELECT_MENU_VERSION).fetchone()[0]
+            rows = _select_items(conn, item_ids)
+        return MenuSnapshot(version, {row[0]: _row_to_item(row) for row in rows})
+
+    def update_item(self, item_id: int, item: FoodItem) -> Optional[FoodItem]:
+        with self.pool.write() as conn:
+            cursor = conn.execute(UPDATE_MENU_ITEM, _item_columns(item) + (item_id,))
+        if cursor.rowcount == 0:
+            return None
+        item.id = item_id
+        return item
+
+    def delete_item(self, item_id: int) -> bool:
+        with self.pool.write() as conn:
+            cursor = conn.execute(DELETE_MENU_ITEM, (item_id,))
+        return cursor.rowcount > 0
+
+    def get_items_by_category(self, category: str) -> Dict[int, FoodItem]:
+        with self.pool.connection() as conn:
+            rows = conn.execute(SELECT_MENU_ITEMS_BY_CATEGORY, (category,)).fetchall()
+        return {row[0]: _row_to_item(row) for row in rows}
+
+    def query_items(
+        self,
+        category: Optional[str] = None,
+        min_price: Optional[Money] = None,
+        max_price: Optional[Money] = None,
+        flags: Optional[Dict[str, bool]] = None,
+        sort: str = "id",
+        limit: Optional[int] = None,
+    ) -> List[FoodItem]:
+        if sort not in MENU_SORT_ORDER:
+            raise ValueError(f"Unsupported sort field: {sort}")
+        conditions, params = [], []
+        if category is not None:
+            conditions.append("category = ?")
+            params.append(category)
+        if min_price is not None:
+            conditions.append("price >= ?")
+            params.append(float(min_price))
+        if max_price is not None:
+            conditions.append("price <= ?")
+            params.append(float(max_price))
+        for flag, value in (flags or {}).items():
+            if flag not in FLAG_FIELDS:
+                raise ValueError(f"Unsupported flag: {flag}")
+            conditions.append(f"{flag} = ?")
+            params.append(value)
+        sql = "SELECT id, data FROM menu_items"
+        if conditions:
+            sql += " WHERE " + " AND ".join(conditions)
+        sql += " ORDER BY " + MENU_SORT_ORDER[sort]
+        if limit is not None:
+            sql += " LIMIT ?"
+            params.append(limit)
+        with self.pool.connection() as conn:
+            rows = conn.execute(sql, params).fetchall()
+        return [_row_to_item(row) for row in rows]
+
+    def search_items(self, query: str, limit: Optional[int] = None) -> List[FoodItem]:
+        words = tokenize(query)
+        if not words:
+            return []
+        # Quoted so words are never read as FTS5 operators; the last one is also a prefix
+        match = " ".join(f'"{word}"' for word in words) + "*"
+        with self.pool.connection() as conn:
+            rows = conn.execute(SEARCH_MENU_ITEMS, (match, -1 if limit is None else limit)).fetchall()
+        return [_row_to_item(row) for row in rows]
+
+    def count_items(self) -> int:
+        with self.pool.connection() as conn:
+            return conn.execute(SELECT_MENU_ITEM_COUNT).fetchone()[0]
+
+    def get_menu_version(self) -> int:
+        with self.pool.connection() as conn:
+            return conn.execute(SELECT_MENU_VERSION).fetchone()[0]
+
+    def clear(self) -> None:
+        with self.pool.write() as conn:
+            conn.execute(BUMP_MENU_VERSION)
+            conn.execute("DELETE FROM menu_items")
+            conn.execute("DELETE FROM sqlite_sequence WHERE name = 'menu_items'")
+
+
+class SQLiteOrderRepository:
+    """Order storage in SQLite, normalized into orders, customers and order_items"""
+
+    def __init__(self, pool: SQLiteConnectionPool, id_allocator=None):
+        self.pool = pool
+        self.id_allocator = id_allocator
+        if id_allocator is not None:
+            _observe_stored_ids(pool, id_allocator, SELECT_MAX_ORDER_ID)
+
+    def _insert_lines(self, conn: sqlite3.Connection, order_id: int, order: Order) -> None:
+        conn.executemany(INSERT_ORDER_ITEM, [
+            (order_id, position, item.menu_item_id, item.menu_item_name, item.quantity, str(item.unit_price))
+            for position, item in enumerate(order.items)
+        ])
+
+    def _upsert_customer(self, conn: sqlite3.Connection, customer: Customer) -> int:
+        return conn.execute(UPSERT_CUSTOMER, (customer.name, customer.phone, customer.address)).fetchone()[0]
+
+    def add_order(self, order: Order) -> Order:
+        with self.pool.write() as conn:
+            self._insert(conn, order, utc_now())
+        return order
+
+    def add_orders(self, orders: List[Order]) -> List[Order]:
+        with self.pool.batch(), self.pool.write() as conn:
+            now = utc_now()
+            for order in orders:
+                self._insert(conn, order, now)
+        return orders
+
+    def _insert(self, conn: sqlite3.Connection, order: Order, now: datetime) -> None:
+        if order.id is None and self.id_allocator is not None:
+            order.id = self.id_allocator.allocate()
+        order.fill_timestamps(now)
+        customer_id = self._upsert_customer(conn, order.customer)
+        cursor = conn.execute(
+            INSERT_ORDER, (order.id, customer_id, order.status, order.menu_version) + _timestamp_columns(order)
+        )
+        order.id = cursor.lastrowid
+        self._insert_lines(conn, order.id, order)
+
+    # Orders and their lines are read in one snapshot, so a concurrent write
+    # cannot leave an order without the lines it had when it was selected
+
+    def get_order(self, order_id: int) -> Optional[Order]:
+        with self.pool.snapshot() as conn:
+            return self._fetch_order(conn, order_id)
+
+    def _fetch_order(self, conn: sqlite3.Connection, order_id: int) -> Optional[Order]:
+        row = conn.execute(SELECT_ORDER, (order_id,)).fetchone()
+        if row is None:
+            return None
+        item_rows = conn.execute(SELECT_ORDER_ITEMS, (order_id,)).fetchall()
+        return _row_to_order(row, [_row_to_order_item(r) for r in item_rows])
+
+    def get_all_orders(self) -> Dict[int, Order]:
+        with self.pool.snapshot() as conn:
+            rows = conn.execute(SELECT_ALL_ORDERS).fetchall()
+            item_rows = conn.execute(SELECT_ALL_ORDER_ITEMS).fetchall()
+        items_by_order: Dict[int, List[OrderItem]] = {}
+        for item_row in item_rows:
+            items_by_order.setdefault(item_row[0], []).append(_row_to_order_item(item_row))
+        return {row[0]: _row_to_order(row, items_by_order[row[0]]) for row in rows}
+
+    def list_orders(
+        self, after_id: Optional[int] = None, limit: Optional[int] = None, status: Optional[str] = None
+    ) -> List[Order]:
+        # LIMIT -1 means no limit in SQLite
+        page = (after_id or 0, -1 if limit is None else limit)
+        with self.pool.snapshot() as conn:
+            if status is None:
+                rows = conn.execute(SELECT_ORDERS_PAGE, page).fetchall()
+            else:
+                rows = conn.execute(SELECT_ORDERS_PAGE_BY_STATUS, (status,) + page).fetchall()
+            if not rows:
+                return []
+            if status is None:
+                item_rows = conn.execute(SELECT_ORDER_ITEMS_RANGE, (rows[0][0], rows[-1][0])).fetchall()
+            else:
+                item_rows = conn.execute(
+                    SELECT_ORDER_ITEMS_RANGE_BY_STATUS, (status, rows[0][0], rows[-1][0])
+                ).fetchall()
+        items_by_order: Dict[int, List[OrderItem]] = {}
+        for item_row in item_rows:
+            items_by_order.setdefault(item_row[0], []).append(_row_to_order_item(item_row))
+        return [_row_to_order(row, items_by_order[row[0]]) for row in rows]
+
+    def list_orders_by_time(
+        self,
+        start: Optional[datetime] = None,
+        end: Optional[datetime] = None,
+        after_id: Optional[int] = None,
+        limit: Optional[int] = None,
+    ) -> List[Order]:
+        # Order IDs are positive, so (start, 0) is below every order created at `start`
+        lower = (-(1 << 63) if start is None else to_micros(start), 0)
+        upper = (1 << 63) - 1 if end is None else to_micros(end)
+        with self.pool.snapshot() as conn:
+            if after_id is not None:
+                cursor = conn.execute(SELECT_ORDER_CREATED_AT, (after_id,)).fetchone()
+                if cursor is not None and cursor[0] is not None:
+                    lower = max(lower, (cursor[0], after_id))
+            rows = conn.execute(SELECT_ORDERS_BY_TIME, lower + (upper, -1 if limit is None else limit)).fetchall()
+            order_ids = [row[0] for row in rows]
+            item_rows = []
+            # Stay well below SQLite's bound-parameter limit
+            for first in range(0, len(order_ids), 500):
+                chunk = order_ids[first:first + 500]
+                item_rows += conn.execute(
+                    "SELECT order_id, menu_item_id, menu_item_name, quantity, unit_price FROM order_items "
+                    f"WHERE order_id IN ({', '.join('?' * len(chunk))}) ORDER BY order_id, position", chunk
+                ).fetchall()
+        items_by_order: Dict[int, List[OrderItem]] = {}
+        for item_row in item_rows:
+            items_by_order.setdefault(item_row[0], []).append(_row_to_order_item(item_row))
+        return [_row_to_order(row, items_by_order[row[0]]) for row in rows]
+
+    def count_orders_by_status(self) -> Dict[str, int]:
+        with self.pool.connection() as conn:
+            return dict(conn.execute(SELECT_ORDER_STATUS_COUNTS).fetchall())
+
+    def get_order_stats(self) -> OrderStats:
+        # One read transaction, so counts and totals agree with each other
+        with self.pool.snapshot() as conn:
+            counts = conn.execute(SELECT_ORDER_STATUS_COUNTS).fetchall()
+            revenue = conn.execute(SELECT_ORDER_REVENUE).fetchall()
+            sales = conn.execute(SELECT_MENU_ITEM_SALES).fetchall()
+        return OrderStats(
+            dict(counts),
+            {status: Money(cents) for status, cents in revenue},
+            {item_id: ItemSales(name, quantity, Money(cents)) for item_id, name, quantity, cents in sales},
+        )
+
+    def update_order(self, order_id: int, order: Order, expected_version: Optional[int] = None) -> Optional[Order]:
+        with self.pool.write() as conn:
+            # Read inside the write transaction, so the order cannot change meanwhile
+            existing = self._fetch_order(conn, order_id)
+            if existing is None:
+                return None
+            if expected_version is not None and existing.version != expected_version:
+                raise OrderVersionConflict(existing)
+            order.fill_timestamps(utc_now(), existing)
+            customer_id = self._upsert_customer(conn, order.customer)
+            row = conn.execute(
+                UPDATE_ORDER,
+                (customer_id, order.status, order.menu_version) + _timestamp_columns(order) + (order_id,)
+            ).fetchone()
+            conn.execute(DELETE_ORDER_ITEMS, (order_id,))
+            self._insert_lines(conn, order_id, order)
+        order.id = order_id
+        order.version = row[0]
+        return order
+
+    def update_order_status(
+        self,
+        order_id: int,
+        status: str,
+        expected_status: Optional[str] = None,
+        expected_version: Optional[int] = None,
+    ) -> Optional[Order]:
+        with self.pool.write() as conn:
+            cursor = conn.execute(
+                UPDATE_ORDER_STATUS[status], (status, to_micros(utc_now()), order_id, expected_status, expected_version)
+            )
+            if cursor.rowcount == 0:
+                self._raise_if_conflict(conn, order_id)
+                return None
+            return self._fetch_order(conn, order_id)
+
+    def _raise_if_conflict(self, conn: sqlite3.Connection, order_id: int) -> None:
+        # Called inside the write transaction, so the order cannot change meanwhile
+        current = self._fetch_order(conn, order_id)
+        if current is not None:
+            raise OrderVersionConflict(current)
+
+    # Idempotency-Key responses, shared by every process using the database file
+
+    def claim_idempotency_key(self, key: str, fingerprint: bytes, lease: float) -> Optional[IdempotentResponse]:
+        with self.pool.write() as conn:
+            now = time.time()
+            row = conn.execute(SELECT_IDEMPOTENCY_KEY, (key,)).fetchone()
+            if row is not None and row[4] > now:
+                return IdempotentResponse(row[0], row[1], _unpack_headers(row[2]), row[3])
+            # New, expired, or a lapsed claim of a worker that died mid-request
+            conn.execute(CLAIM_IDEMPOTENCY_KEY, (key, fingerprint, now + lease))
+            return None
+
+    def save_idempotent_response(self, key: str, response: IdempotentResponse, ttl: float) -> None:
+        with self.pool.write() as conn:
+            now = time.time()
+            conn.execute(SAVE_IDEMPOTENT_RESPONSE, (
+                response.status_code, _pack_headers(response.headers), response.body, now + ttl, key
+            ))
+            conn.execute(PURGE_IDEMPOTENCY_KEYS, (now,))
+
+    def release_idempotency_key(self, key: str) -> None:
+        with self.pool.write() as conn:
+            conn.execute(RELEASE_IDEMPOTENCY_KEY, (key,))
+
+    def clear(self) -> None:
+        with self.pool.write() as conn:
+            conn.execute("DELETE FROM order_items")
+            conn.execute("DELETE FROM orders")
+            conn.execute("DELETE FROM customers")
+            conn.execute("DELETE FROM sqlite_sequence WHERE name IN ('orders', 'customers')")
+            conn.execute("DELETE FROM idempotency_keys")
+
@@ -1,6 +1,10 @@
 from fastapi import FastAPI
+from app.core.config import settings
 from app.api.endpoints.menu import router as menu_router
 from app.api.endpoints.orders import router as orders_router
+from app.api.endpoints.metrics import router as metrics_router
+from app.api.endpoints.debug import router as debug_router
+from app.core.metrics import MetricsMiddleware
 
 app = FastAPI(
     title="Restaurant Ordering System",
@@ -10,11 +14,35 @@ app = FastAPI(
 
 app.include_router(menu_router, prefix="/menu", tags=["menu"])
 app.include_router(orders_router, tags=["orders"])
+app.include_router(metrics_router)
+app.include_router(debug_router)
+app.add_middleware(MetricsMiddleware)
 
 @app.get("/")
 def read_root():
     return {"message": "Welcome to the Restaurant Ordering System API!"}
 
-if __name__ == "__main__":
+def run(workers: int = settings.WORKERS, host: str = "0.0.0.0", port: int = 8000) -> None:
+    """Serve the API, in several worker processes when storage is shared"""
+    import gc
     import uvicorn
-    uvicorn.run(app, host="0.0.0.0", port=8000)
\ No newline at end of file
+    from app.core.server import NoDelayHTTPProtocol
+    from app.database.connection import is_shared_storage
+
+    if workers > 1 and not is_shared_storage(settings.DATABASE_URL):
+        raise SystemExit(
+            f"WORKERS={workers} needs storage shared between processes, "
+            f"e.g. DATABASE_URL=sqlite:///./restaurant.db (got {settings.DATABASE_URL})"
+        )
+    if settings.GC_FREEZE_ON_STARTUP:
+        # Storage was loaded when the app was imported and stays alive for the
+        # life of the process, so later collections need not walk it
+        gc.collect()
+        gc.freeze()
+    if workers > 1:
+        uvicorn.run("app.main:app", host=host, port=port, workers=workers, http=NoDelayHTTPProtocol)
+    else:
+        uvicorn.run(app, host=host, port=port)
+
+if __name__ == "__main__":
+    run()
\ No newline at end of file
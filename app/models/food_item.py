@@ -1,18 +1,46 @@
-from pydantic import BaseModel, Field, constr, condecimal
-from typing import Optional
+from pydantic import BaseModel, Field, computed_field, constr, model_validator
+from typing import List, Optional
+from app.models.money import constrained_money
+
+# Prices are positive whole cents, as every Money is, below 10000.00. Order
+# lines take their unit price from here unvalidated (as OrderItem.UnitPrice),
+# so this is also the limit an order line is held to
+Price = constrained_money(gt=0, max_digits=6, decimal_places=2)
 
 class FoodItem(BaseModel):
+    id: Optional[int] = Field(None, description="The unique identifier for the food item")
     name: constr(min_length=1, max_length=100) = Field(..., description="The name of the food item")
     description: Optional[constr(max_length=500)] = Field(None, description="A brief description of the food item")
     category: constr(min_length=1, max_length=50) = Field(..., description="The category of the food item (e.g., appetizer, main course, dessert)")
-    price: condecimal(gt=0) = Field(..., description="The price of the food item, must be greater than zero")
-    
+    price: Price = Field(..., description="The price of the food item, must be greater than zero")
+    is_available: bool = Field(True, description="Whether the food item can currently be ordered")
+    is_vegetarian: bool = Field(False, description="Whether the food item is vegetarian")
+    is_spicy: bool = Field(False, description="Whether the food item is spicy")
+
+    @model_validator(mode="after")
+    def validate_spicy_beverage(self):
+        if self.is_spicy and self.category == "beverage":
+            raise ValueError("Beverages cannot be marked as spicy")
+        return self
+
+    @computed_field
+    @property
+    def dietary_info(self) -> List[str]:
+        """Human-readable dietary labels"""
+        info = []
+        if self.is_vegetarian:
+            info.append("Vegetarian")
+        if self.is_spicy:
+            info.append("Spicy")
+        return info
+
     class Config:
         schema_extra = {
             "example": {
                 "name": "Margherita Pizza",
                 "description": "Classic pizza with tomatoes, mozzarella cheese, and fresh basil.",
                 "category": "Main Course",
-                "price": 12.99
+                "price": 12.99,
+                "is_vegetarian": True
             }
-        }
\ No newline at end of file
+        }
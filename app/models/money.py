@@ -0,0 +1,275 @@
+from decimal import Decimal, DecimalTuple
+from typing import Annotated, Any, Dict, List, Union
+from pydantic_core import core_schema
+
+_TWO_DIGITS = tuple(f"{cents:02d}" for cents in range(100))
+
+# Amounts at two places, and their rendered strings, by their cents: prices
+# and totals repeat across orders, so most are one lookup instead of a new
+# object or a render. Each table is filled up to CACHED_AMOUNTS entries.
+CACHED_AMOUNTS = 100_000
+_CENT_AMOUNTS: Dict[int, "Money"] = {}
+_CENT_TEXTS: Dict[int, str] = {}
+
+# str() of an amount at two places by its cents when already rendered, else
+# None: saves serializers a Python-level __str__ call per amount
+cached_text = _CENT_TEXTS.get
+
+
+class Money:
+    """An exact amount of money as an integer number of cents, at the decimal
+    places it was given.
+
+    Money(1250) is 12.50 and Money(1250, 1) is 12.5. Amounts are whole cents
+    (anything finer is rejected when parsed), so order totals and aggregates
+    are plain int arithmetic and the same amount is the same cents in every
+    backend. Like the Decimal it replaced, an amount keeps the places it was
+    given and sums take the most places of their terms, so it renders as the
+    same string Decimal would ("12.50", "12.5", "7"). Compares equal to
+    Decimals and ints of the same value, whatever their places.
+
+    Instances are immutable and validate like pydantic's Decimal with at
+    most two decimal places, dumping as their string in JSON; see
+    constrained_money() for constrained fields.
+    """
+
+    __slots__ = ("cents", "places")
+
+    def __init__(self, cents: int = 0, places: int = 2):
+        self.cents = cents
+        self.places = places
+
+    @classmethod
+    def from_decimal(cls, amount: Decimal) -> "Money":
+        exponent = amount.as_tuple().exponent
+        if not isinstance(exponent, int):
+            raise ValueError(f"Not a finite amount: {amount}")
+        cents = amount.scaleb(2)
+        if cents != cents.to_integral_value():
+            raise ValueError(f"Amounts are whole cents, got {amount}")
+        # 1E+1 has no places, as plain notation writes it: 10
+        return cls(int(cents), max(-exponent, 0))
+
+    @classmethod
+    def parse(cls, value: Union["Money", Decimal, int, float, str]) -> "Money":
+        """An amount from a Money, Decimal, int or numeric string; floats by their shortest repr"""
+        if isinstance(value, Money):
+            return value
+        if isinstance(value, int):
+            return cls(value * 100, 0)
+        if isinstance(value, str):
+            # Plain "12.50", as amounts are stored, without going through Decimal
+            whole, dot, fraction = value.partition(".")
+            if (whole.isdigit() and whole.isascii() and len(fraction) <= 2
+                    and (not fraction or (fraction.isdigit() and fraction.isascii()))):
+                return cls(int(whole) * 100 + (int(fraction.ljust(2, "0")) if fraction else 0), len(fraction))
+        elif isinstance(value, float):
+            value = repr(value)
+        return cls.from_decimal(value if isinstance(value, Decimal) else Decimal(value))
+
+    def to_decimal(self) -> Decimal:
+        """The Decimal this amount stands for, places included"""
+        places = self.places
+        if places >= 2:
+            return Decimal(self.cents * 10 ** (places - 2)).scaleb(-places)
+        return Decimal(self.cents // 10 ** (2 - places)).scaleb(-places)
+
+    def as_tuple(self) -> DecimalTuple:
+        """Decimal's digit tuple, which pydantic's max_digits/decimal_places constraints read"""
+        return self.to_decimal().as_tuple()
+
+    # Arithmetic, on cents; results have the most places of their operands,
+    # as Decimal results have
+
+    @staticmethod
+    def _operand(other: Any) -> "Money":
+        """Another operand as Money; raises TypeError for non-amounts"""
+        if type(other) is Money:
+            return other
+        if isinstance(other, (int, Decimal)) and not isinstance(other, bool):
+            return Money.parse(other)
+        raise TypeError
+
+    def __add__(self, other: Any) -> "Money":
+        if type(other) is Money:
+            return Money(self.cents + other.cents, max(self.places, other.places))
+        try:
+            other = self._operand(other)
+        except TypeError:
+            return NotImplemented
+        return Money(self.cents + other.cents, max(self.places, other.places))
+
+    __radd__ = __add__  # sum() starts from 0
+
+    def __sub__(self, other: Any) -> "Money":
+        try:
+            other = self._operand(other)
+        except TypeError:
+            return NotImplemented
+        return Money(self.cents - other.cents, max(self.places, other.places))
+
+    def __rsub__(self, other: Any) -> "Money":
+        try:
+            other = self._operand(other)
+        except TypeError:
+            return NotImplemented
+        return Money(other.cents - self.cents, max(self.places, other.places))
+
+    def __mul__(self, other: Any) -> "Money":
+        if isinstance(other, int) and not isinstance(other, bool):
+            return Money(self.cents * other, self.places)
+        return NotImplemented
+
+    __rmul__ = __mul__
+
+    def __neg__(self) -> "Money":
+        return Money(-self.cents, self.places)
+
+    def __abs__(self) -> "Money":
+        return Money(abs(self.cents), self.places)
+
+    def __bool__(self) -> bool:
+        return self.cents != 0
+
+    def __float__(self) -> float:
+        return self.cents / 100
+
+    # Comparisons: against an int or a Decimal, its value times 100 is exact,
+    # so a Decimal finer than a cent compares correctly instead of raising
+
+    @staticmethod
+    def _scaled(other: Any) -> Union[int, Decimal]:
+        if type(other) is Money:
+            return other.cents
+        if isinstance(other, (int, Decimal)) and not isinstance(other, bool):
+            return other * 100
+        raise TypeError
+
+    def __eq__(self, other: Any) -> bool:
+        if type(other) is Money:
+            return self.cents == other.cents
+        try:
+            return self.cents == self._scaled(other)
+        except TypeError:
+            return NotImplemented
+
+    def __lt__(self, other: Any) -> bool:
+        try:
+            return self.cents < self._scaled(other)
+        except TypeError:
+            return NotImplemented
+
+    def __le__(self, other: Any) -> bool:
+        try:
+            return self.cents <= self._scaled(other)
+        except TypeError:
+            return NotImplemented
+
+    def __gt__(self, other: Any) -> bool:
+        try:
+            return self.cents > self._scaled(other)
+        except TypeError:
+            return NotImplemented
+
+    def __ge__(self, other: Any) -> bool:
+        try:
+            return self.cents >= self._scaled(other)
+        except TypeError:
+            return NotImplemented
+
+    def __hash__(self) -> int:
+        # Equal amounts hash alike, as Decimals and ints of the same value do
+        return hash(self.to_decimal())
+
+    # Rendering
+
+    def __str__(self) -> str:
+        if self.places != 2:
+            return self._render()
+        cents = self.cents
+        text = _CENT_TEXTS.get(cents)
+        if text is None:
+            text = self._render()
+            if len(_CENT_TEXTS) < CACHED_AMOUNTS:
+                _CENT_TEXTS[cents] = text
+        return text
+
+    def _render(self) -> str:
+        places, cents = self.places, self.cents
+        if places > 2:  # Trailing zeros past the cents ("1.500"), or Decimal's exponent notation
+            return str(self.to_decimal())
+        whole, fraction = divmod(abs(cents), 100)
+        sign = "-" if cents < 0 else ""
+        if places == 2:
+            return f"{sign}{whole}.{_TWO_DIGITS[fraction]}"
+        if places == 1:
+            return f"{sign}{whole}.{fraction // 10}"
+        return f"{sign}{whole}"
+
+    def __repr__(self) -> str:
+        return f"Money('{self}')"
+
+    def __reduce__(self):
+        return Money, (self.cents, self.places)
+
+    @classmethod
+    def __get_pydantic_core_schema__(cls, source: Any, handler: Any) -> core_schema.CoreSchema:
+        return _money_schema(core_schema.decimal_schema(decimal_places=2))
+
+
+def _money_schema(decimal_schema: core_schema.CoreSchema) -> core_schema.CoreSchema:
+    # Input goes through pydantic's Decimal validation, so inputs, errors and
+    # the JSON schema stay those of the Decimal fields this type replaced; a
+    # Money is checked against the same constraints as its Decimal
+    def validate(value: Any, validate_decimal: Any) -> Money:
+        if isinstance(value, Money):
+            validate_decimal(value.to_decimal())
+            return value
+        return Money.from_decimal(validate_decimal(value))
+
+    return core_schema.no_info_wrap_validator_function(
+        validate, decimal_schema, serialization=core_schema.to_string_ser_schema(when_used="json")
+    )
+
+
+class _DecimalConstraints:
+    def __init__(self, constraints: Dict[str, Any]):
+        self.constraints = constraints
+
+    def __get_pydantic_core_schema__(self, source: Any, handler: Any) -> core_schema.CoreSchema:
+        return _money_schema(core_schema.decimal_schema(**self.constraints))
+
+
+def constrained_money(**constraints: Any) -> Any:
+    """Money validated against Decimal constraints (gt, ge, lt, le, max_digits,
+    decimal_places), checked by pydantic's Decimal validator itself; Field()
+    constraints on plain Money work too, but run in Python after it.
+    decimal_places is at most 2, like every Money."""
+    bounds = {"gt", "ge", "lt", "le"}
+    constraints["decimal_places"] = min(constraints.get("decimal_places", 2), 2)
+    return Annotated[Money, _DecimalConstraints({
+        name: Decimal(str(value)) if name in bounds else value for name, value in constraints.items()
+    })]
+
+
+def money(cents: int, places: int = 2) -> Money:
+    """Money(cents, places), shared with every other amount of those cents at two places"""
+    if places != 2:
+        return Money(cents, places)
+    amount = _CENT_AMOUNTS.get(cents)
+    if amount is None:
+        amount = Money(cents)
+        if len(_CENT_AMOUNTS) < CACHED_AMOUNTS:
+            _CENT_AMOUNTS[cents] = amount
+    return amount
+
+
+def sum_money(amounts: List[Money]) -> Money:
+    """sum() of amounts, adding their cents directly"""
+    cents = 0
+    places = 0
+    for amount in amounts:
+        cents += amount.cents
+        if amount.places > places:
+            places = amount.places
+    return money(cents, places)
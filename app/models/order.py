@@ -1,7 +1,38 @@
+from datetime import datetime, timedelta, timezone
 from enum import Enum
-from typing import List
+from typing import Annotated, Any, Dict, Optional, Set, Tuple, Type, TypeVar
 from pydantic import BaseModel, Field, validator
-from decimal import Decimal
+from app.core.config import settings
+from app.models.food_item import Price
+from app.models.money import Money, money, sum_money
+
+# Constraints shared by the stored models and the request schemas, so a
+# request validated once already satisfies the models built from it
+MenuItemId = Annotated[int, Field(gt=0)]
+Quantity = Annotated[int, Field(gt=0, le=10)]
+UnitPrice = Price  # Lines are priced from menu items, so both share one constraint
+
+M = TypeVar("M", bound=BaseModel)
+_fields_sets: Dict[type, Set[str]] = {}
+
+
+def construct_validated(model_class: Type[M], values: Dict[str, Any]) -> M:
+    """Build a model from already-validated values that cover every field.
+
+    Skips validation like `model_construct`, minus its per-field default
+    handling, which costs more than the rest of building an order. Instances
+    of one class share their (complete) set of fields set.
+    """
+    fields_set = _fields_sets.get(model_class)
+    if fields_set is None:
+        fields_set = _fields_sets[model_class] = set(model_class.model_fields)
+    model = object.__new__(model_class)
+    object.__setattr__(model, "__dict__", values)
+    object.__setattr__(model, "__pydantic_fields_set__", fields_set)
+    object.__setattr__(model, "__pydantic_extra__", None)
+    object.__setattr__(model, "__pydantic_private__", None)
+    model.model_post_init(None)
+    return model
 
 
 class OrderStatus(str, Enum):
@@ -11,6 +42,36 @@ class OrderStatus(str, Enum):
     DELIVERED = "delivered"
 
 
+# Field recording when an order entered each status; storage sets them on
+# every write, and an order's creation time doubles as its pending time
+STATUS_TIMESTAMPS = {
+    OrderStatus.PENDING.value: "created_at",
+    OrderStatus.CONFIRMED.value: "confirmed_at",
+    OrderStatus.READY.value: "ready_at",
+    OrderStatus.DELIVERED.value: "delivered_at",
+}
+TIMESTAMP_FIELDS = tuple(STATUS_TIMESTAMPS.values())
+
+EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+_MICROSECOND = timedelta(microseconds=1)
+
+
+def utc_now() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+# Storage keeps timestamps as integer microseconds since the epoch, which
+# round-trip exactly and sort as plain integers; naive times are taken as UTC
+def to_micros(moment: datetime) -> int:
+    if moment.tzinfo is None:
+        moment = moment.replace(tzinfo=timezone.utc)
+    return (moment - EPOCH) // _MICROSECOND
+
+
+def from_micros(micros: Optional[int]) -> Optional[datetime]:
+    return None if micros is None else EPOCH + micros * _MICROSECOND
+
+
 class Customer(BaseModel):
     """Simple nested customer model for items in order"""
     name: str = Field(..., min_length=2, max_length=50)
@@ -25,33 +86,121 @@ class Customer(BaseModel):
 
 
 class OrderItem(BaseModel):
-    """Simple nested model for items in order"""
-    menu_item_id: int = Field(..., gt=0)
+    """Simple nested model for items in order; frozen, so its total cannot go stale"""
+    menu_item_id: MenuItemId
     menu_item_name: str = Field(..., min_length=1, max_length=100)  # Store name for easy access
-    quantity: int = Field(..., gt=0, le=10)
-    unit_price: Decimal = Field(..., gt=0, max_digits=6, decimal_places=2)
+    quantity: Quantity
+    unit_price: UnitPrice
+
+    # Materialized once instead of re-multiplying on every access. Kept in the
+    # instance __dict__ (as functools.cached_property does) because pydantic
+    # private attributes are an order of magnitude slower to read.
+    def model_post_init(self, __context) -> None:
+        unit_price = self.unit_price
+        self.__dict__["_item_total"] = money(self.quantity * unit_price.cents, unit_price.places)
+
+    def model_copy(self, *, update: Optional[Dict[str, Any]] = None, deep: bool = False) -> "OrderItem":
+        # The copy starts from this item's __dict__, total included
+        copied = super().model_copy(update=update, deep=deep)
+        if update:
+            copied.model_post_init(None)
+        return copied
 
     @property
-    def item_total(self) -> Decimal:
-        return self.quantity * self.unit_price
+    def item_total(self) -> Money:
+        item_total = self.__dict__["_item_total"]
+        if settings.CHECK_ORDER_TOTALS and item_total != self.quantity * self.unit_price:
+            raise ValueError(f"Stale item total for menu item {self.menu_item_id}")
+        return item_total
+
+    class Config:
+        frozen = True
 
 
 class Order(BaseModel):
     """Order model with nested Customer and OrderItem models"""
     id: int = None
     customer: Customer
-    items: List[OrderItem] = Field(..., min_items=1)
+    items: Tuple[OrderItem, ...] = Field(..., min_items=1)
     status: OrderStatus = OrderStatus.PENDING
-    
+    version: int = Field(1, ge=1)  # Bumped by storage on every change, for optimistic concurrency
+    menu_version: Optional[int] = None  # Version of the menu the items were priced against
+    created_at: Optional[datetime] = None
+    confirmed_at: Optional[datetime] = None
+    ready_at: Optional[datetime] = None
+    delivered_at: Optional[datetime] = None
+
+    @validator(*TIMESTAMP_FIELDS)
+    def validate_timestamp(cls, v):
+        # Stored in UTC; times without a zone are taken to be UTC already
+        if v is None:
+            return v
+        return v.replace(tzinfo=timezone.utc) if v.tzinfo is None else v.astimezone(timezone.utc)
+
+    # Totals are computed when the order is built and whenever `items` is
+    # reassigned. The lines are a tuple of frozen items, so they cannot be
+    # changed in place behind the totals' back
+    def model_post_init(self, __context) -> None:
+        self._compute_totals()
+
+    def __setattr__(self, name, value):
+        if name == "items":
+            value = tuple(value)
+        super().__setattr__(name, value)
+        if name == "items":
+            self._compute_totals()
+
+    def model_copy(self, *, update: Optional[Dict[str, Any]] = None, deep: bool = False) -> "Order":
+        copied = super().model_copy(update=update, deep=deep)
+        if update and "items" in update:
+            copied.items = update["items"]
+        return copied
+
+    def _compute_totals(self) -> None:
+        self.__dict__["_items_total"] = sum_money([item.item_total for item in self.items])
+        self.__dict__["_total_items_count"] = sum(item.quantity for item in self.items)
+
+    def record_status(self, status: str, at: datetime) -> None:
+        """Move to `status`, recording when (the creation time never changes)"""
+        self.status = status
+        field = STATUS_TIMESTAMPS[status]
+        if field != "created_at":
+            setattr(self, field, at)
+
+    def fill_timestamps(self, now: datetime, previous: Optional["Order"] = None) -> None:
+        """Stamp a stored order: timestamps it lacks come from the version it
+        replaces (up to its own status), and its creation time and current
+        status default to `now`"""
+        field = STATUS_TIMESTAMPS[self.status]
+        if previous is not None:
+            for earlier in TIMESTAMP_FIELDS[:TIMESTAMP_FIELDS.index(field) + 1]:
+                if getattr(self, earlier) is None:
+                    setattr(self, earlier, getattr(previous, earlier))
+        if self.created_at is None:
+            self.created_at = now
+        if getattr(self, field) is None:
+            setattr(self, field, now)
+
+    def verify_totals(self) -> None:
+        """Raise ValueError if the stored totals no longer match the items"""
+        if self.__dict__["_items_total"] != sum_money([item.quantity * item.unit_price for item in self.items]):
+            raise ValueError(f"Stale items_total for order {self.id}")
+        if self.__dict__["_total_items_count"] != sum(item.quantity for item in self.items):
+            raise ValueError(f"Stale total_items_count for order {self.id}")
+
     @property
-    def items_total(self) -> Decimal:
-        """Calculate total amount for all items"""
-        return sum(item.item_total for item in self.items)
-    
+    def items_total(self) -> Money:
+        """Total amount for all items"""
+        if settings.CHECK_ORDER_TOTALS:
+            self.verify_totals()
+        return self.__dict__["_items_total"]
+
     @property
     def total_items_count(self) -> int:
-        """Calculate total number of items"""
-        return sum(item.quantity for item in self.items)
+        """Total number of items"""
+        if settings.CHECK_ORDER_TOTALS:
+            self.verify_totals()
+        return self.__dict__["_total_items_count"]
 
     class Config:
         use_enum_values = True
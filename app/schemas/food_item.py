@@ -1,17 +1,28 @@
-from pydantic import BaseModel, Field, constr, condecimal
+from pydantic import BaseModel, Field, constr
 from typing import Optional
+from app.models.food_item import Price
 
 class FoodItemBase(BaseModel):
     name: constr(min_length=1, max_length=100) = Field(..., description="The name of the food item")
     description: Optional[constr(max_length=500)] = Field(None, description="A brief description of the food item")
     category: constr(min_length=1, max_length=50) = Field(..., description="The category of the food item (e.g., appetizer, main course, dessert)")
-    price: condecimal(gt=0) = Field(..., description="The price of the food item, must be greater than zero")
+    price: Price = Field(..., description="The price of the food item, must be greater than zero")
+    is_available: bool = Field(True, description="Whether the food item can currently be ordered")
+    is_vegetarian: bool = Field(False, description="Whether the food item is vegetarian")
+    is_spicy: bool = Field(False, description="Whether the food item is spicy")
 
 class FoodItemCreate(FoodItemBase):
     pass
 
-class FoodItemUpdate(FoodItemBase):
-    pass
+class FoodItemUpdate(BaseModel):
+    """Partial update: only the fields that are sent are changed"""
+    name: Optional[constr(min_length=1, max_length=100)] = None
+    description: Optional[constr(max_length=500)] = None
+    category: Optional[constr(min_length=1, max_length=50)] = None
+    price: Optional[Price] = None
+    is_available: Optional[bool] = None
+    is_vegetarian: Optional[bool] = None
+    is_spicy: Optional[bool] = None
 
 class FoodItemResponse(FoodItemBase):
     id: int = Field(..., description="The unique identifier for the food item")
@@ -1,23 +1,29 @@
-from typing import List, Optional
-from pydantic import BaseModel
-from decimal import Decimal
-from app.models.order import OrderStatus, Customer, OrderItem
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Union
+from pydantic import BaseModel, Field
+from app.models.money import Money
+from app.models.order import OrderStatus, Customer, OrderItem, MenuItemId, Quantity
 
-
-class CustomerCreate(BaseModel):
-    name: str
-    phone: str
-    address: str
+# Requests carry the same constraints as the stored models, so an order is
+# validated once, when the request is parsed, and then built without
+# validating again. The customer is stored exactly as sent.
+CustomerCreate = Customer
 
 
 class OrderItemCreate(BaseModel):
-    menu_item_id: int
-    quantity: int
+    menu_item_id: MenuItemId
+    quantity: Quantity
 
 
 class OrderCreate(BaseModel):
     customer: CustomerCreate
-    items: List[OrderItemCreate]
+    items: List[OrderItemCreate] = Field(..., min_length=1)
+
+
+class OrderBatchCreate(BaseModel):
+    # Each entry is validated as an OrderCreate on its own, so one bad order
+    # is reported in its result instead of rejecting the whole batch
+    orders: List[Dict[str, Any]] = Field(..., min_length=1, max_length=1000)
 
 
 class OrderStatusUpdate(BaseModel):
@@ -28,8 +34,8 @@ class OrderItemResponse(BaseModel):
     menu_item_id: int
     menu_item_name: str
     quantity: int
-    unit_price: Decimal
-    item_total: Decimal
+    unit_price: Money
+    item_total: Money
 
     class Config:
         from_attributes = True
@@ -49,8 +55,14 @@ class OrderResponse(BaseModel):
     customer: CustomerResponse
     items: List[OrderItemResponse]
     status: str
-    items_total: Decimal
+    items_total: Money
     total_items_count: int
+    version: int  # Also sent as the ETag; echo it in If-Match to update safely
+    menu_version: Optional[int] = None  # Menu version the order was priced against
+    created_at: Optional[datetime] = None
+    confirmed_at: Optional[datetime] = None  # When the order entered each later status
+    ready_at: Optional[datetime] = None
+    delivered_at: Optional[datetime] = None
 
     class Config:
         from_attributes = True
@@ -61,13 +73,53 @@ class OrderSummaryResponse(BaseModel):
     customer_name: str
     customer_phone: str
     status: str
-    items_total: Decimal
+    items_total: Money
     total_items_count: int
+    created_at: Optional[datetime] = None
 
     class Config:
         from_attributes = True
 
 
+class OrderItemSalesResponse(BaseModel):
+    menu_item_id: int
+    menu_item_name: str  # As on its most recently stored order line
+    quantity: int
+    revenue: Money
+
+
+class OrderStatsResponse(BaseModel):
+    orders: Dict[str, int]  # Number of orders in every status
+    revenue: Dict[str, Money]  # Sum of items_total over the orders in every status
+    total_revenue: Money
+    items: List[OrderItemSalesResponse]  # Most units sold first
+    differences: Optional[List[str]] = None  # Only with recompute=true; empty when everything agrees
+
+
+class OrderPage(BaseModel):
+    orders: List[OrderSummaryResponse]
+    next_cursor: Optional[int] = None  # Pass as `after` to get the next page; None on the last page
+    counts: Dict[str, int]  # Number of orders in every status
+
+
+class OrderTimelinePage(BaseModel):
+    orders: List[OrderSummaryResponse]  # Oldest first
+    next_cursor: Optional[int] = None  # Pass as `after` with the same window to continue; None at the end
+
+
+class OrderBatchResult(BaseModel):
+    index: int  # Position of the order in the request
+    status_code: int  # What POST /orders/ would have answered for this order
+    order: Optional[OrderResponse] = None
+    detail: Optional[Union[str, List[Dict[str, Any]]]] = None
+
+
+class OrderBatchResponse(BaseModel):
+    created: int
+    failed: int
+    results: List[OrderBatchResult]
+
+
 class ErrorResponse(BaseModel):
     detail: str
     error_code: Optional[str] = None
@@ -0,0 +1,6 @@
+# Performance benchmarks, run as scripts: python -m benchmarks.<name>
+import os
+
+# Benchmarks that use the default storage measure (and reset) in-memory
+# storage, never the SQLite file the server keeps by default
+os.environ.setdefault("DATABASE_URL", "memory://")
@@ -0,0 +1,72 @@
+"""Orders per second through POST /orders/batch versus one POST /orders/ each.
+
+Run with: python -m benchmarks.bench_batch_orders [--orders 5000] [--batch-size 100]
+
+Both paths go through the ASGI app in process. The batch path pays routing
+and the storage lock or transaction once per batch instead of once per order.
+"""
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+import httpx
+from app.database import connection
+from app.main import app
+
+ORDER = {
+    "customer": {"name": "Alice Smith", "phone": "5551234567", "address": "123 Oak Street"},
+    "items": [{"menu_item_id": 1, "quantity": 2}, {"menu_item_id": 2, "quantity": 1}],
+}
+MENU = [
+    {"name": "Margherita Pizza", "category": "main_course", "price": 15.99},
+    {"name": "Chicken Wings", "category": "appetizer", "price": 12.50},
+]
+
+
+async def measure(database_url: str, orders: int, batch_size: int) -> dict:
+    rates = {}
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        connection.configure_storage(database_url)
+        for item in MENU:
+            await client.post("/menu/", json=item)
+        start = time.perf_counter()
+        for _ in range(orders):
+            await client.post("/orders/", json=ORDER)
+        rates["sequential"] = orders / (time.perf_counter() - start)
+
+        connection.reset_database()
+        for item in MENU:
+            await client.post("/menu/", json=item)
+        start = time.perf_counter()
+        created = 0
+        for first in range(0, orders, batch_size):
+            batch = [ORDER] * min(batch_size, orders - first)
+            response = await client.post("/orders/batch", json={"orders": batch})
+            created += response.json()["created"]
+        rates["batch"] = created / (time.perf_counter() - start)
+    return rates
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--orders", type=int, default=5000)
+    parser.add_argument("--batch-size", type=int, default=100)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        backends = {
+            "memory": "memory://",
+            "sqlite (file, WAL)": f"sqlite:///{os.path.join(tmp, 'bench.db')}",
+        }
+        print(f"{'backend':<20} {'sequential orders/s':>20} {'batch orders/s':>15} {'speedup':>8}")
+        for name, url in backends.items():
+            rates = asyncio.run(measure(url, args.orders, args.batch_size))
+            speedup = rates["batch"] / rates["sequential"]
+            print(f"{name:<20} {rates['sequential']:>20.0f} {rates['batch']:>15.0f} {speedup:>7.1f}x")
+    connection.configure_storage("memory://")
+
+
+if __name__ == "__main__":
+    main()
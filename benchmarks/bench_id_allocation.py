@@ -0,0 +1,61 @@
+"""Insert latency of add_order as the order book grows.
+
+Run with: python -m benchmarks.bench_id_allocation [--max-orders 1000000]
+
+ID allocation is O(1), so the per-insert latency reported for each size
+should stay flat from 10 up to 1M stored orders.
+"""
+import argparse
+import time
+from decimal import Decimal
+from app.database import connection
+from app.models.order import Customer, Order, OrderItem
+
+SAMPLE = 1000
+
+
+def template_order() -> Order:
+    return Order(
+        customer=Customer(name="Alice Smith", phone="5551234567", address="123 Oak Street"),
+        items=[OrderItem(menu_item_id=1, menu_item_name="Pizza", quantity=2, unit_price=Decimal("12.99"))],
+    )
+
+
+def run(max_orders: int) -> None:
+    connection.reset_database()
+    template = template_order()
+
+    sizes = []
+    size = 10
+    while size <= max_orders:
+        sizes.append(size)
+        size *= 10
+
+    # Counted here: reading the order book back to count it would cost more
+    # than the inserts being measured
+    stored = 0
+    print(f"{'stored orders':>14} {'ns/insert':>10}")
+    for size in sizes:
+        while stored < size:
+            connection.add_order(template.model_copy())
+            stored += 1
+        batch = [template.model_copy() for _ in range(SAMPLE)]
+        start = time.perf_counter_ns()
+        for order in batch:
+            connection.add_order(order)
+        elapsed = time.perf_counter_ns() - start
+        stored += SAMPLE
+        print(f"{size:>14,} {elapsed / SAMPLE:>10.0f}")
+
+    connection.reset_database()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--max-orders", type=int, default=1_000_000)
+    args = parser.parse_args()
+    run(args.max_orders)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+"""Cost of POST /orders/ with an Idempotency-Key: first requests, replays and retry storms.
+
+Run with: python -m benchmarks.bench_idempotency [--requests 5000]
+
+Calls the ASGI app directly (no HTTP client in between) with:
+
+- no key, as before
+- a new key per request, which stores each response (a miss)
+- one key for every request, which replays the stored response (a hit)
+- bursts of concurrent retries sharing a key, which are coalesced onto the
+  first one, so each burst creates one order
+"""
+import argparse
+import asyncio
+import json
+import time
+from typing import List, Optional
+from app.api.idempotency import idempotency_cache
+from app.database.connection import add_item, get_order_repository, reset_database
+from app.main import app
+from app.models.food_item import FoodItem
+from app.models.money import Money
+
+BURST = 10
+
+
+def order_body(menu_item_id: int) -> bytes:
+    return json.dumps({
+        "customer": {"name": "Alice Smith", "phone": "5551234567", "address": "123 Oak Street"},
+        "items": [{"menu_item_id": menu_item_id, "quantity": 2}],
+    }).encode()
+
+
+async def post_order(body: bytes, key: Optional[str]) -> int:
+    headers = [(b"content-type", b"application/json"), (b"content-length", str(len(body)).encode())]
+    if key is not None:
+        headers.append((b"idempotency-key", key.encode()))
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "POST",
+        "scheme": "http", "path": "/orders/", "raw_path": b"/orders/", "root_path": "", "query_string": b"",
+        "headers": headers, "client": ("127.0.0.1", 50000), "server": ("testserver", 80),
+    }
+    statuses: List[int] = []
+
+    async def receive():
+        return {"type": "http.request", "body": body, "more_body": False}
+
+    async def send(message):
+        if message["type"] == "http.response.start":
+            statuses.append(message["status"])
+
+    await app(scope, receive, send)
+    return statuses[0]
+
+
+async def sequential(body: bytes, requests: int, key_of) -> float:
+    start = time.perf_counter()
+    for n in range(requests):
+        assert await post_order(body, key_of(n)) == 201
+    return (time.perf_counter() - start) / requests
+
+
+async def bursts(body: bytes, count: int) -> float:
+    start = time.perf_counter()
+    for n in range(count):
+        statuses = await asyncio.gather(*(post_order(body, f"burst-{n}") for _ in range(BURST)))
+        assert statuses == [201] * BURST
+    return (time.perf_counter() - start) / count
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=5000)
+    args = parser.parse_args()
+
+    reset_database()
+    body = order_body(add_item(FoodItem(name="Pizza", category="main_course", price=Money(999))).id)
+    orders = get_order_repository()
+
+    without_key = asyncio.run(sequential(body, args.requests, lambda n: None))
+    idempotency_cache.reset()
+    new_keys = asyncio.run(sequential(body, args.requests, lambda n: f"order-{n}"))
+    print(f"no key              {without_key * 1e6:8.1f} us/request")
+    print(f"new key (miss)      {new_keys * 1e6:8.1f} us/request")
+    stored = orders.count_orders_by_status()
+    replays = asyncio.run(sequential(body, args.requests, lambda n: "order-0"))
+    assert orders.count_orders_by_status() == stored
+    print(f"same key (replay)   {replays * 1e6:8.1f} us/request")
+
+    idempotency_cache.reset()
+    count = max(1, args.requests // BURST)
+    per_burst = asyncio.run(bursts(body, count))
+    assert orders.count_orders_by_status()["pending"] == stored["pending"] + count
+    print(f"{BURST} concurrent retries {per_burst * 1e6:8.1f} us/burst "
+          f"(1 order each: {idempotency_cache.misses} misses, {idempotency_cache.coalesced} coalesced, "
+          f"{idempotency_cache.hits} hits)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+"""Recovery time of the journal:/// backend, from the raw journal and from a snapshot.
+
+Run with: python -m benchmarks.bench_journal_replay [--orders 1000000] [--writers 8]
+
+Writes a journal of `--orders` order records (plus one status change per ten
+orders), then times startup replaying it, compacts it into a snapshot and
+times startup again. Also reports commit throughput with fsync per commit
+shared between `--writers` threads (group commit).
+"""
+import argparse
+import os
+import tempfile
+import threading
+import time
+from decimal import Decimal
+from app.core.encoding import dumps
+from app.database.journal import Journal, JournaledMenuRepository, JournaledOrderRepository, encode_order
+from app.models.order import Customer, Order, OrderItem
+
+
+def make_order() -> Order:
+    return Order(
+        customer=Customer(name="Alice Smith", phone="5551234567", address="123 Oak Street"),
+        items=[
+            OrderItem(menu_item_id=1, menu_item_name="Margherita Pizza", quantity=2, unit_price=Decimal("15.99")),
+            OrderItem(menu_item_id=2, menu_item_name="Chicken Wings", quantity=1, unit_price=Decimal("12.50")),
+        ]
+    )
+
+
+def write_journal(directory: str, orders: int) -> None:
+    template = encode_order(make_order())
+    with open(os.path.join(directory, "journal-000000000000.ndjson"), "wb") as journal:
+        for order_id in range(1, orders + 1):
+            template[0] = order_id
+            journal.write(dumps({"op": "order", "order": template}) + b"\n")
+            if order_id % 10 == 0:
+                journal.write(dumps({"op": "status", "id": order_id, "status": "confirmed", "version": 2}) + b"\n")
+
+
+def open_storage(directory: str):
+    journal = Journal(directory, snapshot_every=None)
+    menu, orders = JournaledMenuRepository(journal), JournaledOrderRepository(journal)
+    start = time.perf_counter()
+    journal.open(menu, orders)
+    return journal, orders, time.perf_counter() - start
+
+
+def commit_rate(directory: str, writers: int, commits: int) -> float:
+    journal, orders, _ = open_storage(directory)
+    per_writer = commits // writers
+
+    def writer():
+        for _ in range(per_writer):
+            orders.add_order(make_order())
+
+    threads = [threading.Thread(target=writer) for _ in range(writers)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+    journal.close()
+    return per_writer * writers / elapsed
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--orders", type=int, default=1_000_000)
+    parser.add_argument("--writers", type=int, default=8)
+    parser.add_argument("--commits", type=int, default=2000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        write_journal(tmp, args.orders)
+        size = os.path.getsize(os.path.join(tmp, "journal-000000000000.ndjson"))
+        journal, orders, replay = open_storage(tmp)
+        assert len(orders.get_all_orders()) == args.orders
+        print(f"journal: {args.orders:,} orders, {size / 1e6:.0f} MB")
+        print(f"replay journal      {replay:7.2f} s  {args.orders / replay:>10,.0f} orders/s")
+
+        start = time.perf_counter()
+        journal.snapshot()
+        print(f"write snapshot      {time.perf_counter() - start:7.2f} s")
+        journal.close()
+        del journal, orders
+
+        journal, orders, load = open_storage(tmp)
+        assert len(orders.get_all_orders()) == args.orders
+        print(f"load snapshot       {load:7.2f} s  {args.orders / load:>10,.0f} orders/s")
+        journal.close()
+
+    for writers in (1, args.writers):
+        with tempfile.TemporaryDirectory() as tmp:
+            rate = commit_rate(tmp, writers, args.commits)
+            print(f"fsync'd commits, {writers} writer(s): {rate:>8,.0f} orders/s")
+
+
+if __name__ == "__main__":
+    main()
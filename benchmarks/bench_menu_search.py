@@ -0,0 +1,83 @@
+"""Latency of menu search queries, typed a letter at a time, on a large menu.
+
+Run with: python -m benchmarks.bench_menu_search [--items 100000] [--database-url memory://]
+
+Fills the menu with items named from a vocabulary of dish words, then runs
+every prefix of a few search phrases (as a search-as-you-type box sends
+them) through search_items with the endpoint's default limit of 20.
+"""
+import argparse
+import random
+import tempfile
+import time
+from decimal import Decimal
+from app.database.connection import create_storage
+from app.models.food_item import FoodItem
+
+ADJECTIVES = [
+    "spicy", "smoked", "grilled", "crispy", "roasted", "creamy", "garlic", "lemon", "honey", "sweet", "sour",
+    "tandoori", "stuffed", "baked", "fried", "steamed", "braised", "glazed", "pickled", "charred",
+]
+INGREDIENTS = [
+    "chicken", "paneer", "mushroom", "tomato", "spinach", "potato", "lamb", "prawn", "salmon", "tofu", "cheese",
+    "pepper", "onion", "aubergine", "chickpea", "lentil", "basil", "mango", "coconut", "pumpkin", "beef", "egg",
+]
+DISHES = [
+    "pizza", "curry", "burger", "salad", "soup", "wrap", "risotto", "noodles", "tikka", "pie", "tacos", "biryani",
+    "pasta", "sandwich", "skewers", "dumplings", "bowl", "stew", "quesadilla", "flatbread",
+]
+PHRASES = ["spicy chicken pizza", "paneer tikka", "creamy mushroom risotto", "mango", "garlic prawn noodles", "lamb curry 12"]
+LIMIT = 20
+
+
+def make_item(rng: random.Random, n: int) -> FoodItem:
+    name = f"{rng.choice(ADJECTIVES).title()} {rng.choice(INGREDIENTS).title()} {rng.choice(DISHES).title()} {n}"
+    description = f"With {rng.choice(INGREDIENTS)}, {rng.choice(INGREDIENTS)} and {rng.choice(ADJECTIVES)} sauce"
+    return FoodItem(name=name, description=description, category="main_course", price=Decimal("9.99"))
+
+
+def percentile(sorted_values, fraction: float) -> float:
+    return sorted_values[min(len(sorted_values) - 1, int(fraction * len(sorted_values)))]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--items", type=int, default=100_000)
+    parser.add_argument("--repeat", type=int, default=20, help="runs of every query")
+    parser.add_argument("--database-url", default="memory://",
+                        help="a {tmp} in the URL is replaced with a temporary directory")
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    with tempfile.TemporaryDirectory() as tmp:
+        menu, _ = create_storage(args.database_url.replace("{tmp}", tmp))
+        start = time.perf_counter()
+        for n in range(args.items):
+            menu.add_item(make_item(rng, n))
+        loaded = time.perf_counter() - start
+        print(f"{args.items:,} items indexed in {loaded:.1f} s ({loaded / args.items * 1e6:.1f} us/item)")
+
+        queries = [phrase[:length] for phrase in PHRASES for length in range(1, len(phrase) + 1)]
+        queries = [query for query in queries if not query.endswith(" ")]
+        latencies = []
+        for _ in range(args.repeat):
+            for query in queries:
+                start = time.perf_counter()
+                menu.search_items(query, LIMIT)
+                latencies.append(time.perf_counter() - start)
+        latencies.sort()
+        print(f"{len(queries)} queries x {args.repeat}: p50 {percentile(latencies, 0.5) * 1e3:.3f} ms, "
+              f"p99 {percentile(latencies, 0.99) * 1e3:.3f} ms, max {latencies[-1] * 1e3:.3f} ms")
+
+        slowest = max(queries, key=lambda query: timed(menu, query))
+        print(f"slowest query: {slowest!r} ({len(menu.search_items(slowest))} matches)")
+
+
+def timed(menu, query: str) -> float:
+    start = time.perf_counter()
+    menu.search_items(query, LIMIT)
+    return time.perf_counter() - start
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,59 @@
+"""Per-request cost of MetricsMiddleware.
+
+Run with: python -m benchmarks.bench_metrics [--requests 200000]
+
+Calls a minimal ASGI app directly, with and without the middleware around
+it, so the difference is the instrumentation alone: status capture, the
+in-flight gauge, route template lookup, the counter and the histogram.
+"""
+import argparse
+import asyncio
+import time
+from app.api.endpoints.orders import router
+from app.core.metrics import MetricsMiddleware, RequestMetrics
+
+ROUTE = next(route for route in router.routes if getattr(route, "path_format", None) == "/orders/{order_id}")
+START = {"type": "http.response.start", "status": 200, "headers": []}
+BODY = {"type": "http.response.body", "body": b"{}"}
+
+
+async def endpoint(scope, receive, send):
+    # What routing leaves in the scope for GET /orders/{order_id}
+    scope["route"] = ROUTE
+    scope["path_params"] = {"order_id": 42}
+    await send(START)
+    await send(BODY)
+
+
+async def receive():
+    return {"type": "http.request", "body": b"", "more_body": False}
+
+
+async def send(message):
+    pass
+
+
+async def per_request(app, requests: int) -> float:
+    scope = {"type": "http", "method": "GET", "path": "/orders/42"}
+    start = time.perf_counter()
+    for _ in range(requests):
+        await app(dict(scope), receive, send)
+    return (time.perf_counter() - start) / requests
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=200_000)
+    args = parser.parse_args()
+
+    metrics = RequestMetrics()
+    bare = asyncio.run(per_request(endpoint, args.requests))
+    instrumented = asyncio.run(per_request(MetricsMiddleware(endpoint, metrics), args.requests))
+    assert sum(metrics.requests.values()) == args.requests
+    print(f"without middleware  {bare * 1e6:6.2f} us/request")
+    print(f"with middleware     {instrumented * 1e6:6.2f} us/request")
+    print(f"overhead            {(instrumented - bare) * 1e6:6.2f} us/request")
+
+
+if __name__ == "__main__":
+    main()
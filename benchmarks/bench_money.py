@@ -0,0 +1,155 @@
+"""Money in integer cents versus the Decimal baseline, on totals and list serialization.
+
+Run with: python -m benchmarks.bench_money [--orders 100000]
+
+Both sides get the same random orders (1-4 lines, prices 3.00-30.00):
+
+- totals: line and order totals as the Order models compute them, then
+  revenue over every order as the running stats and GET /orders/stats sum it
+- serialization: pages of 100 order summaries and 100 full orders through
+  the API's JSON path, and the full menu through pydantic (as the menu
+  cache renders it), each with Decimal amounts and with Money amounts
+
+Both produce the same JSON, which is checked before timing.
+"""
+import argparse
+import random
+import time
+from decimal import Decimal
+from typing import Any, Callable, List
+import orjson
+from pydantic import Field, TypeAdapter, condecimal
+from app.api import serialization
+from app.models.food_item import FoodItem
+from app.models.money import Money, money, sum_money
+
+PAGE = 100
+
+
+def _decimal_default(obj: Any) -> Any:
+    # The API's JSON fallback as it was for Decimal amounts
+    if isinstance(obj, Decimal):
+        return str(obj)
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+def decimal_dumps(content: Any) -> bytes:
+    return orjson.dumps(content, default=_decimal_default)
+
+
+class DecimalFoodItem(FoodItem):
+    """FoodItem as it was, with a Decimal price"""
+    price: condecimal(gt=0) = Field(...)
+
+
+def make_lines(rng: random.Random, count: int) -> List[List[tuple]]:
+    return [
+        [(rng.randint(1, 5), rng.randint(300, 3000)) for _ in range(rng.randint(1, 4))]
+        for _ in range(count)
+    ]
+
+
+def decimal_totals(orders: List[List[tuple]]) -> List[Decimal]:
+    totals = []
+    for lines in orders:
+        item_totals = [quantity * price for quantity, price in lines]
+        totals.append(sum(item_totals))
+    return totals
+
+
+def money_totals(orders: List[List[tuple]]) -> List[Money]:
+    totals = []
+    for lines in orders:
+        item_totals = [money(quantity * price.cents, price.places) for quantity, price in lines]
+        totals.append(sum_money(item_totals))
+    return totals
+
+
+def summary(order_id: int, total: Any, count: int) -> dict:
+    return {"id": order_id, "customer_name": "Alice Smith", "customer_phone": "5551234567",
+            "status": "pending", "items_total": total, "total_items_count": count}
+
+
+def full(order_id: int, lines: List[tuple], total: Any, totals: Callable) -> dict:
+    return {
+        "id": order_id,
+        "customer": {"name": "Alice Smith", "phone": "5551234567", "address": "123 Oak Street"},
+        "items": [
+            {"menu_item_id": n, "menu_item_name": f"Dish {n}", "quantity": quantity,
+             "unit_price": price, "item_total": totals(quantity, price)}
+            for n, (quantity, price) in enumerate(lines, 1)
+        ],
+        "status": "pending",
+        "items_total": total,
+        "total_items_count": sum(quantity for quantity, _ in lines),
+        "version": 1,
+    }
+
+
+def best(function: Callable, rounds: int = 5) -> float:
+    """Best-of-rounds seconds for one call"""
+    fastest = float("inf")
+    for _ in range(rounds):
+        start = time.perf_counter()
+        function()
+        fastest = min(fastest, time.perf_counter() - start)
+    return fastest
+
+
+def row(label: str, unit: str, count: int, decimal_seconds: float, money_seconds: float) -> None:
+    print(f"  {label:<34} {decimal_seconds / count * 1e6:>9.3f} {money_seconds / count * 1e6:>9.3f}"
+          f"  {unit:<8} {decimal_seconds / money_seconds:>6.2f}x")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--orders", type=int, default=100_000)
+    args = parser.parse_args()
+
+    cents = make_lines(random.Random(0), args.orders)
+    # Menu prices are shared by every line priced from them, on both sides
+    decimal_prices = {price: Decimal(price).scaleb(-2) for price in range(300, 3001)}
+    money_prices = {price: Money(price) for price in range(300, 3001)}
+    decimal_orders = [[(quantity, decimal_prices[price]) for quantity, price in lines] for lines in cents]
+    money_orders = [[(quantity, money_prices[price]) for quantity, price in lines] for lines in cents]
+
+    decimal_results, money_results = decimal_totals(decimal_orders), money_totals(money_orders)
+    assert [str(total) for total in decimal_results] == [str(total) for total in money_results]
+    print(f"{'':<36} {'Decimal':>9} {'Money':>9}  {'':<8} {'speedup':>7}")
+    print("totals")
+    row("line + order totals", "us/order", args.orders,
+        best(lambda: decimal_totals(decimal_orders)), best(lambda: money_totals(money_orders)))
+    row("revenue over every order", "us/order", args.orders,
+        best(lambda: sum(decimal_results)), best(lambda: sum_money(money_results)))
+
+    print("serialization")
+    decimal_page = [summary(n, total, 3) for n, total in enumerate(decimal_results[:PAGE])]
+    money_page = [summary(n, total, 3) for n, total in enumerate(money_results[:PAGE])]
+    decimal_full = [
+        full(n, lines, total, lambda quantity, price: quantity * price)
+        for n, (lines, total) in enumerate(zip(decimal_orders[:PAGE], decimal_results))
+    ]
+    money_full = [
+        full(n, lines, total, lambda quantity, price: money(quantity * price.cents, price.places))
+        for n, (lines, total) in enumerate(zip(money_orders[:PAGE], money_results))
+    ]
+    for decimal_content, money_content in ((decimal_page, money_page), (decimal_full, money_full)):
+        assert decimal_dumps(decimal_content) == serialization.dumps(money_content)
+    row(f"page of {PAGE} order summaries", "us/page", 1,
+        best(lambda: decimal_dumps(decimal_page)), best(lambda: serialization.dumps(money_page)))
+    row(f"page of {PAGE} full orders", "us/page", 1,
+        best(lambda: decimal_dumps(decimal_full)), best(lambda: serialization.dumps(money_full)))
+
+    menu = [
+        {"id": n, "name": f"Dish {n}", "category": "main_course", "price": Decimal(price).scaleb(-2)}
+        for n, price in enumerate(range(300, 1300), 1)
+    ]
+    decimal_menu = [DecimalFoodItem(**item) for item in menu]
+    money_menu = [FoodItem(**item) for item in menu]
+    decimal_adapter, money_adapter = TypeAdapter(List[DecimalFoodItem]), TypeAdapter(List[FoodItem])
+    row(f"menu of {len(menu)} items (pydantic)", "us/menu", 1,
+        best(lambda: decimal_adapter.dump_json(decimal_menu)), best(lambda: money_adapter.dump_json(money_menu)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,133 @@
+"""Memory taken per stored order: pydantic models versus compact records.
+
+Run with: python -m benchmarks.bench_order_memory [--sizes 100000,1000000]
+
+Builds orders the way the API does (fresh strings, amounts and datetimes
+per request, from 5,000 customers and 500 menu items) and measures with
+tracemalloc the Python heap per order held by:
+
+- a dict of pydantic Orders, which is how memory:// stored them before
+- a dict of OrderRecords, how it stores them now
+- a whole InMemoryOrderRepository, records plus its indexes and running stats
+
+Then times materializing records back into Orders, which every read pays.
+At 1,000,000 orders the pydantic dict alone needs several GB of RAM.
+"""
+import argparse
+import gc
+import random
+import time
+import tracemalloc
+from datetime import datetime, timedelta, timezone
+from typing import Callable, Iterator, List
+from app.database.memory import InMemoryOrderRepository
+from app.database.order_records import OrderRecord
+from app.models.money import Money
+from app.models.order import Customer, Order, OrderItem, construct_validated
+
+START = datetime(2026, 3, 2, tzinfo=timezone.utc)
+FIRST_NAMES = ["Alice", "Bob", "Carol", "Dave", "Erin", "Frank", "Grace", "Heidi", "Ivan", "Judy"]
+LAST_NAMES = ["Smith", "Jones", "Brown", "Taylor", "Wilson", "Davies", "Evans", "Thomas", "Moore", "Clark"]
+BATCH = 10_000
+
+
+def make_order(rng: random.Random, order_id: int) -> Order:
+    customer = rng.randrange(5000)
+    items = []
+    for _ in range(rng.randint(1, 4)):
+        item_id = rng.randint(1, 500)
+        items.append(construct_validated(OrderItem, {
+            "menu_item_id": item_id,
+            "menu_item_name": f"Dish number {item_id}",
+            "quantity": rng.randint(1, 5),
+            "unit_price": Money(rng.randint(300, 3000)),
+        }))
+    return construct_validated(Order, {
+        "id": order_id,
+        "customer": construct_validated(Customer, {
+            "name": f"{FIRST_NAMES[customer % 10]} {LAST_NAMES[customer // 10 % 10]}",
+            "phone": f"555{customer:07d}",
+            "address": f"{customer} Oak Street",
+        }),
+        "items": items,
+        "status": "pending",
+        "version": 1,
+        "menu_version": 1,
+        "created_at": START + timedelta(seconds=order_id),
+        "confirmed_at": None,
+        "ready_at": None,
+        "delivered_at": None,
+    })
+
+
+def batches(size: int) -> Iterator[List[Order]]:
+    rng = random.Random(0)
+    for first in range(1, size + 1, BATCH):
+        yield [make_order(rng, order_id) for order_id in range(first, min(first + BATCH, size + 1))]
+
+
+def measure(label: str, size: int, store: Callable[[int], object]) -> object:
+    """Print the heap per order left behind by `store`; returns what it stored"""
+    gc.collect()
+    tracemalloc.start()
+    baseline = tracemalloc.get_traced_memory()[0]
+    start = time.perf_counter()
+    stored = store(size)
+    elapsed = time.perf_counter() - start
+    gc.collect()
+    used = tracemalloc.get_traced_memory()[0] - baseline
+    tracemalloc.stop()
+    print(f"  {label:<28} {used / size:>8,.0f} bytes/order  {used / 2 ** 20:>9,.1f} MiB  "
+          f"(built in {elapsed:.1f} s, traced)")
+    return stored
+
+
+def pydantic_orders(size: int) -> dict:
+    orders = {}
+    for batch in batches(size):
+        orders.update((order.id, order) for order in batch)
+    return orders
+
+
+def order_records(size: int) -> dict:
+    records = {}
+    for batch in batches(size):
+        records.update((order.id, OrderRecord.from_order(order)) for order in batch)
+    return records
+
+
+def repository(size: int) -> InMemoryOrderRepository:
+    orders = InMemoryOrderRepository()
+    for batch in batches(size):
+        orders.add_orders(batch)
+    return orders
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", default="100000,1000000", help="comma-separated order counts")
+    args = parser.parse_args()
+
+    for size in (int(size) for size in args.sizes.split(",")):
+        print(f"{size:,} orders")
+        before = measure("pydantic Orders (before)", size, pydantic_orders)
+        del before
+        records = measure("OrderRecords (after)", size, order_records)
+        del records
+        orders = measure("InMemoryOrderRepository", size, repository)
+
+        ids = random.Random(1).sample(range(1, size + 1), min(size, 10_000))
+        start = time.perf_counter()
+        for order_id in ids:
+            orders.get_order(order_id)
+        per_read = (time.perf_counter() - start) / len(ids)
+        start = time.perf_counter()
+        page = orders.list_orders(limit=1000)
+        per_page = time.perf_counter() - start
+        print(f"  get_order {per_read * 1e6:.1f} us, list_orders (1000) {per_page * 1e3:.2f} ms, "
+              f"{len(page)} materialized")
+        del orders, page
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+"""Memory held by orders over a simulated week of uptime, with and without the archive.
+
+Run with: python -m benchmarks.bench_order_retention [--orders-per-hour 1000] [--days 7]
+
+Stores a steady flow of orders, each delivered 30 minutes after it was
+created, into the in-memory repository hour by simulated hour, running the
+retention pass after each hour as writes would. Reports how many orders
+stay in memory and the Python heap they take (tracemalloc) at the end of
+every day, then the latency of time-window queries on the bisect index
+and of reading archived orders by ID.
+"""
+import argparse
+import random
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timedelta, timezone
+from decimal import Decimal
+from typing import List, Optional
+from app.database.memory import InMemoryOrderRepository
+from app.database.order_archive import OrderArchive
+from app.models.order import Customer, Order, OrderItem
+
+CUSTOMER = Customer(name="Alice Smith", phone="5551234567", address="123 Oak Street")
+START = datetime(2026, 3, 2, tzinfo=timezone.utc)
+ARCHIVE_AFTER = 6 * 3600.0
+
+
+def make_order(rng: random.Random, created_at: datetime) -> Order:
+    return Order(
+        customer=CUSTOMER,
+        items=[
+            OrderItem(menu_item_id=rng.randint(1, 500), menu_item_name="Dish", quantity=rng.randint(1, 5),
+                      unit_price=Decimal(rng.randint(300, 3000)) / 100)
+            for _ in range(rng.randint(1, 4))
+        ],
+        status="delivered",
+        created_at=created_at,
+        delivered_at=created_at + timedelta(minutes=30),
+    )
+
+
+def simulate(orders: InMemoryOrderRepository, args, rng: random.Random) -> List[int]:
+    """Run the week, printing a line per day; returns some archived IDs"""
+    tracemalloc.start()
+    baseline = tracemalloc.get_traced_memory()[0]
+    for hour in range(args.days * 24):
+        now = START + timedelta(hours=hour)
+        orders.add_orders([
+            make_order(rng, now + timedelta(seconds=second))
+            for second in sorted(rng.randrange(3600) for _ in range(args.orders_per_hour))
+        ])
+        orders.archive_delivered(now + timedelta(hours=1))
+        if (hour + 1) % 24 == 0:
+            heap = (tracemalloc.get_traced_memory()[0] - baseline) / 2 ** 20
+            print(f"  day {(hour + 1) // 24}: {len(orders.orders):>9,} orders in memory, "
+                  f"{orders.count_archived_orders():>9,} archived, heap {heap:8.1f} MiB")
+    tracemalloc.stop()
+    return [order_id for order_id in range(1, 1000, 7) if order_id not in orders.orders]
+
+
+def percentiles(function, runs: int) -> str:
+    latencies = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        function()
+        latencies.append(time.perf_counter() - start)
+    latencies.sort()
+    return f"p50 {latencies[len(latencies) // 2] * 1e6:8.1f} us, p99 {latencies[int(len(latencies) * 0.99)] * 1e6:8.1f} us"
+
+
+def run(label: str, archive: Optional[OrderArchive], args) -> None:
+    print(label)
+    orders = InMemoryOrderRepository(archive=archive, archive_after=ARCHIVE_AFTER)
+    archived_ids = simulate(orders, args, random.Random(0))
+    end = START + timedelta(days=args.days)
+    print("  last 15 minutes   ", percentiles(lambda: orders.list_orders_by_time(end - timedelta(minutes=15)), 200))
+    print("  one hour, 100 max ", percentiles(
+        lambda: orders.list_orders_by_time(end - timedelta(hours=3), end - timedelta(hours=2), limit=100), 200))
+    if archived_ids:
+        ids = iter(archived_ids * 10)
+        print("  archived by ID    ", percentiles(lambda: orders.get_order(next(ids)), len(archived_ids) * 10))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--orders-per-hour", type=int, default=1000)
+    parser.add_argument("--days", type=int, default=7)
+    args = parser.parse_args()
+
+    print(f"{args.orders_per_hour:,} orders/hour for {args.days} days, archived {ARCHIVE_AFTER / 3600:g} h after delivery")
+    run("everything in memory", None, args)
+    with tempfile.TemporaryDirectory() as tmp:
+        archive = OrderArchive(tmp)
+        run("with the archive", archive, args)
+        archive.close()
+
+
+if __name__ == "__main__":
+    main()
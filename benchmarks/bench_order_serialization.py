@@ -0,0 +1,150 @@
+"""Per-request latency and allocation of the order endpoints' serialization.
+
+Run with: python -m benchmarks.bench_order_serialization [--requests 1000]
+
+Part 1 compares serializing one stored order the old way (copy into
+OrderResponse models, re-validate against the response model, dump and
+json.dumps) with the direct dict + orjson path, after checking that both
+produce the same JSON. Part 2 drives
+POST /orders/, GET /orders/{id} and PUT /orders/{id}/status through the ASGI
+app and reports median latency and bytes allocated per request.
+"""
+import argparse
+import asyncio
+import json
+import statistics
+import time
+import tracemalloc
+from datetime import datetime, timezone
+from decimal import Decimal
+import httpx
+from app.api.serialization import dumps, order_to_dict
+from app.database import connection
+from app.main import app
+from app.models.order import Customer, Order, OrderItem
+from app.schemas.order import CustomerResponse, OrderItemResponse, OrderResponse
+
+ORDER = {
+    "customer": {"name": "Alice Smith", "phone": "5551234567", "address": "123 Oak Street"},
+    "items": [{"menu_item_id": 1, "quantity": 2}, {"menu_item_id": 2, "quantity": 1}],
+}
+
+
+def legacy_serialize(order: Order) -> bytes:
+    response = OrderResponse(
+        id=order.id,
+        customer=CustomerResponse(
+            name=order.customer.name, phone=order.customer.phone, address=order.customer.address
+        ),
+        items=[
+            OrderItemResponse(
+                menu_item_id=item.menu_item_id,
+                menu_item_name=item.menu_item_name,
+                quantity=item.quantity,
+                unit_price=item.unit_price,
+                item_total=item.item_total
+            ) for item in order.items
+        ],
+        status=order.status,
+        items_total=order.items_total,
+        total_items_count=order.total_items_count,
+        version=order.version,
+        menu_version=order.menu_version,
+        created_at=order.created_at,
+        confirmed_at=order.confirmed_at,
+        ready_at=order.ready_at,
+        delivered_at=order.delivered_at
+    )
+    # What FastAPI does with a response_model: validate, dump, json.dumps
+    content = OrderResponse.model_validate(response).model_dump(mode="json")
+    return json.dumps(content, separators=(",", ":")).encode()
+
+
+def fast_serialize(order: Order) -> bytes:
+    return dumps(order_to_dict(order))
+
+
+def allocated_bytes(call, repeat: int = 200) -> float:
+    """Average peak bytes allocated by one call"""
+    tracemalloc.start()
+    total = 0
+    for _ in range(repeat):
+        before = tracemalloc.get_traced_memory()[0]
+        tracemalloc.reset_peak()
+        call()
+        total += tracemalloc.get_traced_memory()[1] - before
+    tracemalloc.stop()
+    return total / repeat
+
+
+def time_call(call, repeat: int = 5000) -> float:
+    start = time.perf_counter()
+    for _ in range(repeat):
+        call()
+    return (time.perf_counter() - start) / repeat * 1e6
+
+
+def serializer_comparison() -> None:
+    order = Order(
+        id=1,
+        customer=Customer(name="Alice Smith", phone="5551234567", address="123 Oak Street"),
+        items=[
+            OrderItem(menu_item_id=n, menu_item_name=f"Item {n}", quantity=n, unit_price=Decimal("9.50"))
+            for n in range(1, 4)
+        ],
+        menu_version=1,
+        created_at=datetime(2024, 1, 1, 12, 0, tzinfo=timezone.utc)
+    )
+    assert json.loads(legacy_serialize(order)) == json.loads(fast_serialize(order))
+    print(f"{'serializer':<10} {'us/order':>9} {'bytes allocated':>16}")
+    for name, serialize in (("legacy", legacy_serialize), ("fast", fast_serialize)):
+        latency = time_call(lambda: serialize(order))
+        allocated = allocated_bytes(lambda: serialize(order))
+        print(f"{name:<10} {latency:>9.2f} {allocated:>16.0f}")
+
+
+async def endpoint_latencies(requests: int) -> None:
+    connection.reset_database()
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        await client.post("/menu/", json={"name": "Pizza", "category": "main_course", "price": 15.99})
+        await client.post("/menu/", json={"name": "Wings", "category": "appetizer", "price": 12.50})
+
+        async def sample(request):
+            tracemalloc.start()
+            start = time.perf_counter()
+            response = await request()
+            latency = time.perf_counter() - start
+            allocated = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+            return response, latency, allocated
+
+        results = {"POST /orders/": [], "GET /orders/{id}": [], "PUT /orders/{id}/status": []}
+        for _ in range(requests):
+            response, *stats = await sample(lambda: client.post("/orders/", json=ORDER))
+            results["POST /orders/"].append(stats)
+            order_id = response.json()["id"]
+            _, *stats = await sample(lambda: client.get(f"/orders/{order_id}"))
+            results["GET /orders/{id}"].append(stats)
+            _, *stats = await sample(lambda: client.put(f"/orders/{order_id}/status", json={"status": "confirmed"}))
+            results["PUT /orders/{id}/status"].append(stats)
+    connection.reset_database()
+
+    # tracemalloc slows everything down, so latencies are only comparable to each other
+    print(f"{'endpoint':<26} {'p50 us (traced)':>16} {'peak bytes':>11}")
+    for name, stats in results.items():
+        latencies, allocations = zip(*stats)
+        print(f"{name:<26} {statistics.median(latencies) * 1e6:>16.0f} {statistics.median(allocations):>11.0f}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=1000)
+    args = parser.parse_args()
+    serializer_comparison()
+    print()
+    asyncio.run(endpoint_latencies(args.requests))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+"""Cost of order analytics: running aggregates versus recomputing from every order.
+
+Run with: python -m benchmarks.bench_order_stats [--orders 200000] [--database-url memory://]
+
+Compares reading the running aggregates (GET /orders/stats) with what it
+replaces, a pass over every order summing items_total per status and line
+totals per item, and with the exact recompute (columnar export, then a
+NumPy reduction). Also reports what the aggregates add to
+each order write.
+"""
+import argparse
+import random
+import tempfile
+import time
+from decimal import Decimal
+from typing import Dict, Tuple
+from app.database.connection import create_storage
+from app.database.order_stats import RunningOrderStats, export_order_columns, recompute_order_stats
+from app.models.order import Customer, Order, OrderItem
+
+CUSTOMER = Customer(name="Alice Smith", phone="5551234567", address="123 Oak Street")
+
+
+def make_order(rng: random.Random) -> Order:
+    return Order(customer=CUSTOMER, items=[
+        OrderItem(
+            menu_item_id=rng.randint(1, 500),
+            menu_item_name="Dish",
+            quantity=rng.randint(1, 5),
+            unit_price=Decimal(rng.randint(300, 3000)) / 100,
+        )
+        for _ in range(rng.randint(1, 4))
+    ])
+
+
+def scan_all_orders(orders) -> Tuple[Dict[str, Decimal], Dict[int, Decimal]]:
+    """What computing the stats took before: every order, every line"""
+    by_status: Dict[str, Decimal] = {}
+    by_item: Dict[int, Decimal] = {}
+    for order in orders.get_all_orders().values():
+        by_status[order.status] = by_status.get(order.status, Decimal(0)) + order.items_total
+        for line in order.items:
+            by_item[line.menu_item_id] = by_item.get(line.menu_item_id, Decimal(0)) + line.item_total
+    return by_status, by_item
+
+
+def timed(function, *args) -> float:
+    start = time.perf_counter()
+    function(*args)
+    return time.perf_counter() - start
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--orders", type=int, default=200_000)
+    parser.add_argument("--database-url", default="memory://",
+                        help="a {tmp} in the URL is replaced with a temporary directory")
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    batch = [make_order(rng) for _ in range(args.orders)]
+    lines = sum(len(order.items) for order in batch)
+    with tempfile.TemporaryDirectory() as tmp:
+        _, orders = create_storage(args.database_url.replace("{tmp}", tmp))
+        for start in range(0, len(batch), 10_000):
+            orders.add_orders(batch[start:start + 10_000])
+        for order_id in range(1, args.orders + 1, 3):
+            orders.update_order_status(order_id, "confirmed")
+
+        print(f"{args.orders:,} orders, {lines:,} lines")
+        print(f"running aggregates      {timed(orders.get_order_stats) * 1e3:10.3f} ms")
+        print(f"scan of every order     {timed(scan_all_orders, orders) * 1e3:10.3f} ms")
+        export = timed(export_order_columns, orders)
+        columns = export_order_columns(orders)
+        vectorized = timed(recompute_order_stats, columns)
+        print(f"columnar export         {export * 1e3:10.3f} ms")
+        print(f"recompute, NumPy        {vectorized * 1e3:10.3f} ms")
+
+    stats = RunningOrderStats()
+    per_write = timed(lambda: [stats.add(order) for order in batch]) / args.orders
+    print(f"aggregates per write    {per_write * 1e6:10.3f} us")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+"""Cost of the order listing path with recomputed vs materialized totals.
+
+Run with: python -m benchmarks.bench_order_totals [--orders 10000]
+
+"recomputed" re-sums every line on each access like the old properties did;
+"materialized" reads the totals stored on the order at creation.
+"""
+import argparse
+import time
+from decimal import Decimal
+from app.api.serialization import order_summary_to_dict
+from app.models.order import Customer, Order, OrderItem
+from app.schemas.order import OrderSummaryResponse
+
+
+def make_orders(count: int):
+    customer = Customer(name="Alice Smith", phone="5551234567", address="123 Oak Street")
+    return [
+        Order(id=order_id, customer=customer, items=[
+            OrderItem(menu_item_id=n, menu_item_name=f"Item {n}", quantity=n, unit_price=Decimal("4.75"))
+            for n in range(1, 4)
+        ])
+        for order_id in range(1, count + 1)
+    ]
+
+
+def recomputed_totals(order: Order):
+    return (
+        sum(item.quantity * item.unit_price for item in order.items),
+        sum(item.quantity for item in order.items)
+    )
+
+
+def materialized_totals(order: Order):
+    return order.items_total, order.total_items_count
+
+
+def recomputed_summary(order: Order) -> OrderSummaryResponse:
+    return OrderSummaryResponse(
+        id=order.id,
+        customer_name=order.customer.name,
+        customer_phone=order.customer.phone,
+        status=order.status,
+        items_total=sum(item.quantity * item.unit_price for item in order.items),
+        total_items_count=sum(item.quantity for item in order.items)
+    )
+
+
+def measure(build, orders, rounds: int = 5) -> float:
+    """Best-of-rounds microseconds per order"""
+    best = float("inf")
+    for _ in range(rounds):
+        start = time.perf_counter()
+        for order in orders:
+            build(order)
+        best = min(best, time.perf_counter() - start)
+    return best / len(orders) * 1e6
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--orders", type=int, default=10000)
+    args = parser.parse_args()
+
+    orders = make_orders(args.orders)
+    rows = {
+        "recomputed": (
+            measure(recomputed_totals, orders), measure(recomputed_summary, orders)
+        ),
+        "materialized": (
+            measure(materialized_totals, orders), measure(order_summary_to_dict, orders)
+        ),
+    }
+    print(f"{'':<14} {'totals us/order':>16} {'summary us/order':>17}")
+    for name, (totals, summary) in rows.items():
+        print(f"{name:<14} {totals:>16.2f} {summary:>17.2f}")
+
+
+if __name__ == "__main__":
+    main()
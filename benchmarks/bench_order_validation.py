@@ -0,0 +1,87 @@
+"""CPU time per order to validate a request and build the Order, one pass versus two.
+
+Run with: python -m benchmarks.bench_order_validation [--orders 50000] [--items 3]
+
+"two-pass" is how create_order used to work: a constraint-free request schema,
+then a fully validated Customer/OrderItem/Order tree. "single-pass" is the
+current path: OrderCreate carries the constraints and build_order constructs
+the models without validating them again.
+"""
+import argparse
+import time
+from decimal import Decimal
+from typing import List
+from pydantic import BaseModel
+from app.api.endpoints.orders import build_order
+from app.database.repository import MenuSnapshot
+from app.models.food_item import FoodItem
+from app.models.order import Order, OrderItem
+from app.schemas.order import OrderCreate
+
+
+class LooseCustomer(BaseModel):
+    name: str
+    phone: str
+    address: str
+
+
+class LooseItem(BaseModel):
+    menu_item_id: int
+    quantity: int
+
+
+class LooseOrderCreate(BaseModel):
+    customer: LooseCustomer
+    items: List[LooseItem]
+
+
+def two_pass(payload: dict, menu: dict) -> Order:
+    order_data = LooseOrderCreate.model_validate(payload)
+    items = [
+        OrderItem(
+            menu_item_id=item.menu_item_id,
+            menu_item_name=menu[item.menu_item_id].name,
+            quantity=item.quantity,
+            unit_price=menu[item.menu_item_id].price,
+        )
+        for item in order_data.items
+    ]
+    return Order(customer=order_data.customer.model_dump(), items=items)
+
+
+def single_pass(payload: dict, menu: dict) -> Order:
+    return build_order(OrderCreate.model_validate(payload), MenuSnapshot(1, menu))
+
+
+def cpu_per_order(build, payload: dict, menu: dict, orders: int) -> float:
+    start = time.process_time()
+    for _ in range(orders):
+        build(payload, menu)
+    return (time.process_time() - start) / orders
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--orders", type=int, default=50_000)
+    parser.add_argument("--items", type=int, default=3)
+    args = parser.parse_args()
+
+    menu = {
+        item_id: FoodItem(id=item_id, name=f"Dish {item_id}", category="main_course", price=Decimal("9.99"))
+        for item_id in range(1, args.items + 1)
+    }
+    payload = {
+        "customer": {"name": "Alice Smith", "phone": "5551234567", "address": "123 Oak Street"},
+        "items": [{"menu_item_id": item_id, "quantity": 2} for item_id in menu],
+    }
+    assert single_pass(payload, menu).items_total == two_pass(payload, menu).items_total
+
+    before = cpu_per_order(two_pass, payload, menu, args.orders)
+    after = cpu_per_order(single_pass, payload, menu, args.orders)
+    print(f"{args.items} line items per order")
+    print(f"two-pass     {before * 1e6:6.2f} us CPU/order")
+    print(f"single-pass  {after * 1e6:6.2f} us CPU/order  ({1 - after / before:.0%} less)")
+
+
+if __name__ == "__main__":
+    main()
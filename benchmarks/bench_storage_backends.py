@@ -0,0 +1,66 @@
+"""Throughput of POST /orders/ and GET /orders/{id} per storage backend.
+
+Run with: python -m benchmarks.bench_storage_backends [--requests 2000]
+
+Requests go through the ASGI app in process, so the numbers compare storage
+cost on top of the same routing and validation work.
+"""
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+import httpx
+from app.database import connection
+from app.main import app
+
+ORDER = {
+    "customer": {"name": "Alice Smith", "phone": "5551234567", "address": "123 Oak Street"},
+    "items": [{"menu_item_id": 1, "quantity": 2}, {"menu_item_id": 2, "quantity": 1}],
+}
+MENU = [
+    {"name": "Margherita Pizza", "category": "main_course", "price": 15.99},
+    {"name": "Chicken Wings", "category": "appetizer", "price": 12.50},
+]
+
+
+async def measure(database_url: str, requests: int) -> dict:
+    connection.configure_storage(database_url)
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        for item in MENU:
+            await client.post("/menu/", json=item)
+
+        start = time.perf_counter()
+        ids = []
+        for _ in range(requests):
+            response = await client.post("/orders/", json=ORDER)
+            ids.append(response.json()["id"])
+        create_rate = requests / (time.perf_counter() - start)
+
+        start = time.perf_counter()
+        for order_id in ids:
+            await client.get(f"/orders/{order_id}")
+        get_rate = requests / (time.perf_counter() - start)
+    return {"create": create_rate, "get": get_rate}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=2000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        backends = {
+            "memory": "memory://",
+            "sqlite (file, WAL)": f"sqlite:///{os.path.join(tmp, 'bench.db')}",
+        }
+        print(f"{'backend':<20} {'POST /orders/ req/s':>20} {'GET /orders/{id} req/s':>23}")
+        for name, url in backends.items():
+            rates = asyncio.run(measure(url, args.requests))
+            print(f"{name:<20} {rates['create']:>20.0f} {rates['get']:>23.0f}")
+    connection.configure_storage("memory://")
+
+
+if __name__ == "__main__":
+    main()
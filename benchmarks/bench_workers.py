@@ -0,0 +1,111 @@
+"""Requests per second against uvicorn with 1, 2, 4, ... worker processes.
+
+Run with: python -m benchmarks.bench_workers [--workers 1 2 4 8] [--clients 16] [--seconds 5]
+
+Every run starts the app with `app.main.run(workers=N)` on a shared SQLite file
+and drives it from `--clients` load-generator processes over real HTTP, mixing
+order creation with order and menu reads. Workers only add throughput while
+there are idle cores; on a single core the numbers stay flat.
+"""
+import argparse
+import multiprocessing
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+import httpx
+
+ORDER = {
+    "customer": {"name": "Alice Smith", "phone": "5551234567", "address": "123 Oak Street"},
+    "items": [{"menu_item_id": 1, "quantity": 2}, {"menu_item_id": 2, "quantity": 1}],
+}
+MENU = [
+    {"name": "Margherita Pizza", "category": "main_course", "price": 15.99},
+    {"name": "Chicken Wings", "category": "appetizer", "price": 12.50},
+]
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def start_server(workers: int, database_path: str, port: int) -> subprocess.Popen:
+    env = dict(os.environ, DATABASE_URL=f"sqlite:///{database_path}")
+    server = subprocess.Popen(
+        [sys.executable, "-c", f"from app.main import run; run({workers}, '127.0.0.1', {port})"],
+        env=env,
+    )
+    deadline = time.time() + 30
+    while time.time() < deadline:
+        try:
+            httpx.get(f"http://127.0.0.1:{port}/")
+            # The first worker answers while the others may still be importing
+            time.sleep(1 + workers / 2)
+            return server
+        except httpx.TransportError:
+            time.sleep(0.1)
+    server.kill()
+    raise RuntimeError("uvicorn did not start")
+
+
+def client(base_url: str, seconds: float, start_at: float, results) -> None:
+    """Create an order, then read it and the menu, until time runs out"""
+    requests = 0
+    with httpx.Client(base_url=base_url) as http:
+        while time.time() < start_at:
+            time.sleep(0.001)
+        while time.time() < start_at + seconds:
+            order_id = http.post("/orders/", json=ORDER).json()["id"]
+            http.get(f"/orders/{order_id}")
+            http.get("/menu/")
+            requests += 3
+    results.put(requests)
+
+
+def measure(workers: int, clients: int, seconds: float) -> float:
+    with tempfile.TemporaryDirectory() as tmp:
+        port = free_port()
+        server = start_server(workers, os.path.join(tmp, "bench.db"), port)
+        base_url = f"http://127.0.0.1:{port}"
+        try:
+            for item in MENU:
+                httpx.post(f"{base_url}/menu/", json=item)
+            results = multiprocessing.Queue()
+            start_at = time.time() + 1
+            processes = [
+                multiprocessing.Process(target=client, args=(base_url, seconds, start_at, results))
+                for _ in range(clients)
+            ]
+            for process in processes:
+                process.start()
+            total = sum(results.get() for _ in processes)
+            for process in processes:
+                process.join()
+        finally:
+            server.terminate()
+            server.wait()
+    return total / seconds
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, 8])
+    parser.add_argument("--clients", type=int, default=16)
+    parser.add_argument("--seconds", type=float, default=5.0)
+    args = parser.parse_args()
+
+    print(f"cores: {os.cpu_count()}")
+    print(f"{'workers':>8} {'req/s':>10} {'vs 1 worker':>12}")
+    baseline = None
+    for workers in args.workers:
+        rate = measure(workers, args.clients, args.seconds)
+        baseline = baseline or rate
+        print(f"{workers:>8} {rate:>10.0f} {rate / baseline:>11.2f}x")
+
+
+if __name__ == "__main__":
+    main()
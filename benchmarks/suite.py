@@ -0,0 +1,281 @@
+"""Latency and throughput of every endpoint and storage function at scaled data sizes.
+
+Run with: python -m benchmarks.suite [--sizes 10,1000,100000,1000000] [--ops 500]
+                                     [--database-url memory://] [--output results.json]
+                                     [--compare baseline.json] [--tolerance 0.25]
+
+For each size the storage is filled with that many menu items and orders,
+then every case runs `--ops` times: HTTP cases go through the ASGI app in
+process (httpx ASGI transport), storage cases call the app.database.connection
+functions directly. Cases that return the whole menu or order book run only
+`--scan-ops` times. Each case reports ops/s and p50/p99 latency.
+
+`--output` writes the results as JSON; store one as a baseline and pass it
+to `--compare` to list every case whose p50 latency or throughput got worse
+by more than `--tolerance`. The exit status is 1 when something regressed.
+A `{tmp}` in `--database-url` is replaced with a fresh directory per size,
+e.g. sqlite:///{tmp}/bench.db or journal:///{tmp}/journal.
+"""
+import argparse
+import asyncio
+import inspect
+import json
+import platform
+import random
+import sys
+import tempfile
+import time
+from decimal import Decimal
+from typing import Any, Callable, Dict, List, Tuple
+import httpx
+from app.database import connection
+from app.main import app
+from app.models.food_item import FoodItem
+from app.models.order import Customer, Order, OrderItem
+
+CATEGORIES = [f"category_{n}" for n in range(100)]
+# A category of a few items on top of the preloaded menu, priced above every
+# other item, for price-sorted listings that must not walk the whole price index
+SMALL_CATEGORY = "dessert"
+SMALL_CATEGORY_ITEMS = 3
+CUSTOMER = {"name": "Alice Smith", "phone": "5551234567", "address": "123 Oak Street"}
+PRELOAD_CHUNK = 10_000
+
+
+def make_item(n: int) -> FoodItem:
+    return FoodItem(
+        name=f"Dish {n}",
+        description="Benchmark dish",
+        category=CATEGORIES[n % len(CATEGORIES)],
+        price=Decimal(5 + n % 40) + Decimal("0.99"),
+        is_vegetarian=n % 3 == 0,
+        is_spicy=n % 5 == 0,
+    )
+
+
+def make_order(menu_item_id: int) -> Order:
+    return Order(
+        customer=Customer(**CUSTOMER),
+        items=[OrderItem(menu_item_id=menu_item_id, menu_item_name="Dish", quantity=2, unit_price=Decimal("9.99"))],
+    )
+
+
+def order_request(menu_item_id: int) -> Dict[str, Any]:
+    return {"customer": CUSTOMER, "items": [{"menu_item_id": menu_item_id, "quantity": 2}]}
+
+
+def preload(size: int) -> None:
+    """Fill the active storage with `size` menu items (plus the small category) and `size` orders"""
+    for n in range(size):
+        connection.add_item(make_item(n))
+    for n in range(SMALL_CATEGORY_ITEMS):
+        connection.add_item(FoodItem(name=f"Cake {n}", category=SMALL_CATEGORY, price=Decimal("99.99")))
+    for first in range(0, size, PRELOAD_CHUNK):
+        connection.add_orders([make_order(1 + n % size) for n in range(first, min(first + PRELOAD_CHUNK, size))])
+
+
+def percentile(sorted_values: List[int], fraction: float) -> int:
+    return sorted_values[min(len(sorted_values) - 1, int(fraction * len(sorted_values)))]
+
+
+async def run_case(operation: Callable[[int], Any], ops: int) -> Dict[str, float]:
+    """Call operation(0..ops-1), awaiting it when it is async, and time each call"""
+    latencies = []
+    started = time.perf_counter_ns()
+    for i in range(ops):
+        start = time.perf_counter_ns()
+        result = operation(i)
+        if inspect.isawaitable(result):
+            result = await result
+        latencies.append(time.perf_counter_ns() - start)
+        if isinstance(result, httpx.Response) and result.is_error:
+            raise RuntimeError(f"{result.request.method} {result.request.url} returned {result.status_code}")
+    elapsed = (time.perf_counter_ns() - started) / 1e9
+    latencies.sort()
+    return {
+        "ops": ops,
+        "ops_per_sec": ops / elapsed,
+        "p50_us": percentile(latencies, 0.50) / 1e3,
+        "p99_us": percentile(latencies, 0.99) / 1e3,
+    }
+
+
+def cases(client: httpx.AsyncClient, size: int, rng: random.Random) -> List[Tuple[str, str, bool, Callable]]:
+    """(kind, name, scans everything, operation) for every benchmarked call, in run order.
+
+    Mutating cases come after the reads they could disturb, and the orders
+    and items they work on are created by earlier cases, so every size gets
+    the same amount of work.
+    """
+    created_orders: List[int] = []
+    created_items: List[int] = []
+    stored_orders: List[int] = []
+    stored_items: List[int] = []
+
+    def random_id() -> int:
+        return rng.randint(1, size)
+
+    async def create_order(i):
+        response = await client.post("/orders/", json=order_request(random_id()))
+        created_orders.append(response.json()["id"])
+        return response
+
+    async def create_item(i):
+        response = await client.post("/menu/", json={"name": f"New dish {i}", "category": "specials", "price": 9.99})
+        created_items.append(response.json()["id"])
+        return response
+
+    def add_item(i):
+        stored_items.append(connection.add_item(make_item(i)).id)
+
+    def add_order(i):
+        stored_orders.append(connection.add_order(make_order(random_id())).id)
+
+    def update_order(i):
+        order_id = stored_orders[i]
+        return connection.update_order(order_id, make_order(random_id()))
+
+    http = [
+        ("POST /orders/", False, create_order),
+        ("POST /orders/batch (10 orders)", False,
+         lambda i: client.post("/orders/batch", json={"orders": [order_request(random_id()) for _ in range(10)]})),
+        ("GET /orders/ (page of 100)", False, lambda i: client.get("/orders/", params={"after": random_id()})),
+        ("GET /orders/?status=pending", False,
+         lambda i: client.get("/orders/", params={"status": "pending", "after": random_id()})),
+        ("GET /orders/{id}", False, lambda i: client.get(f"/orders/{random_id()}")),
+        ("GET /orders/stats?limit=10", False, lambda i: client.get("/orders/stats", params={"limit": 10})),
+        ("GET /orders/timeline?minutes=5", False, lambda i: client.get("/orders/timeline", params={"minutes": 5})),
+        ("PUT /orders/{id}/status", False,
+         lambda i: client.put(f"/orders/{created_orders[i]}/status", json={"status": "confirmed"})),
+        ("GET /menu/", True, lambda i: client.get("/menu/")),
+        ("GET /menu/?filters&limit=50", False, lambda i: client.get("/menu/", params={
+            "category": rng.choice(CATEGORIES), "max_price": 20, "is_vegetarian": True, "limit": 50
+        })),
+        (f"GET /menu/?category={SMALL_CATEGORY}&sort=price&limit=5", False, lambda i: client.get("/menu/", params={
+            "category": SMALL_CATEGORY, "sort": "price", "limit": 5
+        })),
+        ("GET /menu/category/{category}", True, lambda i: client.get(f"/menu/category/{rng.choice(CATEGORIES)}")),
+        ("GET /menu/{id}", False, lambda i: client.get(f"/menu/{random_id()}")),
+        ("GET /menu/search?q=", False, lambda i: client.get("/menu/search", params={"q": f"dish {random_id()}"})),
+        ("POST /menu/", False, create_item),
+        ("PUT /menu/{id}", False, lambda i: client.put(f"/menu/{created_items[i]}", json={"price": 10.99})),
+        ("DELETE /menu/{id}", False, lambda i: client.delete(f"/menu/{created_items[i]}")),
+    ]
+    storage = [
+        ("add_item", False, add_item),
+        ("get_item", False, lambda i: connection.get_item(random_id())),
+        ("get_items (10 IDs)", False, lambda i: connection.get_items([random_id() for _ in range(10)])),
+        ("get_menu_snapshot (10 IDs)", False,
+         lambda i: connection.get_menu_snapshot([random_id() for _ in range(10)])),
+        ("get_all_items", True, lambda i: connection.get_all_items()),
+        ("search_items", False, lambda i: connection.search_items(f"dish {random_id()}", 20)),
+        ("get_items_by_category", True, lambda i: connection.get_items_by_category(rng.choice(CATEGORIES))),
+        ("update_item", False, lambda i: connection.update_item(stored_items[i], make_item(i))),
+        ("delete_item", False, lambda i: connection.delete_item(stored_items[i])),
+        ("add_order", False, add_order),
+        ("add_orders (10 orders)", False, lambda i: connection.add_orders([make_order(random_id()) for _ in range(10)])),
+        ("get_order", False, lambda i: connection.get_order(random_id())),
+        ("get_all_orders", True, lambda i: connection.get_all_orders()),
+        ("list_orders_by_time (100)", False, lambda i: connection.list_orders_by_time(limit=100)),
+        ("update_order", False, update_order),
+        ("update_order_status", False, lambda i: connection.update_order_status(stored_orders[i], "confirmed")),
+    ]
+    return [("http", *case) for case in http] + [("storage", *case) for case in storage]
+
+
+async def run_size(database_url: str, size: int, ops: int, scan_ops: int, seed: int) -> List[Dict[str, Any]]:
+    connection.configure_storage(database_url)
+    preload(size)
+    results = []
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        for kind, name, scans, operation in cases(client, size, random.Random(seed)):
+            stats = await run_case(operation, min(ops, scan_ops) if scans else ops)
+            results.append({"kind": kind, "name": name, "size": size, **stats})
+            print(
+                f"{size:>9,} {kind:<8} {name:<32} {stats['ops_per_sec']:>11,.0f} "
+                f"{stats['p50_us']:>10,.1f} {stats['p99_us']:>10,.1f}",
+                file=sys.stderr,
+            )
+    return results
+
+
+def result_key(result: Dict[str, Any]) -> Tuple[str, str, int]:
+    return result["kind"], result["name"], result["size"]
+
+
+def compare(baseline: Dict[str, Any], current: Dict[str, Any], tolerance: float) -> List[str]:
+    """Describe every case that is slower than in the baseline by more than `tolerance`"""
+    previous = {result_key(result): result for result in baseline["results"]}
+    regressions = []
+    for result in current["results"]:
+        before = previous.get(result_key(result))
+        if before is None:
+            continue
+        p50_change = result["p50_us"] / before["p50_us"] - 1
+        rate_change = result["ops_per_sec"] / before["ops_per_sec"] - 1
+        if p50_change > tolerance or rate_change < -tolerance:
+            regressions.append(
+                f"{result['size']:>9,} {result['kind']:<8} {result['name']:<32} "
+                f"p50 {before['p50_us']:,.1f} -> {result['p50_us']:,.1f} us ({p50_change:+.0%}), "
+                f"{before['ops_per_sec']:,.0f} -> {result['ops_per_sec']:,.0f} ops/s ({rate_change:+.0%})"
+            )
+    return regressions
+
+
+def run(database_url: str, sizes: List[int], ops: int, scan_ops: int, seed: int) -> Dict[str, Any]:
+    results = []
+    print(f"{'size':>9} {'kind':<8} {'case':<32} {'ops/s':>11} {'p50 us':>10} {'p99 us':>10}", file=sys.stderr)
+    for size in sizes:
+        with tempfile.TemporaryDirectory() as tmp:
+            results += asyncio.run(run_size(database_url.replace("{tmp}", tmp), size, ops, scan_ops, seed))
+            # Release files in tmp before it is removed
+            connection.configure_storage("memory://")
+    return {
+        "database_url": database_url,
+        "ops": ops,
+        "scan_ops": scan_ops,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "results": results,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", default="10,1000,100000,1000000",
+                        help="comma-separated numbers of preloaded menu items and orders")
+    parser.add_argument("--ops", type=int, default=500, help="calls per case")
+    parser.add_argument("--scan-ops", type=int, default=20, help="calls per case returning everything")
+    parser.add_argument("--database-url", default="memory://")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="write the results as JSON to this file ('-' for stdout)")
+    parser.add_argument("--compare", metavar="BASELINE", help="results JSON to check for regressions")
+    parser.add_argument("--tolerance", type=float, default=0.25,
+                        help="allowed relative slowdown of p50 latency and throughput")
+    args = parser.parse_args()
+
+    sizes = [int(size) for size in args.sizes.split(",")]
+    report = run(args.database_url, sizes, args.ops, args.scan_ops, args.seed)
+
+    if args.output == "-":
+        json.dump(report, sys.stdout, indent=2)
+        print()
+    elif args.output:
+        with open(args.output, "w") as output:
+            json.dump(report, output, indent=2)
+
+    if args.compare:
+        with open(args.compare) as baseline_file:
+            regressions = compare(json.load(baseline_file), report, args.tolerance)
+        if regressions:
+            print(f"{len(regressions)} regression(s) beyond {args.tolerance:.0%}:", file=sys.stderr)
+            for line in regressions:
+                print(line, file=sys.stderr)
+            sys.exit(1)
+        print(f"No regressions beyond {args.tolerance:.0%} against {args.compare}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
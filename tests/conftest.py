@@ -0,0 +1,6 @@
+import os
+
+# Verify materialized order totals on every read while testing
+os.environ.setdefault("CHECK_ORDER_TOTALS", "true")
+# Tests start from empty in-memory storage instead of the default SQLite file
+os.environ.setdefault("DATABASE_URL", "memory://")
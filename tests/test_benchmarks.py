@@ -0,0 +1,42 @@
+import os
+import subprocess
+import sys
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Every benchmark at a size that only checks it still runs (each one checks
+# its own results before timing), so a change that breaks one fails here
+SMOKE_RUNS = [
+    ["bench_batch_orders", "--orders", "20", "--batch-size", "5"],
+    ["bench_id_allocation", "--max-orders", "1000"],
+    ["bench_idempotency", "--requests", "20"],
+    ["bench_journal_replay", "--orders", "200", "--writers", "2", "--commits", "20"],
+    ["bench_menu_search", "--items", "200", "--repeat", "1"],
+    ["bench_metrics", "--requests", "200"],
+    ["bench_money", "--orders", "200"],
+    ["bench_order_memory", "--sizes", "200"],
+    ["bench_order_retention", "--orders-per-hour", "20", "--days", "1"],
+    ["bench_order_serialization", "--requests", "5"],
+    ["bench_order_stats", "--orders", "200"],
+    ["bench_order_totals", "--orders", "200"],
+    ["bench_order_validation", "--orders", "200"],
+    ["bench_storage_backends", "--requests", "20"],
+    ["bench_workers", "--workers", "1", "--clients", "2", "--seconds", "0.5"],
+    ["suite", "--sizes", "10", "--ops", "5", "--scan-ops", "2"],
+]
+
+
+@pytest.mark.parametrize("args", SMOKE_RUNS, ids=lambda args: args[0])
+def test_benchmark_runs(args):
+    result = subprocess.run(
+        [sys.executable, "-m", f"benchmarks.{args[0]}", *args[1:]],
+        cwd=ROOT, capture_output=True, text=True, timeout=300,
+    )
+    assert result.returncode == 0, result.stderr
+
+
+def test_every_benchmark_is_run():
+    modules = {name[:-3] for name in os.listdir(os.path.join(ROOT, "benchmarks"))
+               if name.endswith(".py") and name != "__init__.py"}
+    assert modules == {args[0] for args in SMOKE_RUNS}
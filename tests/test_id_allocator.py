@@ -0,0 +1,73 @@
+import threading
+import pytest
+from app.database.id_allocator import (
+    SequentialIdAllocator, TimeOrderedIdAllocator, create_id_allocator
+)
+
+
+def allocate_concurrently(allocator, threads=8, per_thread=2000):
+    """Allocate IDs from several threads at once and collect them all"""
+    results = []
+    barrier = threading.Barrier(threads)
+
+    def worker():
+        barrier.wait()
+        ids = [allocator.allocate() for _ in range(per_thread)]
+        results.extend(ids)
+
+    pool = [threading.Thread(target=worker) for _ in range(threads)]
+    for thread in pool:
+        thread.start()
+    for thread in pool:
+        thread.join()
+    return results
+
+
+def test_sequential_ids_increase():
+    """Test that sequential IDs start at 1 and increase by one"""
+    allocator = SequentialIdAllocator()
+    assert [allocator.allocate() for _ in range(3)] == [1, 2, 3]
+
+
+def test_sequential_observe_skips_used_ids():
+    """Test that explicitly assigned IDs are never handed out again"""
+    allocator = SequentialIdAllocator()
+    allocator.observe(10)
+    assert allocator.allocate() == 11
+    allocator.observe(5)
+    assert allocator.allocate() == 12
+
+
+def test_sequential_concurrent_allocation_is_unique():
+    """Test that concurrent requests never receive the same ID"""
+    ids = allocate_concurrently(SequentialIdAllocator())
+    assert len(ids) == len(set(ids)) == 16000
+
+
+def test_time_ordered_ids_are_unique_and_increasing():
+    """Test that time-ordered IDs keep increasing within one worker"""
+    allocator = TimeOrderedIdAllocator(worker_id=3)
+    ids = [allocator.allocate() for _ in range(5000)]
+    assert ids == sorted(ids)
+    assert len(set(ids)) == len(ids)
+    assert all(i < 2 ** 53 for i in ids)
+
+
+def test_time_ordered_ids_do_not_collide_across_workers():
+    """Test that two workers allocating at the same time get disjoint IDs"""
+    first = TimeOrderedIdAllocator(worker_id=0)
+    second = TimeOrderedIdAllocator(worker_id=1)
+    ids = allocate_concurrently(first, threads=4) + allocate_concurrently(second, threads=4)
+    assert len(ids) == len(set(ids))
+
+
+def test_time_ordered_rejects_invalid_worker_id():
+    """Test that worker IDs outside the reserved bits are rejected"""
+    with pytest.raises(ValueError):
+        TimeOrderedIdAllocator(worker_id=TimeOrderedIdAllocator.MAX_WORKERS)
+
+
+def test_unknown_allocator_mode():
+    """Test that an unknown allocator mode is rejected"""
+    with pytest.raises(ValueError):
+        create_id_allocator("random")
@@ -0,0 +1,258 @@
+import asyncio
+import hashlib
+import threading
+import pytest
+from fastapi import HTTPException
+from fastapi.responses import Response
+from fastapi.testclient import TestClient
+from app.main import app
+from app.api.idempotency import IdempotencyCache, idempotency_cache
+from app.database import connection
+from app.database.connection import reset_database
+from app.database.repository import IdempotentResponse
+from app.database.sqlite import SQLiteConnectionPool, SQLiteMenuRepository, SQLiteOrderRepository
+
+client = TestClient(app)
+
+CUSTOMER = {"name": "Alice Smith", "phone": "5551234567", "address": "123 Oak Street"}
+
+
+@pytest.fixture(autouse=True)
+def clear_state():
+    reset_database()
+    idempotency_cache.reset()
+    yield
+    reset_database()
+    idempotency_cache.reset()
+
+
+@pytest.fixture
+def menu_item():
+    return client.post("/menu/", json={"name": "Pizza", "category": "main_course", "price": 9.99}).json()
+
+
+def order(item, quantity=2):
+    return {"customer": CUSTOMER, "items": [{"menu_item_id": item["id"], "quantity": quantity}]}
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def test_retry_replays_the_first_response(menu_item):
+    """Test that a retried POST /orders/ returns the first response without creating another order"""
+    headers = {"Idempotency-Key": "order-1"}
+    first = client.post("/orders/", json=order(menu_item), headers=headers)
+    retry = client.post("/orders/", json=order(menu_item), headers=headers)
+    assert first.status_code == retry.status_code == 201
+    assert retry.content == first.content
+    assert retry.headers["etag"] == first.headers["etag"]
+    assert retry.headers["idempotent-replayed"] == "true"
+    assert len(client.get("/orders/").json()["orders"]) == 1
+
+    other = client.post("/orders/", json=order(menu_item), headers={"Idempotency-Key": "order-2"})
+    assert other.json()["id"] != first.json()["id"]
+    assert len(client.get("/orders/").json()["orders"]) == 2
+
+
+def test_replay_skips_validation_and_storage(menu_item):
+    """Test that a replay is answered before the body is validated or the order stored"""
+    headers = {"Idempotency-Key": "order-1"}
+    first = client.post("/orders/", json=order(menu_item), headers=headers)
+    client.delete(f"/menu/{menu_item['id']}")
+    retry = client.post("/orders/", json=order(menu_item), headers=headers)
+    assert retry.status_code == 201
+    assert retry.content == first.content
+    assert idempotency_cache.hits == 1
+
+
+def test_key_reused_with_another_body_is_rejected(menu_item):
+    headers = {"Idempotency-Key": "order-1"}
+    client.post("/orders/", json=order(menu_item), headers=headers)
+    response = client.post("/orders/", json=order(menu_item, quantity=3), headers=headers)
+    assert response.status_code == 422
+    assert len(client.get("/orders/").json()["orders"]) == 1
+
+
+def test_errors_are_not_stored(menu_item):
+    """Test that a failed request is run again when retried with its key"""
+    headers = {"Idempotency-Key": "order-1"}
+    client.put(f"/menu/{menu_item['id']}", json={"is_available": False})
+    assert client.post("/orders/", json=order(menu_item), headers=headers).status_code == 400
+    client.put(f"/menu/{menu_item['id']}", json={"is_available": True})
+    assert client.post("/orders/", json=order(menu_item), headers=headers).status_code == 201
+    assert (idempotency_cache.hits, idempotency_cache.misses) == (0, 2)
+
+
+@pytest.mark.parametrize("key", ["", "k" * 256])
+def test_invalid_keys_are_rejected(menu_item, key):
+    response = client.post("/orders/", json=order(menu_item), headers={"Idempotency-Key": key})
+    assert response.status_code == 400
+    assert client.get("/orders/").json()["orders"] == []
+
+
+def test_cache_counts_are_exported(menu_item):
+    client.post("/orders/", json=order(menu_item), headers={"Idempotency-Key": "order-1"})
+    client.post("/orders/", json=order(menu_item), headers={"Idempotency-Key": "order-1"})
+    metrics = client.get("/metrics").text
+    assert 'idempotency_cache_requests{result="hit"} 1' in metrics
+    assert 'idempotency_cache_requests{result="miss"} 1' in metrics
+    assert "idempotency_cache_entries 1" in metrics
+
+
+def run(cache, key, body=b"{}", status_code=201, store=None, calls=None):
+    async def call():
+        if calls is not None:
+            calls.append(key)
+        return Response(content=body, status_code=status_code)
+    return asyncio.run(cache.run(key, body, call, store))
+
+
+def test_least_recently_used_entries_are_evicted():
+    cache = IdempotencyCache(capacity=2, ttl=60)
+    run(cache, "a")
+    run(cache, "b")
+    run(cache, "a")  # Hit: "b" is now least recently used
+    run(cache, "c")
+    assert (cache.hits, cache.misses, cache.evictions, len(cache)) == (1, 3, 1, 2)
+    run(cache, "b")
+    assert cache.misses == 4
+
+
+def test_entries_expire_after_ttl():
+    clock = FakeClock()
+    cache = IdempotencyCache(capacity=10, ttl=60, clock=clock)
+    run(cache, "a")
+    clock.now = 59
+    run(cache, "a")
+    assert cache.hits == 1
+    clock.now = 61
+    run(cache, "a")
+    run(cache, "b")
+    assert (cache.hits, cache.misses, cache.expirations) == (1, 3, 1)
+    clock.now = 200
+    run(cache, "c")  # Drops the expired entries at the least recently used end
+    assert len(cache) == 1
+
+
+def test_concurrent_requests_with_one_key_run_once():
+    """Test that requests arriving while the first one runs wait for its response"""
+    cache = IdempotencyCache(capacity=10, ttl=60)
+    calls = []
+
+    async def main():
+        release = asyncio.Event()
+
+        async def call():
+            calls.append(1)
+            await release.wait()
+            return Response(content=b'{"id":1}', status_code=201)
+
+        tasks = [asyncio.create_task(cache.run("a", b"{}", call)) for _ in range(5)]
+        await asyncio.sleep(0)
+        release.set()
+        return await asyncio.gather(*tasks)
+
+    responses = asyncio.run(main())
+    assert len(calls) == 1
+    assert [response.body for response in responses] == [b'{"id":1}'] * 5
+    assert (cache.misses, cache.coalesced) == (1, 4)
+
+
+def test_waiting_requests_share_the_error():
+    cache = IdempotencyCache(capacity=10, ttl=60)
+
+    async def main():
+        release = asyncio.Event()
+
+        async def call():
+            await release.wait()
+            raise HTTPException(status_code=404, detail="Menu item with ID 1 not found")
+
+        tasks = [asyncio.create_task(cache.run("a", b"{}", call)) for _ in range(3)]
+        await asyncio.sleep(0)
+        release.set()
+        return await asyncio.gather(*tasks, return_exceptions=True)
+
+    errors = asyncio.run(main())
+    assert all(isinstance(error, HTTPException) and error.status_code == 404 for error in errors)
+    assert (len(cache), cache.coalesced) == (0, 2)
+
+
+@pytest.fixture
+def workers(tmp_path):
+    """Order repositories of two worker processes sharing one SQLite file"""
+    path = str(tmp_path / "shared.db")
+    return SQLiteOrderRepository(SQLiteConnectionPool(path)), SQLiteOrderRepository(SQLiteConnectionPool(path))
+
+
+def test_retry_on_another_worker_is_replayed(workers):
+    first, second = workers
+    calls = []
+    created = run(IdempotencyCache(capacity=10, ttl=60), "a", store=first, calls=calls)
+    other = IdempotencyCache(capacity=10, ttl=60)
+    replayed = run(other, "a", store=second, calls=calls)
+    assert calls == ["a"]
+    assert replayed.status_code == created.status_code == 201
+    assert replayed.body == created.body
+    assert replayed.headers["idempotent-replayed"] == "true"
+    assert (other.hits, other.misses) == (1, 0)
+    with pytest.raises(HTTPException) as error:
+        run(other, "a", body=b'{"quantity": 3}', store=second)
+    assert error.value.status_code == 422
+
+
+def test_errors_are_not_stored_for_other_workers(workers):
+    first, second = workers
+    calls = []
+    run(IdempotencyCache(capacity=10, ttl=60), "a", status_code=400, store=first, calls=calls)
+    assert run(IdempotencyCache(capacity=10, ttl=60), "a", store=second, calls=calls).status_code == 201
+    assert calls == ["a", "a"]
+
+
+def test_request_waits_for_another_workers_claim(workers):
+    """Test that a retry arriving while another worker runs the first request gets its response"""
+    first, second = workers
+    fingerprint = hashlib.blake2b(b"{}", digest_size=16).digest()
+    assert first.claim_idempotency_key("a", fingerprint, lease=60) is None
+    saved = threading.Timer(0.1, first.save_idempotent_response, (
+        "a", IdempotentResponse(fingerprint, 201, [(b"etag", b'"1"')], b'{"id":1}'), 60
+    ))
+    saved.start()
+    calls = []
+    cache = IdempotencyCache(capacity=10, ttl=60, poll_interval=0.01)
+    response = run(cache, "a", store=second, calls=calls)
+    saved.join()
+    assert calls == []
+    assert (response.body, response.headers["etag"]) == (b'{"id":1}', '"1"')
+    assert (cache.coalesced, cache.hits, cache.misses) == (1, 0, 0)
+
+
+def test_lapsed_claim_of_a_dead_worker_is_taken_over(workers):
+    first, second = workers
+    fingerprint = hashlib.blake2b(b"{}", digest_size=16).digest()
+    assert first.claim_idempotency_key("a", fingerprint, lease=0) is None
+    calls = []
+    assert run(IdempotencyCache(capacity=10, ttl=60), "a", store=second, calls=calls).status_code == 201
+    assert calls == ["a"]
+
+
+def test_order_retried_on_another_worker_is_created_once(workers, monkeypatch):
+    """Test POST /orders/ against shared SQLite storage, with the retry missing the local cache"""
+    orders = workers[0]
+    monkeypatch.setattr(connection, "menu_repository", SQLiteMenuRepository(orders.pool))
+    monkeypatch.setattr(connection, "order_repository", orders)
+    monkeypatch.setattr(connection, "idempotency_store", orders)
+    item = client.post("/menu/", json={"name": "Pizza", "category": "main_course", "price": 9.99}).json()
+    headers = {"Idempotency-Key": "order-1"}
+    first = client.post("/orders/", json=order(item), headers=headers)
+    idempotency_cache.reset()  # As if the retry reached another worker
+    retry = client.post("/orders/", json=order(item), headers=headers)
+    assert first.status_code == retry.status_code == 201
+    assert retry.content == first.content
+    assert retry.headers["etag"] == first.headers["etag"]
+    assert orders.count_orders_by_status()["pending"] == 1
@@ -0,0 +1,200 @@
+import asyncio
+import os
+import threading
+import time
+from decimal import Decimal
+import httpx
+from app.database import connection
+from app.database.journal import Journal, JournaledMenuRepository, JournaledOrderRepository, parse_journal_url
+from app.models.food_item import FoodItem
+from app.main import app
+from app.models.order import Customer, Order, OrderItem, OrderStatus
+
+
+def open_storage(directory, **options):
+    journal = Journal(str(directory), **options)
+    menu, orders = JournaledMenuRepository(journal), JournaledOrderRepository(journal)
+    journal.open(menu, orders)
+    return journal, menu, orders
+
+
+def make_order(quantity=1):
+    return Order(
+        customer=Customer(name="Alice Smith", phone="5551234567", address="123 Oak Street"),
+        items=[OrderItem(menu_item_id=1, menu_item_name="Pizza", quantity=quantity, unit_price=Decimal("9.99"))]
+    )
+
+
+def make_item(name="Pizza"):
+    return FoodItem(name=name, category="main_course", price=Decimal("9.99"))
+
+
+def test_parse_journal_url():
+    """Test mapping journal URLs to directories"""
+    assert parse_journal_url("journal:///./data") == "./data"
+    assert parse_journal_url("journal:////var/lib/orders") == "/var/lib/orders"
+
+
+def test_state_survives_restart(tmp_path):
+    """Test that replaying the journal restores orders, statuses and the menu"""
+    journal, menu, orders = open_storage(tmp_path)
+    pizza = menu.add_item(make_item())
+    wings = menu.add_item(make_item("Wings"))
+    menu.delete_item(wings.id)
+    first = orders.add_order(make_order(2))
+    second = orders.add_order(make_order(3))
+    orders.update_order_status(first.id, "confirmed")
+    journal.close()
+
+    journal, menu, orders = open_storage(tmp_path)
+    assert set(menu.get_all_items()) == {pizza.id}
+    assert menu.query_items(category="main_course")[0].name == "Pizza"
+    restored = orders.get_order(first.id)
+    assert (restored.status, restored.version, restored.items_total) == ("confirmed", 2, Decimal("19.98"))
+    assert [o.id for o in orders.list_orders(status="pending")] == [second.id]
+    assert orders.add_order(make_order()).id == second.id + 1
+    journal.close()
+
+
+def test_timestamps_survive_restart(tmp_path):
+    """Test that creation and transition times come back exactly, from the log and from snapshots"""
+    journal, _, orders = open_storage(tmp_path)
+    order = orders.add_order(make_order())
+    confirmed = orders.update_order_status(order.id, "confirmed")
+    journal.close()
+
+    journal, _, orders = open_storage(tmp_path)
+    restored = orders.get_order(order.id)
+    assert (restored.created_at, restored.confirmed_at) == (order.created_at, confirmed.confirmed_at)
+    assert orders.list_orders_by_time(start=order.created_at) == [restored]
+    journal.snapshot()
+    journal.close()
+
+    journal, _, orders = open_storage(tmp_path)
+    assert orders.get_order(order.id).confirmed_at == confirmed.confirmed_at
+    journal.close()
+
+
+def test_snapshot_compacts_and_tail_is_replayed(tmp_path):
+    """Test that a snapshot replaces old segments and later records still replay"""
+    journal, menu, orders = open_storage(tmp_path, snapshot_every=None)
+    ids = [o.id for o in orders.add_orders([make_order() for _ in range(5)])]
+    orders.update_order_status(ids[0], "confirmed")
+    seq = journal.snapshot()
+    orders.update_order_status(ids[0], "ready")
+    orders.add_order(make_order())
+    journal.close()
+
+    files = sorted(os.listdir(tmp_path))
+    assert files == [f"journal-{seq:012d}.ndjson", f"snapshot-{seq:012d}.ndjson"]
+    journal, menu, orders = open_storage(tmp_path)
+    assert len(orders.get_all_orders()) == 6
+    assert (orders.get_order(ids[0]).status, orders.get_order(ids[0]).version) == ("ready", 3)
+    assert orders.count_orders_by_status() == {"pending": 5, "confirmed": 0, "ready": 1, "delivered": 0}
+    journal.close()
+
+
+def test_snapshots_are_taken_automatically(tmp_path):
+    """Test that the journal compacts itself after `snapshot_every` records"""
+    journal, menu, orders = open_storage(tmp_path, snapshot_every=10)
+    for _ in range(25):
+        orders.add_order(make_order())
+    journal._snapshot_thread.join()
+    journal.close()
+
+    assert any(name.startswith("snapshot-") for name in os.listdir(tmp_path))
+    journal, menu, orders = open_storage(tmp_path)
+    assert len(orders.get_all_orders()) == 25
+    journal.close()
+
+
+def test_deleted_ids_stay_retired_after_snapshot(tmp_path):
+    """Test that the IDs of rows deleted before a snapshot are not handed out again"""
+    journal, menu, orders = open_storage(tmp_path, snapshot_every=None)
+    menu.add_item(make_item())
+    last = menu.add_item(make_item("Wings"))
+    menu.delete_item(last.id)
+    journal.snapshot()
+    journal.close()
+
+    journal, menu, orders = open_storage(tmp_path)
+    assert menu.add_item(make_item("Soup")).id > last.id
+    journal.close()
+
+
+def test_torn_tail_is_discarded(tmp_path):
+    """Test that a half-written last record is dropped and appending continues cleanly"""
+    journal, menu, orders = open_storage(tmp_path)
+    order = orders.add_order(make_order())
+    journal.close()
+    segment = tmp_path / "journal-000000000000.ndjson"
+    with open(segment, "ab") as f:
+        f.write(b'{"op":"status","id":1,"sta')
+
+    journal, menu, orders = open_storage(tmp_path)
+    assert orders.get_order(order.id).status == OrderStatus.PENDING
+    orders.update_order_status(order.id, "confirmed")
+    journal.close()
+
+    journal, menu, orders = open_storage(tmp_path)
+    assert orders.get_order(order.id).status == OrderStatus.CONFIRMED
+    journal.close()
+
+
+def test_concurrent_writers_share_fsyncs(tmp_path, monkeypatch):
+    """Test that group commit makes one fsync cover several writers' records"""
+    fsyncs = []
+    real_fsync = os.fsync
+    monkeypatch.setattr(os, "fsync", lambda fd: (fsyncs.append(fd), real_fsync(fd)))
+    journal, menu, orders = open_storage(tmp_path)
+    barrier = threading.Barrier(8)
+
+    def writer():
+        barrier.wait()
+        for _ in range(25):
+            orders.add_order(make_order())
+
+    threads = [threading.Thread(target=writer) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    journal.close()
+
+    assert len(orders.get_all_orders()) == 200
+    assert len(fsyncs) < 200
+    journal, menu, orders = open_storage(tmp_path)
+    assert len(orders.get_all_orders()) == 200
+    journal.close()
+
+
+def test_concurrent_order_requests_share_fsyncs(tmp_path, monkeypatch):
+    """Test that POST /orders/ requests handled at once share fsyncs instead of
+    each blocking the event loop on its own"""
+    fsyncs = []
+    real_fsync = os.fsync
+
+    def slow_fsync(fd):
+        fsyncs.append(fd)
+        time.sleep(0.005)  # A disk flush takes milliseconds
+        real_fsync(fd)
+
+    journal, menu, orders = open_storage(tmp_path)
+    monkeypatch.setattr(connection, "menu_repository", menu)
+    monkeypatch.setattr(connection, "order_repository", orders)
+    pizza = menu.add_item(make_item())
+    body = {
+        "customer": {"name": "Alice Smith", "phone": "5551234567", "address": "123 Oak Street"},
+        "items": [{"menu_item_id": pizza.id, "quantity": 1}],
+    }
+    monkeypatch.setattr(os, "fsync", slow_fsync)
+
+    async def post_orders(count):
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            return await asyncio.gather(*(client.post("/orders/", json=body) for _ in range(count)))
+
+    responses = asyncio.run(post_orders(50))
+    journal.close()
+    assert [response.status_code for response in responses] == [201] * 50
+    assert len(fsyncs) < 50
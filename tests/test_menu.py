@@ -2,16 +2,16 @@ import pytest
 from fastapi.testclient import TestClient
 from decimal import Decimal
 from app.main import app
-from app.database.connection import menu_db
+from app.database.connection import reset_database
 
 client = TestClient(app)
 
 @pytest.fixture(autouse=True)
 def clear_database():
     """Clear database before each test"""
-    menu_db.clear()
+    reset_database()
     yield
-    menu_db.clear()
+    reset_database()
 
 def test_create_valid_food_item():
     """Test creating a valid food item"""
@@ -229,3 +229,87 @@ def test_read_nonexistent_food_item():
     """Test reading a non-existent food item"""
     response = client.get("/menu/999")
     assert response.status_code == 404
+
+def test_filter_sort_and_limit_menu():
+    """Test combined filters, sorting and limit on the menu listing"""
+    items = [
+        {"name": "Garden Salad", "category": "appetizer", "price": 7.50, "is_vegetarian": True},
+        {"name": "Buffalo Wings", "category": "appetizer", "price": 12.50, "is_spicy": True},
+        {"name": "Tomato Soup", "category": "appetizer", "price": 5.00, "is_vegetarian": True},
+        {"name": "Veggie Pizza", "category": "main_course", "price": 15.99, "is_vegetarian": True}
+    ]
+    for item in items:
+        client.post("/menu/", json=item)
+
+    response = client.get("/menu/", params={"category": "appetizer", "is_vegetarian": True, "sort": "price"})
+    assert response.status_code == 200
+    assert [item["name"] for item in response.json()] == ["Tomato Soup", "Garden Salad"]
+
+    response = client.get("/menu/", params={"min_price": 6, "sort": "-price", "limit": 2})
+    assert [item["name"] for item in response.json()] == ["Veggie Pizza", "Buffalo Wings"]
+
+    response = client.get("/menu/", params={"is_spicy": False, "max_price": 10})
+    assert [item["name"] for item in response.json()] == ["Garden Salad", "Tomato Soup"]
+
+def test_invalid_menu_sort():
+    """Test that unknown sort fields are rejected"""
+    response = client.get("/menu/", params={"sort": "calories"})
+    assert response.status_code == 422
+
+def test_menu_etag_and_not_modified():
+    """Test that unchanged menus answer If-None-Match with 304"""
+    client.post("/menu/", json={"name": "Garden Salad", "category": "appetizer", "price": 7.50})
+
+    first = client.get("/menu/")
+    assert first.status_code == 200
+    etag = first.headers["etag"]
+
+    cached = client.get("/menu/", headers={"If-None-Match": etag})
+    assert cached.status_code == 304
+    assert cached.headers["etag"] == etag
+    assert cached.content == b""
+
+    assert client.get("/menu/", headers={"If-None-Match": f'W/{etag}, "other"'}).status_code == 304
+
+def test_menu_cache_invalidated_by_writes():
+    """Test that create, update and delete all refresh cached menus"""
+    created = client.post("/menu/", json={"name": "Garden Salad", "category": "appetizer", "price": 7.50}).json()
+    item_id = created["id"]
+    etag = client.get("/menu/").headers["etag"]
+    item_etag = client.get(f"/menu/{item_id}").headers["etag"]
+    category_etag = client.get("/menu/category/appetizer").headers["etag"]
+
+    client.put(f"/menu/{item_id}", json={"price": 8.25})
+
+    response = client.get("/menu/", headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.headers["etag"] != etag
+    item_response = client.get(f"/menu/{item_id}", headers={"If-None-Match": item_etag})
+    assert item_response.status_code == 200
+    assert Decimal(str(item_response.json()["price"])) == Decimal("8.25")
+    assert client.get("/menu/category/appetizer", headers={"If-None-Match": category_etag}).status_code == 200
+
+    client.post("/menu/", json={"name": "Chocolate Cake", "category": "dessert", "price": 6.00})
+    assert len(client.get("/menu/").json()) == 2
+
+    client.delete(f"/menu/{item_id}")
+    assert client.get(f"/menu/{item_id}").status_code == 404
+    assert client.get("/menu/category/appetizer").json() == {}
+
+def test_search_menu():
+    """Test search-as-you-type over names and descriptions, best matches first"""
+    items = [
+        {"name": "Garlic Bread", "category": "appetizer", "price": 5.50},
+        {"name": "Margherita Pizza", "description": "With garlic oil", "category": "main_course", "price": 15.99},
+        {"name": "Crème Brûlée", "category": "dessert", "price": 7.00},
+    ]
+    ids = [client.post("/menu/", json=item).json()["id"] for item in items]
+
+    assert [item["id"] for item in client.get("/menu/search", params={"q": "GARL"}).json()] == ids[:2]
+    assert [item["id"] for item in client.get("/menu/search", params={"q": "creme bru"}).json()] == [ids[2]]
+    assert client.get("/menu/search", params={"q": "garlic steak"}).json() == []
+    assert len(client.get("/menu/search", params={"q": "garlic", "limit": 1}).json()) == 1
+    assert client.get("/menu/search").status_code == 422
+
+    client.put(f"/menu/{ids[0]}", json={"name": "Bruschetta"})
+    assert [item["id"] for item in client.get("/menu/search", params={"q": "garlic"}).json()] == [ids[1]]
@@ -0,0 +1,119 @@
+import random
+from decimal import Decimal
+import pytest
+from app.database.menu_index import MenuIndex
+from app.models.food_item import FoodItem
+from app.models.money import Money
+
+CATEGORIES = ["appetizer", "main_course", "dessert", "beverage"]
+
+
+def make_items(count, seed=7):
+    rng = random.Random(seed)
+    items = []
+    for item_id in range(1, count + 1):
+        category = rng.choice(CATEGORIES)
+        items.append(FoodItem(
+            id=item_id,
+            name=f"Item {item_id}",
+            category=category,
+            price=Decimal(rng.randint(100, 3000)) / 100,
+            is_vegetarian=rng.random() < 0.4,
+            is_spicy=category != "beverage" and rng.random() < 0.3,
+            is_available=rng.random() < 0.9,
+        ))
+    return items
+
+
+def brute_force(items, category=None, min_price=None, max_price=None, flags=None, sort="id", limit=None):
+    """Reference answer computed by scanning every item"""
+    result = [
+        item for item in items
+        if (category is None or item.category == category)
+        and (min_price is None or item.price >= min_price)
+        and (max_price is None or item.price <= max_price)
+        and all(getattr(item, flag) == value for flag, value in (flags or {}).items())
+    ]
+    if sort == "id":
+        result.sort(key=lambda item: item.id)
+    else:
+        result.sort(key=lambda item: (item.price, item.id), reverse=sort == "-price")
+    ids = [item.id for item in result]
+    return ids if limit is None else ids[:limit]
+
+
+@pytest.fixture
+def indexed():
+    items = make_items(500)
+    index = MenuIndex()
+    for item in items:
+        index.add(item)
+    return index, items
+
+
+@pytest.mark.parametrize("query", [
+    {},
+    {"category": "dessert"},
+    {"category": "unknown"},
+    {"min_price": Decimal("5"), "max_price": Decimal("6.50")},
+    {"max_price": Decimal("2"), "sort": "-price"},
+    {"flags": {"is_vegetarian": True, "is_spicy": False}},
+    {"category": "main_course", "flags": {"is_spicy": True}, "min_price": Decimal("10")},
+    {"category": "appetizer", "sort": "price", "limit": 5},
+    {"flags": {"is_available": True}, "sort": "-price", "limit": 3},
+    {"min_price": Decimal("29"), "flags": {"is_vegetarian": True}, "limit": 2},
+])
+def test_query_matches_full_scan(indexed, query):
+    """Test that every index plan returns the same IDs as a full scan"""
+    index, items = indexed
+    assert index.query(**query) == brute_force(items, **query)
+
+
+def test_incremental_update_and_delete(indexed):
+    """Test that updates and deletes keep every index consistent"""
+    index, items = indexed
+    by_id = {item.id: item for item in items}
+    for item_id in range(1, 501, 3):
+        old = by_id[item_id]
+        new = old.model_copy(update={"category": "dessert", "price": Money(100), "is_spicy": True})
+        index.update(old, new)
+        by_id[item_id] = new
+    for item_id in range(2, 501, 5):
+        index.remove(by_id.pop(item_id))
+
+    remaining = list(by_id.values())
+    query = {"category": "dessert", "flags": {"is_spicy": True}, "max_price": Decimal("1.00")}
+    assert index.query(**query) == brute_force(remaining, **query)
+    assert index.query(sort="price") == brute_force(remaining, sort="price")
+
+
+def test_price_sorted_query_of_a_small_category_skips_the_price_index():
+    """Test that a few items sorted by price do not walk the price index of a large menu"""
+    index = MenuIndex()
+    items = make_items(2000)
+    for item in items:
+        index.add(item)
+    few = [item.model_copy(update={"id": 5000 + n, "category": "specials", "price": Money(3000 - n)}) for n in range(3)]
+    for item in few:
+        index.add(item)
+    for sort in ("price", "-price"):
+        assert index.query(category="specials", sort=sort, limit=2) == brute_force(
+            items + few, category="specials", sort=sort, limit=2
+        )
+
+    class CountingList(list):
+        reads = 0
+
+        def __getitem__(self, position):
+            CountingList.reads += 1
+            return super().__getitem__(position)
+
+    index.by_price = CountingList(index.by_price)
+    index.query(category="specials", sort="price", limit=2)
+    assert CountingList.reads == 0
+
+
+def test_unknown_sort_is_rejected():
+    """Test that unsupported sort fields raise ValueError"""
+    with pytest.raises(ValueError):
+        MenuIndex().query(sort="name")
@@ -0,0 +1,103 @@
+import math
+import random
+from decimal import Decimal
+from app.database.menu_search import PREFIX_WEIGHT, MenuSearchIndex, item_terms, tokenize
+from app.models.food_item import FoodItem
+
+WORDS = ["spicy", "spinach", "spring", "roll", "rolled", "pizza", "pie", "pepper", "paneer", "tikka", "tomato", "soup"]
+
+
+def make_item(item_id, name, description=None):
+    return FoodItem(id=item_id, name=name, description=description, category="main_course", price=Decimal("9.99"))
+
+
+def test_tokenize_folds_case_and_accents():
+    assert tokenize("Crème BRÛLÉE, pan-fried!") == ["creme", "brulee", "pan", "fried"]
+    assert tokenize(None) == []
+
+
+def test_whole_words_and_last_word_prefix():
+    """Test that every word but the last must match fully and the last one also as a prefix"""
+    index = MenuSearchIndex()
+    index.add(make_item(1, "Spring Roll"))
+    index.add(make_item(2, "Spinach Pie"))
+    index.add(make_item(3, "Rolled Spinach"))
+
+    assert sorted(index.search("spin")) == [2, 3]
+    assert index.search("spinach pi") == [2]
+    assert index.search("spin pie") == []
+    assert index.search("spi roll") == []
+    assert index.search("roll") == [1, 3]
+    assert index.search("   ") == []
+
+
+def test_ranking():
+    """Test that name matches beat description matches and full words beat completions"""
+    index = MenuSearchIndex()
+    index.add(make_item(1, "Tomato Soup", "Not spicy"))
+    index.add(make_item(2, "Spicy Wings"))
+    index.add(make_item(3, "Pies"))
+    index.add(make_item(4, "Pie"))
+    assert index.search("spicy") == [2, 1]
+    assert index.search("spicy", limit=1) == [2]
+    assert index.search("pie") == [4, 3]
+
+
+def test_updates_and_removals_keep_the_index_exact():
+    index = MenuSearchIndex()
+    pizza = make_item(1, "Pepperoni Pizza")
+    index.add(pizza)
+    renamed = make_item(1, "Paneer Tikka")
+    index.update(pizza, renamed)
+    assert index.search("pizza") == []
+    assert index.search("paneer") == [1]
+    index.remove(renamed)
+    assert (index.postings, index.counts, index.terms, index.item_terms) == ({}, {}, [], {})
+
+
+def test_prefix_matches_every_completion():
+    """Test that a short prefix matches all of its completions, as FTS5 does, however the matches are ranked"""
+    index = MenuSearchIndex()
+    for item_id in range(1, 201):
+        index.add(make_item(item_id, f"{'Spicy' if item_id % 2 else 'Mild'} dish x{item_id:03d}"))
+    assert index.search("x") == list(range(1, 201))
+    assert index.search("x070") == [70]
+    # "spicy" leaves fewer items than "x" has completions, so they are scored
+    # one by one; "dish" leaves as many, so they are ranked by completion
+    assert index.search("spicy x") == list(range(1, 201, 2))
+    assert index.search("spicy x", limit=3) == [1, 3, 5]
+    assert index.search("dish x", limit=3) == [1, 2, 3]
+
+
+def test_matches_brute_force():
+    """Test matches and ranking against scoring every item"""
+    rng = random.Random(3)
+    index = MenuSearchIndex()
+    items = {}
+    for item_id in range(1, 301):
+        item = make_item(item_id, " ".join(rng.sample(WORDS, 2)), " ".join(rng.sample(WORDS, 3)))
+        items[item_id] = item
+        index.add(item)
+    for item_id in rng.sample(sorted(items), 50):
+        index.remove(items.pop(item_id))
+
+    def idf(term):
+        return math.log(1 + len(items) / sum(term in item_terms(item) for item in items.values()))
+
+    for query in ["sp", "pi", "roll", "spicy to", "pepper pa", "soup tikka roll", "zzz"]:
+        *whole, prefix = tokenize(query)
+        scores = {}
+        for item_id, item in items.items():
+            weights = item_terms(item)
+            completions = [
+                weight * idf(term) * (1.0 if term == prefix else PREFIX_WEIGHT)
+                for term, weight in weights.items() if term.startswith(prefix)
+            ]
+            if all(word in weights for word in whole) and completions:
+                score = 0.0
+                for word in whole:
+                    score += weights[word] * idf(word)
+                scores[item_id] = score + max(completions)
+        expected = sorted(scores, key=lambda item_id: (-scores[item_id], item_id))
+        assert index.search(query) == expected
+        assert index.search(query, limit=5) == expected[:5]
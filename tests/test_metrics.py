@@ -0,0 +1,67 @@
+import pytest
+from fastapi.testclient import TestClient
+from app.core.metrics import LATENCY_BUCKETS, RequestMetrics, request_metrics
+from app.database.connection import reset_database
+from app.main import app
+
+client = TestClient(app)
+
+
+@pytest.fixture(autouse=True)
+def clear_state():
+    """Start every test with an empty database and no recorded requests"""
+    reset_database()
+    request_metrics.reset()
+    yield
+    reset_database()
+
+
+def metric_lines(text):
+    return [line for line in text.splitlines() if not line.startswith("#")]
+
+
+def test_metrics_count_requests_by_route_template():
+    """Test that requests are counted per route template and status code"""
+    item = client.post("/menu/", json={"name": "Pizza", "category": "main_course", "price": 9.99}).json()
+    client.get(f"/menu/{item['id']}")
+    client.get("/menu/999")
+    client.get("/no/such/path")
+
+    response = client.get("/metrics")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain; version=0.0.4")
+    lines = metric_lines(response.text)
+    assert 'http_requests_total{method="GET",route="/menu/{item_id}",status="200"} 1' in lines
+    assert 'http_requests_total{method="GET",route="/menu/{item_id}",status="404"} 1' in lines
+    assert 'http_requests_total{method="POST",route="/menu/",status="201"} 1' in lines
+    assert 'http_requests_total{method="GET",route="<unmatched>",status="404"} 1' in lines
+    assert 'http_request_duration_seconds_count{method="GET",route="/menu/{item_id}"} 2' in lines
+    assert 'http_request_duration_seconds_bucket{method="GET",route="/menu/{item_id}",le="+Inf"} 2' in lines
+    # The /metrics request itself is in progress while rendering
+    assert 'http_requests_in_progress{method="GET"} 1' in lines
+
+
+def test_metrics_report_storage_sizes():
+    """Test that the menu and order counts are exported as gauges"""
+    client.post("/menu/", json={"name": "Pizza", "category": "main_course", "price": 9.99})
+    client.post("/menu/", json={"name": "Wings", "category": "appetizer", "price": 7.50})
+
+    lines = metric_lines(client.get("/metrics").text)
+    assert "menu_items 2" in lines
+    assert 'orders{status="pending"} 0' in lines
+
+
+def test_histogram_buckets_are_cumulative():
+    """Test bucket placement at and between bounds, rendered cumulatively"""
+    metrics = RequestMetrics()
+    for seconds in (0.0005, 0.0007, 0.02, 60.0):
+        metrics.record("GET", "/x", 200, seconds)
+    buckets = {
+        line.split('le="')[1].split('"')[0]: int(line.rsplit(" ", 1)[1])
+        for line in metric_lines(metrics.render()) if "_bucket" in line
+    }
+    assert buckets["0.0005"] == 1
+    assert buckets["0.001"] == 2
+    assert buckets["0.025"] == 3
+    assert buckets[repr(LATENCY_BUCKETS[-1])] == 3
+    assert buckets["+Inf"] == 4
@@ -0,0 +1,104 @@
+import random
+from decimal import Decimal
+from typing import Optional
+import pytest
+from pydantic import BaseModel, Field, ValidationError, condecimal
+from app.api.serialization import dumps, order_to_dict
+from app.models.money import Money, constrained_money, sum_money
+from app.models.order import Customer, Order, OrderItem
+
+
+class Priced(BaseModel):
+    price: Money = Field(..., gt=0, max_digits=6, decimal_places=2)
+    discount: Optional[Money] = None
+
+
+class ConstrainedPriced(BaseModel):
+    price: constrained_money(gt=0, max_digits=6, decimal_places=2)
+
+
+class DecimalPriced(BaseModel):
+    price: condecimal(gt=0, max_digits=6, decimal_places=2)
+
+
+@pytest.mark.parametrize("text", ["12.50", "12.5", "7", "0.01", "0.00", "-3.40", "-3.4", "100", "1.500", ".5"])
+def test_money_renders_like_decimal(text):
+    assert str(Money.parse(text)) == str(Decimal(text))
+    assert Money.parse(text) == Decimal(text)
+    assert hash(Money.parse(text)) == hash(Decimal(text))
+    assert Money.parse(text).to_decimal().as_tuple() == Decimal(text).as_tuple()
+
+
+@pytest.mark.parametrize("prices", [["7.5"], ["12.50"], ["7"], ["7.5", "12.50", "7"]])
+def test_order_json_matches_decimal_output(prices):
+    """Test that order JSON is byte-for-byte what the Decimal amounts rendered, places included"""
+    order = Order(
+        customer=Customer(name="Alice Smith", phone="5551234567", address="123 Oak Street"),
+        items=[
+            OrderItem(menu_item_id=n, menu_item_name="Pizza", quantity=2, unit_price=price)
+            for n, price in enumerate(prices, 1)
+        ],
+    )
+    expected = order_to_dict(order)
+    amounts = [Decimal(price) for price in prices]
+    expected["items"] = [
+        {**line, "unit_price": str(amount), "item_total": str(2 * amount)}
+        for line, amount in zip(expected["items"], amounts)
+    ]
+    expected["items_total"] = str(sum(2 * amount for amount in amounts))
+    assert dumps(order_to_dict(order)) == dumps(expected)
+    assert [str(item.item_total) for item in order.items] == [str(2 * amount) for amount in amounts]
+
+
+@pytest.mark.parametrize("value", ["1.505", "0.001", Decimal("9.999"), 1.999, "nan", "inf"])
+def test_sub_cent_amounts_are_rejected(value):
+    with pytest.raises(ValueError):
+        Money.parse(value)
+
+
+def test_arithmetic_matches_decimal():
+    """Test that sums, differences, products and comparisons agree with Decimal, places included"""
+    rng = random.Random(0)
+    for _ in range(2000):
+        a, b = (Decimal(rng.randint(-10 ** 6, 10 ** 6)).scaleb(-rng.randint(0, 2)) for _ in range(2))
+        quantity = rng.randint(1, 10)
+        x, y = Money.parse(a), Money.parse(b)
+        assert (str(x + y), str(x - y), str(x * quantity), str(quantity * x)) == (
+            str(a + b), str(a - b), str(a * quantity), str(quantity * a)
+        )
+        assert (x < y, x <= y, x == y, x > b, x >= b) == (a < b, a <= b, a == b, a > b, a >= b)
+        assert x.cents == a.scaleb(2)
+    assert Money(150) != Decimal("1.505") and Money(150) < Decimal("1.505") < Money(151)
+    amounts = ["1.50", "2", "0.1"]
+    assert str(sum(map(Money.parse, amounts))) == str(sum_money(list(map(Money.parse, amounts)))) == "3.60"
+    assert str(sum_money([Money(150), Money(275)])) == "4.25"
+    assert str(sum_money([])) == str(sum([])) == "0"
+
+
+def test_money_validates_like_decimal():
+    """Test that pydantic parses and constrains Money as it does a Decimal of whole cents, dumping strings to JSON"""
+    assert Priced(price=15.99).price == Money(1599)
+    assert Priced(price="12.5").model_dump_json() == '{"price":"12.5","discount":null}'
+    assert Priced.model_validate_json('{"price": 3}').price.places == 0
+    assert isinstance(Priced(price=Money(250)).model_dump()["price"], Money)
+    for invalid in ("1.505", 0, "1234567", "nan", "abc", None):
+        with pytest.raises(ValidationError):
+            Priced(price=invalid)
+    with pytest.raises(ValidationError) as raised:
+        Priced(price=10, discount="0.005")
+    assert [error["type"] for error in raised.value.errors()] == ["decimal_max_places"]
+
+
+@pytest.mark.parametrize("value", ["9.99", 3, "0.5", Money(1250), "1.505", 0, Money(-100), "1234567", "nan", "abc"])
+def test_constrained_money_validates_like_condecimal(value):
+    """Test that constrained_money accepts and rejects what condecimal does, with the same errors"""
+    decimal_value = value.to_decimal() if isinstance(value, Money) else value
+    try:
+        expected = DecimalPriced(price=decimal_value).price
+    except ValidationError as error:
+        with pytest.raises(ValidationError) as raised:
+            ConstrainedPriced(price=value)
+        assert [e["type"] for e in raised.value.errors()] == [e["type"] for e in error.errors()]
+    else:
+        assert str(ConstrainedPriced(price=value).price) == str(expected)
+    assert ConstrainedPriced.model_json_schema() == DecimalPriced.model_json_schema() | {"title": "ConstrainedPriced"}
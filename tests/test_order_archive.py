@@ -0,0 +1,134 @@
+from datetime import datetime, timedelta, timezone
+from decimal import Decimal
+import pytest
+from app.database.memory import InMemoryOrderRepository
+from app.database.order_archive import OrderArchive
+from app.models.order import Customer, Order, OrderItem, OrderStatus, to_micros
+
+BASE = datetime(2026, 3, 1, 12, 0, tzinfo=timezone.utc)
+HOUR = 3600
+
+
+def make_order(quantity=1, order_id=None):
+    order = Order(
+        customer=Customer(name="Alice Smith", phone="5551234567", address="123 Oak Street"),
+        items=[OrderItem(menu_item_id=1, menu_item_name="Pizza", quantity=quantity, unit_price=Decimal("10.50"))],
+    )
+    order.id = order_id
+    return order
+
+
+@pytest.fixture
+def orders(tmp_path):
+    repository = InMemoryOrderRepository(archive=OrderArchive(str(tmp_path / "archive")), archive_after=HOUR)
+    yield repository
+    repository.archive.close()
+
+
+def deliver(orders, order_id, at):
+    for status in ("confirmed", "ready", "delivered"):
+        orders.update_order_status(order_id, status)
+    # Backdate the delivery; the entry for the real time stays behind, as stale ones do
+    record = orders.orders[order_id]
+    record.delivered_at = to_micros(at)
+    orders._track_delivery(record)
+
+
+def test_archive_round_trips_orders(tmp_path):
+    """Test that archived orders read back exactly, across segment files"""
+    archive = OrderArchive(str(tmp_path), segment_bytes=300)
+    stored = [make_order(quantity=n % 10 + 1, order_id=n) for n in range(1, 21)]
+    for order in stored:
+        order.created_at = BASE
+    archive.add(stored[10:])
+    archive.add(stored[:10])  # Older IDs after newer ones
+    assert len(archive) == 20
+    assert len(list(tmp_path.glob("archive-*.ndjson"))) > 1
+    for order in stored:
+        assert archive.get(order.id) == order
+    assert archive.get(99) is None
+
+    archive.discard(5)
+    assert 5 not in archive and archive.get(5) is None and len(archive) == 19
+    archive.clear()
+    assert len(archive) == 0 and archive.get(1) is None
+    archive.close()
+
+
+def test_archive_starts_empty(tmp_path):
+    """Test that segments from an earlier run are not served again"""
+    archive = OrderArchive(str(tmp_path))
+    archive.add([make_order(order_id=1)])
+    archive.close()
+    assert OrderArchive(str(tmp_path)).get(1) is None
+
+
+def test_delivered_orders_move_to_the_archive(orders):
+    """Test that old deliveries leave memory but stay readable by ID"""
+    old, recent, pending = orders.add_orders([make_order(), make_order(), make_order()])
+    deliver(orders, old.id, BASE)
+    deliver(orders, recent.id, BASE + timedelta(minutes=50))
+
+    assert orders.archive_delivered(BASE + timedelta(minutes=59)) == 0
+    assert orders.archive_delivered(BASE + timedelta(minutes=61)) == 1
+    assert set(orders.orders) == {recent.id, pending.id}
+    assert orders.count_archived_orders() == 1
+
+    archived = orders.get_order(old.id)
+    assert (archived.status, archived.delivered_at, archived.items_total) == ("delivered", BASE, Decimal("10.50"))
+    assert archived.created_at == old.created_at
+    assert [order.id for order in orders.list_orders()] == [recent.id, pending.id]
+    assert orders.list_orders(status="delivered") == [orders.get_order(recent.id)]
+    assert old.id not in [order.id for order in orders.list_orders_by_time()]
+    assert orders.count_orders_by_status()["delivered"] == 1
+    assert orders.get_order_stats().revenue_by_status["delivered"] == Decimal("10.50")
+    assert orders.update_order_status(old.id, "delivered") is None
+
+
+def test_only_orders_still_delivered_are_archived(orders):
+    """Test that a replaced order is not archived on its stale delivery time"""
+    order = orders.add_order(make_order())
+    deliver(orders, order.id, BASE)
+    orders.update_order(order.id, make_order(quantity=2))
+    assert orders.archive_delivered(BASE + timedelta(days=1)) == 0
+    assert orders.get_order(order.id).status == OrderStatus.PENDING
+
+
+def test_storing_an_archived_id_again_replaces_it(orders):
+    """Test that the in-memory order wins over its archived copy"""
+    order = orders.add_order(make_order())
+    deliver(orders, order.id, BASE)
+    orders.archive_delivered(BASE + timedelta(days=1))
+    orders.add_order(make_order(quantity=4, order_id=order.id))
+    assert orders.get_order(order.id).items[0].quantity == 4
+    assert order.id not in orders.archive
+
+
+def test_archiving_runs_during_writes(orders):
+    """Test that writes archive what is due once the interval has passed"""
+    order = orders.add_order(make_order())
+    deliver(orders, order.id, BASE)
+    orders._next_archive = 0
+    orders.add_order(make_order())
+    assert order.id not in orders.orders and order.id in orders.archive
+
+
+def test_memory_stays_bounded(orders):
+    """Test that a steady flow of orders keeps a steady number in memory"""
+    for hour in range(48):
+        batch = orders.add_orders([make_order() for _ in range(20)])
+        for order in batch:
+            deliver(orders, order.id, BASE + timedelta(hours=hour))
+        orders.archive_delivered(BASE + timedelta(hours=hour))
+        assert len(orders.orders) <= 40
+        assert len(orders.created_index) == len(orders.order_ids) == len(orders.orders)
+    assert orders.count_archived_orders() == 47 * 20
+
+
+def test_clear_empties_the_archive(orders):
+    """Test that clearing also forgets archived orders"""
+    order = orders.add_order(make_order())
+    deliver(orders, order.id, BASE)
+    orders.archive_delivered(BASE + timedelta(days=1))
+    orders.clear()
+    assert orders.get_order(order.id) is None
@@ -0,0 +1,163 @@
+import asyncio
+import threading
+from decimal import Decimal
+import pytest
+from fastapi.testclient import TestClient
+from starlette.websockets import WebSocketDisconnect
+from app.api.order_events import OrderEventHub
+from app.database.connection import reset_database
+from app.main import app
+from app.models.order import Customer, Order, OrderItem
+
+client = TestClient(app)
+
+
+@pytest.fixture(autouse=True)
+def clear_databases():
+    """Clear databases before each test"""
+    reset_database()
+    yield
+    reset_database()
+
+
+@pytest.fixture
+def pizza():
+    item = {"name": "Margherita Pizza", "category": "main_course", "price": 15.99, "ingredients": ["dough"]}
+    return client.post("/menu/", json=item).json()
+
+
+def create_order(menu_item_id):
+    order_data = {
+        "customer": {"name": "Alice Smith", "phone": "5551234567", "address": "123 Oak Street, Springfield"},
+        "items": [{"menu_item_id": menu_item_id, "quantity": 1}]
+    }
+    return client.post("/orders/", json=order_data).json()
+
+
+def make_order(order_id, status="pending"):
+    return Order(
+        id=order_id,
+        status=status,
+        customer=Customer(name="Alice Smith", phone="5551234567", address="123 Oak Street"),
+        items=[OrderItem(menu_item_id=1, menu_item_name="Pizza", quantity=1, unit_price=Decimal("9.99"))]
+    )
+
+
+def test_hub_routes_events_to_matching_subscribers():
+    """Test that events reach subscribers of their order, their new status and everything"""
+    async def scenario():
+        hub = OrderEventHub()
+        one, other, pending, ready, everything = (
+            hub.subscribe(order_id=1), hub.subscribe(order_id=2), hub.subscribe(status="pending"),
+            hub.subscribe(status="ready"), hub.subscribe()
+        )
+        hub.publish("created", make_order(1))
+        hub.publish("status", make_order(2, "ready"))
+        return {name: sub.queue.qsize() for name, sub in
+                [("one", one), ("other", other), ("pending", pending), ("ready", ready), ("all", everything)]}
+
+    assert asyncio.run(scenario()) == {"one": 1, "other": 1, "pending": 1, "ready": 1, "all": 2}
+
+
+def test_hub_evicts_slow_subscribers():
+    """Test that a subscriber whose queue fills up is dropped instead of buffering forever"""
+    async def scenario():
+        hub = OrderEventHub(queue_size=3)
+        slow = hub.subscribe()
+        for order_id in range(1, 6):
+            hub.publish("created", make_order(order_id))
+        received = [event async for event in slow.events()]
+        return received, slow.evicted, hub.subscriber_count(), hub.evictions
+
+    assert asyncio.run(scenario()) == ([], True, 0, 1)
+
+
+def test_hub_ends_single_order_subscriptions_on_delivery():
+    """Test that a per-order subscription finishes after its order is delivered"""
+    async def scenario():
+        hub = OrderEventHub()
+        sub = hub.subscribe(order_id=1)
+        hub.publish("status", make_order(1, "ready"))
+        hub.publish("status", make_order(1, "delivered"))
+        return len([event async for event in sub.events()]), hub.subscriber_count()
+
+    assert asyncio.run(scenario()) == (2, 0)
+
+
+def test_hub_accepts_events_from_other_threads():
+    """Test publishing from a thread other than the subscriber's event loop"""
+    async def scenario():
+        hub = OrderEventHub()
+        sub = hub.subscribe(order_id=1)
+        thread = threading.Thread(target=hub.publish, args=("created", make_order(1)))
+        thread.start()
+        event = await asyncio.wait_for(sub.queue.get(), 5)
+        thread.join()
+        return event
+
+    assert b'"event":"created"' in asyncio.run(scenario())
+
+
+def test_idle_subscribers_use_no_threads():
+    """Test that thousands of waiting subscribers need no thread each"""
+    async def scenario():
+        hub = OrderEventHub()
+        threads = threading.active_count()
+        subs = [hub.subscribe(order_id=i) for i in range(5000)]
+        waiters = [asyncio.ensure_future(sub.queue.get()) for sub in subs]
+        await asyncio.sleep(0)
+        added = threading.active_count() - threads
+        hub.publish("created", make_order(4999))
+        await asyncio.wait_for(waiters[4999], 5)
+        for waiter in waiters[:4999]:
+            waiter.cancel()
+        return added, hub.subscriber_count()
+
+    assert asyncio.run(scenario()) == (0, 5000)
+
+
+def test_sse_snapshot_of_delivered_order(pizza):
+    """Test that the event stream of a delivered order sends its state and ends"""
+    order = create_order(pizza["id"])
+    for new_status in ("confirmed", "ready", "delivered"):
+        client.put(f"/orders/{order['id']}/status", json={"status": new_status})
+
+    response = client.get(f"/orders/{order['id']}/events")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/event-stream")
+    assert response.text.startswith('data: {"event":"snapshot","order":{')
+    assert '"status":"delivered"' in response.text
+
+
+def test_sse_unknown_order():
+    """Test that the event stream of an unknown order is a 404"""
+    assert client.get("/orders/999/events").status_code == 404
+
+
+def test_websocket_follows_order_until_delivered(pizza):
+    """Test that a single-order socket gets the snapshot and every status change"""
+    order = create_order(pizza["id"])
+    with client.websocket_connect(f"/orders/ws?order_id={order['id']}") as ws:
+        assert ws.receive_json()["event"] == "snapshot"
+        for new_status in ("confirmed", "ready", "delivered"):
+            client.put(f"/orders/{order['id']}/status", json={"status": new_status})
+            event = ws.receive_json()
+            assert (event["event"], event["order"]["status"]) == ("status", new_status)
+        with pytest.raises(WebSocketDisconnect):
+            ws.receive_json()
+
+
+def test_websocket_status_firehose(pizza):
+    """Test that a status socket sees new orders entering that status"""
+    with client.websocket_connect("/orders/ws?status=pending") as ws:
+        order = create_order(pizza["id"])
+        client.put(f"/orders/{order['id']}/status", json={"status": "confirmed"})
+        second = create_order(pizza["id"])
+        assert [ws.receive_json()["order"]["id"] for _ in range(2)] == [order["id"], second["id"]]
+
+
+def test_websocket_unknown_order():
+    """Test that a socket for an unknown order is refused"""
+    with pytest.raises(WebSocketDisconnect):
+        with client.websocket_connect("/orders/ws?order_id=999") as ws:
+            ws.receive_json()
@@ -0,0 +1,92 @@
+from decimal import Decimal
+import pytest
+from pydantic import ValidationError
+from app.models.order import Customer, Order, OrderItem, construct_validated
+
+
+def make_order():
+    return Order(
+        customer=Customer(name="Alice Smith", phone="5551234567", address="123 Oak Street"),
+        items=[
+            OrderItem(menu_item_id=1, menu_item_name="Pizza", quantity=2, unit_price=Decimal("15.99")),
+            OrderItem(menu_item_id=2, menu_item_name="Wings", quantity=1, unit_price=Decimal("12.50")),
+        ]
+    )
+
+
+def test_totals_computed_at_creation():
+    """Test that totals are stored when the order is built"""
+    order = make_order()
+    assert order.items[0].item_total == Decimal("31.98")
+    assert order.items_total == Decimal("44.48")
+    assert order.total_items_count == 3
+
+
+def test_totals_recomputed_when_items_change():
+    """Test that reassigning items refreshes the totals"""
+    order = make_order()
+    order.items = order.items[:1]
+    assert order.items_total == Decimal("31.98")
+    assert order.total_items_count == 2
+
+    order.items = [*order.items, OrderItem(menu_item_id=3, menu_item_name="Soda", quantity=1, unit_price=Decimal("2.00"))]
+    assert isinstance(order.items, tuple)
+    assert order.items_total == Decimal("33.98")
+    assert order.total_items_count == 3
+
+
+def test_lines_cannot_be_changed_in_place():
+    """Test that a line's quantity and the list of lines are read-only, so totals cannot go stale"""
+    order = make_order()
+    with pytest.raises(ValidationError):
+        order.items[0].quantity = 5
+    with pytest.raises(AttributeError):
+        order.items.append(OrderItem(menu_item_id=3, menu_item_name="Soda", quantity=1, unit_price=Decimal("2.00")))
+    assert order.items_total == Decimal("44.48")
+    assert order.total_items_count == 3
+
+    changed = order.items[0].model_copy(update={"quantity": 5})
+    order.items = (changed,) + order.items[1:]
+    assert order.items_total == Decimal("92.45")
+    assert order.total_items_count == 6
+
+
+def test_consistency_check_detects_stale_totals():
+    """Test that totals changed behind the items' back are caught in check mode"""
+    order = make_order()
+    order.__dict__["_total_items_count"] = 4
+    with pytest.raises(ValueError):
+        order.verify_totals()
+    with pytest.raises(ValueError):
+        order.items_total
+
+
+def test_construct_validated_matches_validated_order():
+    """Test that trusted construction yields the same order, with totals, as validation"""
+    validated = make_order()
+    constructed = construct_validated(Order, {
+        "id": None,
+        "customer": construct_validated(Customer, validated.customer.model_dump()),
+        "items": tuple(construct_validated(OrderItem, item.model_dump()) for item in validated.items),
+        "status": "pending",
+        "version": 1,
+        "menu_version": None,
+        "created_at": None,
+        "confirmed_at": None,
+        "ready_at": None,
+        "delivered_at": None,
+    })
+    assert constructed == validated
+    assert constructed.items_total == Decimal("44.48")
+    assert constructed.items[0].item_total == Decimal("31.98")
+    assert constructed.model_dump() == validated.model_dump()
+
+
+def test_copies_with_changes_have_fresh_totals():
+    order = make_order()
+    line = order.items[1].model_copy(update={"quantity": 2})
+    assert line.item_total == Decimal("25.00")
+    copied = order.model_copy(update={"items": [order.items[0], line]})
+    assert isinstance(copied.items, tuple)
+    assert (copied.items_total, copied.total_items_count) == (Decimal("56.98"), 4)
+    assert (order.items_total, order.total_items_count) == (Decimal("44.48"), 3)
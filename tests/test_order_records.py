@@ -0,0 +1,51 @@
+from datetime import datetime, timezone
+from decimal import Decimal
+from app.database.memory import InMemoryOrderRepository
+from app.database.order_records import OrderRecord
+from app.models.order import Customer, Order, OrderItem, OrderStatus
+
+CREATED = datetime(2026, 3, 1, 12, 0, 0, 123456, tzinfo=timezone.utc)
+
+
+def make_order(*prices):
+    return Order(
+        customer=Customer(name="Alice Smith", phone="5551234567", address="123 Oak Street"),
+        items=[
+            OrderItem(menu_item_id=n, menu_item_name=f"Dish {n}", quantity=n, unit_price=price)
+            for n, price in enumerate(prices, 1)
+        ],
+        created_at=CREATED,
+    )
+
+
+def test_records_round_trip_orders():
+    """Test that a record materializes the order it was made from, prices rendered alike"""
+    order = make_order(Decimal("10.50"), Decimal("12.5"), Decimal("7"))
+    order.id = 3
+    order.record_status(OrderStatus.CONFIRMED, CREATED)
+    record = OrderRecord.from_order(order)
+    assert record.lines[3] == 1050
+    restored = record.to_order()
+    assert restored == order
+    assert [str(item.unit_price) for item in restored.items] == ["10.50", "12.5", "7"]
+    assert restored.items_total == order.items_total
+    assert record.total_cents() == order.items_total.cents
+
+
+def test_records_share_strings():
+    """Test that repeated customer and item strings are stored once"""
+    first, second = (OrderRecord.from_order(make_order(Decimal("9.99"))) for _ in range(2))
+    assert first.customer[0] is second.customer[0]
+    assert first.lines[1] is second.lines[1]
+
+
+def test_stored_orders_are_not_shared():
+    """Test that changing a returned order leaves the stored one alone"""
+    orders = InMemoryOrderRepository()
+    order = orders.add_order(make_order(Decimal("9.99")))
+    order.status = "delivered"
+    read = orders.get_order(order.id)
+    read.items = [read.items[0].model_copy(update={"quantity": 5})]
+    assert orders.get_order(order.id) == make_order(Decimal("9.99")).model_copy(update={"id": order.id})
+    assert orders.update_order_status(order.id, "confirmed").version == 2
+    assert orders.get_order(order.id).status == "confirmed"
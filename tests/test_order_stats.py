@@ -0,0 +1,58 @@
+import random
+from decimal import Decimal
+from app.database.memory import InMemoryOrderRepository
+from app.database.order_stats import export_order_columns, recompute_order_stats, stats_differences
+from app.models.order import Customer, Order, OrderItem, OrderStatus
+
+STATUSES = [status.value for status in OrderStatus]
+
+
+def random_order(rng):
+    return Order(
+        customer=Customer(name="Alice Smith", phone="5551234567", address="123 Oak Street"),
+        items=[
+            OrderItem(
+                menu_item_id=rng.randint(1, 20),
+                menu_item_name="Dish",
+                quantity=rng.randint(1, 10),
+                unit_price=Decimal(rng.randint(1, 5000)) / 100,
+            )
+            for _ in range(rng.randint(1, 4))
+        ],
+    )
+
+
+def fill(count, seed=5):
+    rng = random.Random(seed)
+    orders = InMemoryOrderRepository()
+    orders.add_orders([random_order(rng) for _ in range(count)])
+    for order_id in rng.sample(range(1, count + 1), count // 2):
+        orders.update_order_status(order_id, rng.choice(STATUSES))
+    for order_id in rng.sample(range(1, count + 1), count // 10):
+        orders.update_order(order_id, random_order(rng))
+    return orders
+
+
+def test_running_stats_match_recompute():
+    orders = fill(2000)
+    live = orders.get_order_stats()
+    assert stats_differences(live, recompute_order_stats(export_order_columns(orders))) == []
+    assert sum(live.revenue_by_status.values()) == sum(order.items_total for order in orders.get_all_orders().values())
+
+
+def test_differences_are_reported():
+    orders = fill(50)
+    live = orders.get_order_stats()
+    orders.stats.revenue_by_status["pending"] += 1
+    orders.stats.items[1][1] += 1
+    differences = stats_differences(orders.get_order_stats(), recompute_order_stats(export_order_columns(orders)))
+    assert [difference.split(":")[0] for difference in differences] == [
+        "revenue_by_status[pending]", "items[1] (quantity, revenue)"
+    ]
+    assert live != orders.get_order_stats()
+
+
+def test_empty_storage():
+    stats = recompute_order_stats(export_order_columns(InMemoryOrderRepository()))
+    assert stats.orders_by_status == dict.fromkeys(STATUSES, 0)
+    assert stats.items == {}
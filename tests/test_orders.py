@@ -1,19 +1,19 @@
+import json
 import pytest
 from fastapi.testclient import TestClient
 from decimal import Decimal
 from app.main import app
-from app.database.connection import menu_db, orders_db
+from app.database.connection import reset_database
+from app.models.order import OrderItem
 
 client = TestClient(app)
 
 @pytest.fixture(autouse=True)
 def clear_databases():
     """Clear databases before each test"""
-    menu_db.clear()
-    orders_db.clear()
+    reset_database()
     yield
-    menu_db.clear()
-    orders_db.clear()
+    reset_database()
 
 @pytest.fixture
 def sample_menu_items():
@@ -196,7 +196,8 @@ def test_get_all_orders(sample_menu_items):
     assert response.status_code == 200
     
     data = response.json()
-    assert len(data) == 2
+    assert len(data["orders"]) == 2
+    assert data["next_cursor"] is None
 
 def test_get_order_by_id(sample_menu_items):
     """Test getting specific order by ID"""
@@ -329,3 +330,220 @@ def test_order_total_calculation(sample_menu_items):
     
     # Check item count
     assert data["total_items_count"] == 3  # 2 pizzas + 1 wings
+
+def create_orders(menu_item_id, count):
+    """Create `count` single-item orders and return their IDs"""
+    order_data = {
+        "customer": {
+            "name": "Ivy Chen",
+            "phone": "5551234567",
+            "address": "369 Poplar Street, Springfield"
+        },
+        "items": [{"menu_item_id": menu_item_id, "quantity": 1}]
+    }
+    return [client.post("/orders/", json=order_data).json()["id"] for _ in range(count)]
+
+def test_get_orders_cursor_pagination(sample_menu_items):
+    """Test walking all orders page by page with the cursor"""
+    order_ids = create_orders(sample_menu_items[0]["id"], 5)
+
+    seen = []
+    cursor = None
+    while True:
+        params = {"limit": 2}
+        if cursor is not None:
+            params["after"] = cursor
+        response = client.get("/orders/", params=params)
+        assert response.status_code == 200
+        page = response.json()
+        assert len(page["orders"]) <= 2
+        seen.extend(order["id"] for order in page["orders"])
+        cursor = page["next_cursor"]
+        if cursor is None:
+            break
+
+    assert seen == order_ids
+
+def test_get_orders_invalid_limit():
+    """Test that page sizes outside 1..1000 are rejected"""
+    assert client.get("/orders/", params={"limit": 0}).status_code == 422
+    assert client.get("/orders/", params={"limit": 1001}).status_code == 422
+
+def test_stream_orders_ndjson(sample_menu_items):
+    """Test streaming every order after the cursor as NDJSON"""
+    order_ids = create_orders(sample_menu_items[1]["id"], 3)
+
+    response = client.get("/orders/", params={"stream": True, "after": order_ids[0]})
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+
+    lines = [json.loads(line) for line in response.text.splitlines()]
+    assert [line["id"] for line in lines] == order_ids[1:]
+    assert Decimal(str(lines[0]["items_total"])) == Decimal("12.50")
+
+def test_get_orders_by_status(sample_menu_items):
+    """Test the kitchen queues with counts per status"""
+    order_ids = create_orders(sample_menu_items[0]["id"], 3)
+    client.put(f"/orders/{order_ids[1]}/status", json={"status": "confirmed"})
+
+    response = client.get("/orders/", params={"status": "pending"})
+    assert response.status_code == 200
+    data = response.json()
+    assert [order["id"] for order in data["orders"]] == [order_ids[0], order_ids[2]]
+    assert data["counts"] == {"pending": 2, "confirmed": 1, "ready": 0, "delivered": 0}
+
+    response = client.get("/orders/", params={"status": "confirmed"})
+    assert [order["id"] for order in response.json()["orders"]] == [order_ids[1]]
+
+    assert client.get("/orders/", params={"status": "cancelled"}).status_code == 422
+
+def test_create_orders_batch(sample_menu_items):
+    """Test that a batch stores the valid orders and reports each failure"""
+    customer = {"name": "Jack Brown", "phone": "5559876543", "address": "12 Birch Street"}
+    pizza_id = sample_menu_items[0]["id"]
+    batch = {"orders": [
+        {"customer": customer, "items": [{"menu_item_id": pizza_id, "quantity": 2}]},
+        {"customer": customer, "items": [{"menu_item_id": 999, "quantity": 1}]},
+        {"customer": customer},
+        {"customer": customer, "items": [{"menu_item_id": sample_menu_items[1]["id"], "quantity": 1}]}
+    ]}
+
+    response = client.post("/orders/batch", json=batch)
+    assert response.status_code == 200
+    data = response.json()
+    assert data["created"] == 2
+    assert data["failed"] == 2
+    assert [result["status_code"] for result in data["results"]] == [201, 404, 422, 201]
+    assert data["results"][1]["detail"] == "Menu item with ID 999 not found"
+    assert data["results"][2]["detail"][0]["loc"] == ["items"]
+
+    created = data["results"][0]["order"]
+    assert Decimal(str(created["items_total"])) == Decimal("31.98")
+    assert client.get(f"/orders/{created['id']}").json() == created
+    assert [order["id"] for order in client.get("/orders/").json()["orders"]] == [
+        created["id"], data["results"][3]["order"]["id"]
+    ]
+
+def test_create_orders_batch_size_limits():
+    """Test that empty and oversized batches are rejected as a whole"""
+    assert client.post("/orders/batch", json={"orders": []}).status_code == 422
+    assert client.post("/orders/batch", json={"orders": [{}] * 1001}).status_code == 422
+
+def test_status_update_if_match(sample_menu_items):
+    """Test that a stale If-Match is rejected with 409 and a fresh one succeeds"""
+    order_id = create_orders(sample_menu_items[0]["id"], 1)[0]
+    response = client.get(f"/orders/{order_id}")
+    assert response.headers["etag"] == '"1"'
+    assert response.json()["version"] == 1
+
+    response = client.put(f"/orders/{order_id}/status", json={"status": "confirmed"}, headers={"If-Match": '"1"'})
+    assert response.status_code == 200
+    assert response.headers["etag"] == '"2"'
+
+    response = client.put(f"/orders/{order_id}/status", json={"status": "ready"}, headers={"If-Match": '"1"'})
+    assert response.status_code == 409
+    assert response.headers["etag"] == '"2"'
+    assert client.get(f"/orders/{order_id}").json()["status"] == "confirmed"
+
+    response = client.put(f"/orders/{order_id}/status", json={"status": "ready"}, headers={"If-Match": '"2"'})
+    assert response.status_code == 200
+    assert response.json()["version"] == 3
+
+def test_order_constraints_checked_when_request_is_parsed():
+    """Test that the order's constraints reject a request before any menu lookup"""
+    order_data = {
+        "customer": {"name": "Jo 99", "phone": "5551234567", "address": "123 Oak Street"},
+        "items": [{"menu_item_id": 999, "quantity": 0}]
+    }
+    response = client.post("/orders/", json=order_data)
+    assert response.status_code == 422
+    assert {tuple(error["loc"]) for error in response.json()["detail"]} == {
+        ("body", "customer", "name"), ("body", "items", 0, "quantity")
+    }
+
+
+@pytest.mark.parametrize("price", [1.999, 123456789.5])
+def test_menu_prices_an_order_line_cannot_hold_are_rejected(sample_menu_items, price):
+    """Test that sub-cent and oversized prices never reach the menu, so no order is priced from them"""
+    item = {"name": "Odd Dish", "category": "main_course", "price": price}
+    assert client.post("/menu/", json=item).status_code == 422
+    pizza_id = sample_menu_items[0]["id"]
+    assert client.put(f"/menu/{pizza_id}", json={"price": price}).status_code == 422
+
+    order_data = {
+        "customer": {"name": "Alice Smith", "phone": "5551234567", "address": "123 Oak Street"},
+        "items": [{"menu_item_id": pizza_id, "quantity": 1}]
+    }
+    response = client.post("/orders/", json=order_data)
+    assert response.status_code == 201
+    line = response.json()["items"][0]
+    OrderItem(**{name: line[name] for name in ("menu_item_id", "menu_item_name", "quantity", "unit_price")})
+
+
+def test_order_records_menu_version(sample_menu_items):
+    """Test that orders are priced against, and record, the current menu version"""
+    pizza_id = sample_menu_items[0]["id"]
+    order_data = {
+        "customer": {"name": "Alice Smith", "phone": "5551234567", "address": "123 Oak Street"},
+        "items": [{"menu_item_id": pizza_id, "quantity": 1}]
+    }
+    first = client.post("/orders/", json=order_data).json()
+    client.put(f"/menu/{pizza_id}", json={"price": 17.99})
+    second = client.post("/orders/", json=order_data).json()
+    assert second["menu_version"] > first["menu_version"]
+    assert (first["items_total"], second["items_total"]) == ("15.99", "17.99")
+    assert client.get(f"/orders/{first['id']}").json()["menu_version"] == first["menu_version"]
+
+
+def test_order_stats(sample_menu_items):
+    """Test revenue per status and item popularity, cross-checked by a recompute"""
+    pizza_id, wings_id = sample_menu_items[0]["id"], sample_menu_items[1]["id"]
+    customer = {"name": "Alice Smith", "phone": "5551234567", "address": "123 Oak Street"}
+    first = client.post("/orders/", json={"customer": customer, "items": [
+        {"menu_item_id": pizza_id, "quantity": 1}, {"menu_item_id": wings_id, "quantity": 3}
+    ]}).json()
+    client.post("/orders/", json={"customer": customer, "items": [{"menu_item_id": pizza_id, "quantity": 2}]})
+    client.put(f"/orders/{first['id']}/status", json={"status": "confirmed"})
+
+    stats = client.get("/orders/stats").json()
+    assert stats["orders"] == {"pending": 1, "confirmed": 1, "ready": 0, "delivered": 0}
+    assert stats["revenue"] == {"pending": "31.98", "confirmed": "53.49", "ready": "0.00", "delivered": "0.00"}
+    assert stats["total_revenue"] == "85.47"
+    assert [(item["menu_item_id"], item["quantity"]) for item in stats["items"]] == [(pizza_id, 3), (wings_id, 3)]
+    assert "differences" not in stats
+
+    checked = client.get("/orders/stats", params={"recompute": True, "limit": 1}).json()
+    assert checked["differences"] == []
+    assert [item["menu_item_name"] for item in checked["items"]] == ["Margherita Pizza"]
+
+
+def test_order_timestamps_and_timeline(sample_menu_items):
+    """Test that orders carry their times and can be listed by creation time"""
+    order_ids = create_orders(sample_menu_items[0]["id"], 5)
+    order = client.get(f"/orders/{order_ids[0]}").json()
+    assert order["created_at"].endswith("Z")
+    assert (order["confirmed_at"], order["delivered_at"]) == (None, None)
+    confirmed = client.put(f"/orders/{order_ids[0]}/status", json={"status": "confirmed"}).json()
+    assert confirmed["confirmed_at"] >= confirmed["created_at"] == order["created_at"]
+
+    recent = client.get("/orders/timeline", params={"minutes": 5}).json()
+    assert [o["id"] for o in recent["orders"]] == order_ids
+    assert recent["orders"][0]["created_at"] == order["created_at"]
+    assert recent["next_cursor"] is None
+
+    seen, cursor = [], None
+    while True:
+        params = {"start": "2020-01-01T00:00:00Z", "limit": 2}
+        if cursor is not None:
+            params["after"] = cursor
+        page = client.get("/orders/timeline", params=params).json()
+        seen += [o["id"] for o in page["orders"]]
+        cursor = page["next_cursor"]
+        if cursor is None:
+            break
+    assert seen == order_ids
+
+    assert client.get("/orders/timeline", params={"end": "2020-01-01T00:00:00"}).json()["orders"] == []
+    both = client.get("/orders/timeline", params={"minutes": 5, "start": "2020-01-01T00:00:00Z"})
+    assert both.status_code == 400
+    assert client.get("/orders/timeline", params={"minutes": 0}).status_code == 422
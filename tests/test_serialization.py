@@ -0,0 +1,55 @@
+from datetime import datetime, timezone
+from decimal import Decimal
+import pytest
+from app.api.serialization import dumps, order_summary_to_dict, order_to_dict
+from app.models.order import Customer, Order, OrderItem, OrderStatus
+from app.schemas.order import OrderResponse, OrderSummaryResponse
+
+
+@pytest.fixture
+def order():
+    return Order(
+        id=7,
+        customer=Customer(name="Alice Smith", phone="+5551234567", address="123 Oak Street"),
+        items=[
+            OrderItem(menu_item_id=1, menu_item_name="Crème Brûlée", quantity=2, unit_price=Decimal("15.99")),
+            OrderItem(menu_item_id=2, menu_item_name="Wings", quantity=1, unit_price=Decimal("12.50")),
+        ],
+        status=OrderStatus.CONFIRMED,
+        created_at=datetime(2026, 3, 1, 12, 30, 5, 250000, tzinfo=timezone.utc),
+        confirmed_at=datetime(2026, 3, 1, 12, 31, tzinfo=timezone.utc)
+    )
+
+
+def pydantic_order_json(order):
+    """Reference output of the pydantic response models"""
+    return OrderResponse(
+        id=order.id,
+        customer=order.customer.model_dump(),
+        items=[{**item.model_dump(), "item_total": item.item_total} for item in order.items],
+        status=order.status,
+        items_total=order.items_total,
+        total_items_count=order.total_items_count,
+        version=order.version,
+        created_at=order.created_at,
+        confirmed_at=order.confirmed_at
+    ).model_dump_json()
+
+
+def test_order_json_matches_response_model(order):
+    """Test that the fast path renders exactly what OrderResponse would"""
+    assert dumps(order_to_dict(order)) == pydantic_order_json(order).encode()
+
+
+def test_summary_json_matches_response_model(order):
+    """Test that summaries render exactly what OrderSummaryResponse would"""
+    expected = OrderSummaryResponse(
+        id=order.id,
+        customer_name=order.customer.name,
+        customer_phone=order.customer.phone,
+        status=order.status,
+        items_total=order.items_total,
+        total_items_count=order.total_items_count,
+        created_at=order.created_at
+    ).model_dump_json()
+    assert dumps(order_summary_to_dict(order)) == expected.encode()
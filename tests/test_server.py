@@ -0,0 +1,10 @@
+import pytest
+from app.core.config import settings
+from app.main import run
+
+
+def test_workers_need_shared_storage(monkeypatch):
+    """Test that several workers are refused when each would get its own data"""
+    monkeypatch.setattr(settings, "DATABASE_URL", "memory://")
+    with pytest.raises(SystemExit, match="needs storage shared between processes"):
+        run(workers=2)
@@ -0,0 +1,218 @@
+import multiprocessing
+import sqlite3
+from decimal import Decimal
+import pytest
+from app.database.connection import is_shared_storage
+from app.database.id_allocator import TimeOrderedIdAllocator
+from app.database.repository import OrderVersionConflict
+from app.database.sqlite import (
+    SQLiteConnectionPool, SQLiteMenuRepository, SQLiteOrderRepository, parse_sqlite_url
+)
+from app.models.food_item import FoodItem
+from app.models.order import Customer, Order, OrderItem
+
+
+def make_order():
+    return Order(
+        customer=Customer(name="Alice Smith", phone="5551234567", address="123 Oak Street"),
+        items=[OrderItem(menu_item_id=1, menu_item_name="Pizza", quantity=1, unit_price=Decimal("9.99"))]
+    )
+
+
+def add_orders_in_process(path, count, results):
+    """Worker process: open its own pool and add `count` orders"""
+    pool = SQLiteConnectionPool(path)
+    orders = SQLiteOrderRepository(pool)
+    results.put([orders.add_order(make_order()).id for _ in range(count)])
+    pool.close()
+
+
+def confirm_in_process(path, order_id, barrier, results):
+    """Worker process: race the other workers to confirm one order"""
+    pool = SQLiteConnectionPool(path)
+    orders = SQLiteOrderRepository(pool)
+    barrier.wait()
+    try:
+        orders.update_order_status(order_id, "confirmed", expected_status="pending", expected_version=1)
+        results.put("won")
+    except OrderVersionConflict:
+        results.put("conflict")
+    pool.close()
+
+
+def run_processes(target, args_list):
+    context = multiprocessing.get_context("fork")
+    processes = [context.Process(target=target, args=args) for args in args_list]
+    for process in processes:
+        process.start()
+    for process in processes:
+        process.join(timeout=30)
+        assert process.exitcode == 0
+
+
+def test_parse_sqlite_url():
+    """Test mapping database URLs to file paths"""
+    assert parse_sqlite_url("sqlite:///./test.db") == "./test.db"
+    assert parse_sqlite_url("sqlite:////var/lib/app.db") == "/var/lib/app.db"
+    assert parse_sqlite_url("sqlite://") is None
+    assert parse_sqlite_url("sqlite:///:memory:") is None
+
+
+def test_data_survives_reopening(tmp_path):
+    """Test that orders and menu items persist across restarts"""
+    path = str(tmp_path / "restaurant.db")
+    pool = SQLiteConnectionPool(path)
+    item = SQLiteMenuRepository(pool).add_item(FoodItem(name="Pizza", category="main_course", price=Decimal("9.99")))
+    order = SQLiteOrderRepository(pool).add_order(make_order())
+    pool.close()
+
+    reopened = SQLiteConnectionPool(path)
+    assert SQLiteMenuRepository(reopened).get_item(item.id).name == "Pizza"
+    assert SQLiteOrderRepository(reopened).get_order(order.id).items_total == Decimal("9.99")
+    reopened.close()
+
+
+class FrozenClockAllocator(TimeOrderedIdAllocator):
+    """Time-ordered allocator whose clock never moves, so bursts borrow future milliseconds"""
+
+    def _now_ms(self) -> int:
+        return 1000
+
+
+def test_time_ordered_ids_are_not_reissued_after_restart(tmp_path):
+    """Test that a reopened repository seeds its allocator from the stored IDs"""
+    path = str(tmp_path / "restaurant.db")
+    pool = SQLiteConnectionPool(path)
+    orders = SQLiteOrderRepository(pool, FrozenClockAllocator(worker_id=0))
+    first_ids = [orders.add_order(make_order()).id for _ in range(300)]
+    menu = SQLiteMenuRepository(pool, FrozenClockAllocator(worker_id=0))
+    item_ids = [menu.add_item(FoodItem(name="Pizza", category="main_course", price=Decimal("9.99"))).id
+                for _ in range(300)]
+    pool.close()
+
+    reopened = SQLiteConnectionPool(path)
+    orders = SQLiteOrderRepository(reopened, FrozenClockAllocator(worker_id=0))
+    menu = SQLiteMenuRepository(reopened, FrozenClockAllocator(worker_id=0))
+    assert orders.add_order(make_order()).id > max(first_ids)
+    assert menu.add_item(FoodItem(name="Soup", category="appetizer", price=Decimal("4.50"))).id > max(item_ids)
+    reopened.close()
+
+
+def test_adds_version_column_to_older_databases(tmp_path):
+    """Test that a database created before order versions gains the column"""
+    path = str(tmp_path / "restaurant.db")
+    conn = sqlite3.connect(path)
+    conn.execute("CREATE TABLE orders (id INTEGER PRIMARY KEY AUTOINCREMENT, customer_id INTEGER NOT NULL, status TEXT NOT NULL)")
+    conn.close()
+
+    pool = SQLiteConnectionPool(path)
+    orders = SQLiteOrderRepository(pool)
+    order = orders.add_order(make_order())
+    assert orders.update_order_status(order.id, "confirmed", expected_version=1).version == 2
+    pool.close()
+
+
+def test_file_database_uses_wal(tmp_path):
+    """Test that file databases run in WAL mode"""
+    pool = SQLiteConnectionPool(str(tmp_path / "restaurant.db"))
+    with pool.connection() as conn:
+        assert conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+    pool.close()
+
+
+def test_batch_commits_once_and_rolls_back_together(tmp_path):
+    """Test that a failing batch leaves none of its writes behind"""
+    pool = SQLiteConnectionPool(str(tmp_path / "restaurant.db"))
+    orders = SQLiteOrderRepository(pool)
+    with pool.batch():
+        first = orders.add_order(make_order())
+        second = orders.add_order(make_order())
+        # Reads inside the batch see its uncommitted writes
+        assert orders.get_order(first.id) is not None
+    assert set(orders.get_all_orders()) == {first.id, second.id}
+
+    with pytest.raises(RuntimeError):
+        with pool.batch():
+            orders.add_order(make_order())
+            raise RuntimeError("aggregator feed failed")
+    assert set(orders.get_all_orders()) == {first.id, second.id}
+    pool.close()
+
+
+def test_pool_is_bounded(tmp_path):
+    """Test that the pool never opens more than its size"""
+    pool = SQLiteConnectionPool(str(tmp_path / "restaurant.db"), size=2)
+    with pool.connection() as first, pool.connection() as second:
+        assert first is not second
+    with pool.connection() as third:
+        assert third in (first, second)
+    pool.close()
+
+
+def test_only_sqlite_files_are_shared_between_workers():
+    """Test which database URLs can back several worker processes"""
+    assert is_shared_storage("sqlite:///./restaurant.db")
+    assert not is_shared_storage("sqlite://")
+    assert not is_shared_storage("memory://")
+
+
+def test_worker_processes_share_one_order_book(tmp_path):
+    """Test that orders written by several processes are all visible, with unique IDs"""
+    path = str(tmp_path / "restaurant.db")
+    SQLiteConnectionPool(path).close()
+    results = multiprocessing.get_context("fork").Queue()
+    run_processes(add_orders_in_process, [(path, 25, results) for _ in range(4)])
+    ids = [order_id for _ in range(4) for order_id in results.get(timeout=5)]
+
+    pool = SQLiteConnectionPool(path)
+    orders = SQLiteOrderRepository(pool)
+    assert len(set(ids)) == 100
+    assert set(orders.get_all_orders()) == set(ids)
+    assert orders.count_orders_by_status()["pending"] == 100
+    pool.close()
+
+
+def test_worker_processes_race_on_one_transition(tmp_path):
+    """Test that exactly one process wins a compare-and-swap transition"""
+    path = str(tmp_path / "restaurant.db")
+    pool = SQLiteConnectionPool(path)
+    order = SQLiteOrderRepository(pool).add_order(make_order())
+    context = multiprocessing.get_context("fork")
+    barrier, results = context.Barrier(4), context.Queue()
+    run_processes(confirm_in_process, [(path, order.id, barrier, results) for _ in range(4)])
+
+    assert sorted(results.get(timeout=5) for _ in range(4)) == ["conflict"] * 3 + ["won"]
+    assert SQLiteOrderRepository(pool).get_order(order.id).version == 2
+    pool.close()
+
+
+def test_menu_version_is_shared_between_pools(tmp_path):
+    """Test that a menu change made through one pool is seen by another (as by another worker)"""
+    path = str(tmp_path / "restaurant.db")
+    first, second = SQLiteConnectionPool(path), SQLiteConnectionPool(path)
+    before = SQLiteMenuRepository(second).get_menu_version()
+    SQLiteMenuRepository(first).add_item(FoodItem(name="Pizza", category="main_course", price=Decimal("9.99")))
+    assert SQLiteMenuRepository(second).get_menu_version() > before
+    first.close()
+    second.close()
+
+
+def test_status_page_reads_orders_and_lines_in_one_snapshot(tmp_path):
+    """Test that an order leaving the listed status between the two reads is still returned whole"""
+    path = str(tmp_path / "restaurant.db")
+    pool, writer = SQLiteConnectionPool(path), SQLiteConnectionPool(path)
+    orders = SQLiteOrderRepository(pool)
+    order = orders.add_order(make_order())
+
+    def confirm_before_lines_are_read(statement):
+        if "JOIN order_items" in statement and order.status == "pending":
+            order.status = "confirmed"
+            SQLiteOrderRepository(writer).update_order_status(order.id, "confirmed")
+
+    # The pool hands the same idle connection back to list_orders
+    with pool.connection() as conn:
+        conn.set_trace_callback(confirm_before_lines_are_read)
+    page = orders.list_orders(status="pending")
+    assert [(listed.id, len(listed.items)) for listed in page] == [(order.id, 1)]
+    pool.close()
+    writer.close()
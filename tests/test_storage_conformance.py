@@ -0,0 +1,493 @@
+"""Conformance suite that every storage backend must pass.
+
+Register a new backend in STORAGE_BACKENDS and add a URL for it to
+BACKEND_URLS to run it through the same checks.
+"""
+import threading
+from datetime import datetime, timedelta, timezone
+from decimal import Decimal
+import pytest
+from app.database.connection import create_storage
+from app.database.order_stats import export_order_columns, recompute_order_stats, stats_differences
+from app.database.repository import ItemSales, OrderVersionConflict
+from app.models.food_item import FoodItem
+from app.models.order import Customer, Order, OrderItem, OrderStatus, utc_now
+
+BACKEND_URLS = ["memory://", "sqlite://", "sqlite:///{tmp_path}/conformance.db", "journal:///{tmp_path}/journal"]
+
+
+@pytest.fixture(params=BACKEND_URLS)
+def storage(request, tmp_path):
+    """Fresh menu and order repositories for each backend"""
+    menu, orders = create_storage(request.param.format(tmp_path=tmp_path))
+    yield menu, orders
+    orders.clear()
+    menu.clear()
+
+
+@pytest.fixture
+def menu(storage):
+    return storage[0]
+
+
+@pytest.fixture
+def orders(storage):
+    return storage[1]
+
+
+def make_item(name="Margherita Pizza", category="main_course", price="15.99", **flags):
+    return FoodItem(name=name, category=category, price=Decimal(price), **flags)
+
+
+def make_order(menu_item_id=1, quantity=2):
+    return Order(
+        customer=Customer(name="Alice Smith", phone="5551234567", address="123 Oak Street"),
+        items=[OrderItem(
+            menu_item_id=menu_item_id,
+            menu_item_name="Margherita Pizza",
+            quantity=quantity,
+            unit_price=Decimal("15.99")
+        )]
+    )
+
+
+def test_add_and_get_item(menu):
+    """Test that a stored item can be read back by its assigned ID"""
+    item = menu.add_item(make_item())
+    assert item.id is not None
+    fetched = menu.get_item(item.id)
+    assert fetched.name == "Margherita Pizza"
+    assert fetched.price == Decimal("15.99")
+
+
+def test_get_missing_item(menu):
+    """Test that unknown IDs return None"""
+    assert menu.get_item(999) is None
+
+
+def test_item_ids_not_reused_after_delete(menu):
+    """Test that a deleted item's ID is never handed out again"""
+    first = menu.add_item(make_item("First"))
+    second = menu.add_item(make_item("Second"))
+    assert menu.delete_item(second.id)
+    third = menu.add_item(make_item("Third"))
+    assert len({first.id, second.id, third.id}) == 3
+
+
+def test_get_items_in_one_lookup(menu):
+    """Test that a bulk lookup returns only the existing items, once each"""
+    pizza = menu.add_item(make_item("Pizza"))
+    wings = menu.add_item(make_item("Wings"))
+    found = menu.get_items([wings.id, 999, pizza.id, wings.id])
+    assert set(found) == {pizza.id, wings.id}
+    assert found[wings.id].name == "Wings"
+    assert menu.get_items([]) == {}
+
+
+def test_menu_snapshot_carries_its_version(menu):
+    """Test that a snapshot holds the existing items and the current menu version"""
+    pizza = menu.add_item(make_item("Pizza"))
+    snapshot = menu.get_menu_snapshot(iter([pizza.id, 999]))
+    assert snapshot.version == menu.get_menu_version()
+    assert list(snapshot.items) == [pizza.id]
+    menu.update_item(pizza.id, make_item("Pizza", price="18.00"))
+    assert menu.get_menu_snapshot([pizza.id]).version > snapshot.version
+
+
+def test_menu_snapshot_never_mixes_versions(menu):
+    """Test that snapshots taken during writes see each write entirely or not at all"""
+    first = menu.add_item(make_item("First", price="1.00"))
+    second = menu.add_item(make_item("Second", price="1.00"))
+    base = menu.get_menu_version()
+    done = threading.Event()
+
+    def reprice():
+        # Raise the first price, then the second, so the two differ by one
+        # exactly when an odd number of updates has been applied
+        for price in range(2, 202):
+            menu.update_item(first.id, make_item("First", price=str(price)))
+            menu.update_item(second.id, make_item("Second", price=str(price)))
+        done.set()
+
+    writer = threading.Thread(target=reprice)
+    writer.start()
+    while not done.is_set():
+        version, items = menu.get_menu_snapshot([first.id, second.id])
+        gap = items[first.id].price - items[second.id].price
+        assert gap == (version - base) % 2
+    writer.join()
+
+
+def test_update_item(menu):
+    """Test that updates replace the stored item"""
+    item = menu.add_item(make_item())
+    updated = menu.update_item(item.id, make_item("Updated Pizza", price="17.50"))
+    assert updated.id == item.id
+    assert menu.get_item(item.id).name == "Updated Pizza"
+    assert menu.get_item(item.id).price == Decimal("17.50")
+
+
+def test_update_missing_item(menu):
+    """Test that updating an unknown item returns None"""
+    assert menu.update_item(999, make_item()) is None
+
+
+def test_delete_item(menu):
+    """Test that deleted items are gone and deleting twice fails"""
+    item = menu.add_item(make_item())
+    assert menu.delete_item(item.id)
+    assert menu.get_item(item.id) is None
+    assert not menu.delete_item(item.id)
+
+
+def test_count_items(menu):
+    """Test that the item count follows adds and deletes"""
+    assert menu.count_items() == 0
+    pizza = menu.add_item(make_item("Pizza"))
+    menu.add_item(make_item("Wings"))
+    menu.delete_item(pizza.id)
+    assert menu.count_items() == 1
+
+
+def test_get_all_and_by_category(menu):
+    """Test listing all items and filtering by category"""
+    pizza = menu.add_item(make_item("Pizza", "main_course"))
+    wings = menu.add_item(make_item("Wings", "appetizer"))
+    assert set(menu.get_all_items()) == {pizza.id, wings.id}
+    appetizers = menu.get_items_by_category("appetizer")
+    assert list(appetizers) == [wings.id]
+    assert appetizers[wings.id].name == "Wings"
+
+
+def test_query_items_filters_sorts_and_limits(menu):
+    """Test combined category, price range, flag, sort and limit filters"""
+    salad = menu.add_item(make_item("Salad", "appetizer", "7.50", is_vegetarian=True))
+    wings = menu.add_item(make_item("Wings", "appetizer", "12.50", is_spicy=True))
+    soup = menu.add_item(make_item("Soup", "appetizer", "5.00", is_vegetarian=True))
+    menu.add_item(make_item("Pizza", "main_course", "15.99", is_vegetarian=True))
+
+    assert [i.id for i in menu.query_items(category="appetizer")] == [salad.id, wings.id, soup.id]
+    assert [i.id for i in menu.query_items(
+        category="appetizer", flags={"is_vegetarian": True}, sort="price"
+    )] == [soup.id, salad.id]
+    assert [i.id for i in menu.query_items(
+        min_price=Decimal("7.50"), max_price=Decimal("12.50"), sort="-price"
+    )] == [wings.id, salad.id]
+    assert [i.id for i in menu.query_items(flags={"is_spicy": False}, sort="price", limit=2)] == [soup.id, salad.id]
+    assert menu.query_items(category="dessert") == []
+
+
+def test_query_items_sees_updates_and_deletes(menu):
+    """Test that filters reflect updated and deleted items"""
+    salad = menu.add_item(make_item("Salad", "appetizer", "7.50", is_vegetarian=True))
+    wings = menu.add_item(make_item("Wings", "appetizer", "12.50"))
+    menu.update_item(wings.id, make_item("Wings", "main_course", "3.00", is_vegetarian=True))
+    menu.delete_item(salad.id)
+    assert menu.query_items(category="appetizer") == []
+    assert [i.id for i in menu.query_items(flags={"is_vegetarian": True}, max_price=Decimal("5"))] == [wings.id]
+
+
+def test_search_items(menu):
+    """Test that search matches names and descriptions, follows writes and ranks names first"""
+    soup = menu.add_item(make_item("Soup of the Day", "appetizer", "6.00"))
+    menu.update_item(soup.id, FoodItem(
+        name="Tomato Soup", description="Served with garlic bread", category="appetizer", price=Decimal("6.00")
+    ))
+    bread = menu.add_item(make_item("Garlic Bread", "appetizer", "5.50"))
+    pizza = menu.add_item(make_item("Pizza"))
+
+    assert [item.id for item in menu.search_items("garl")] == [bread.id, soup.id]
+    assert [item.id for item in menu.search_items("garlic", limit=1)] == [bread.id]
+    assert menu.search_items("day") == []
+    menu.delete_item(bread.id)
+    assert [item.id for item in menu.search_items("bread")] == [soup.id]
+    assert [item.id for item in menu.search_items("PIZ")] == [pizza.id]
+    menu.clear()
+    assert menu.search_items("pizza") == []
+
+
+def test_menu_version_bumped_by_every_mutation(menu):
+    """Test that add, update, delete and clear each advance the menu version"""
+    versions = [menu.get_menu_version()]
+    item = menu.add_item(make_item())
+    versions.append(menu.get_menu_version())
+    menu.update_item(item.id, make_item("Updated Pizza"))
+    versions.append(menu.get_menu_version())
+    menu.delete_item(item.id)
+    versions.append(menu.get_menu_version())
+    menu.clear()
+    versions.append(menu.get_menu_version())
+    assert versions == sorted(set(versions))
+
+
+def test_clear_menu(menu):
+    """Test that clearing removes every item"""
+    menu.add_item(make_item())
+    menu.clear()
+    assert menu.get_all_items() == {}
+
+
+def test_add_and_get_order(orders):
+    """Test that a stored order is read back with its nested data"""
+    order = orders.add_order(make_order())
+    fetched = orders.get_order(order.id)
+    assert fetched.customer.name == "Alice Smith"
+    assert fetched.items[0].quantity == 2
+    assert fetched.items_total == Decimal("31.98")
+    assert fetched.status == OrderStatus.PENDING
+
+
+def test_get_missing_order(orders):
+    """Test that unknown order IDs return None"""
+    assert orders.get_order(999) is None
+
+
+def test_order_ids_are_unique(orders):
+    """Test that every order gets its own ID"""
+    ids = [orders.add_order(make_order()).id for _ in range(5)]
+    assert len(set(ids)) == 5
+    assert set(orders.get_all_orders()) == set(ids)
+
+
+def test_add_orders_in_bulk(orders):
+    """Test that bulk-added orders get unique IDs and are stored like single adds"""
+    single = orders.add_order(make_order())
+    added = orders.add_orders([make_order(quantity=q) for q in (1, 2, 3)])
+    ids = [order.id for order in added]
+    assert len(set(ids + [single.id])) == 4
+    assert [o.id for o in orders.list_orders()] == sorted(ids + [single.id])
+    assert [orders.get_order(i).items[0].quantity for i in ids] == [1, 2, 3]
+    assert orders.count_orders_by_status()["pending"] == 4
+    assert orders.add_orders([]) == []
+
+
+def test_list_orders_keyset_pages(orders):
+    """Test that pages follow ascending IDs and resume after the cursor"""
+    ids = [orders.add_order(make_order()).id for _ in range(5)]
+    assert [o.id for o in orders.list_orders(limit=2)] == ids[:2]
+    assert [o.id for o in orders.list_orders(after_id=ids[1], limit=2)] == ids[2:4]
+    assert [o.id for o in orders.list_orders(after_id=ids[3])] == ids[4:]
+    assert orders.list_orders(after_id=ids[4]) == []
+    assert orders.list_orders(after_id=ids[0], limit=1)[0].items[0].quantity == 2
+
+
+def test_list_orders_by_status_and_counts(orders):
+    """Test that status queues and counts follow every transition"""
+    ids = [orders.add_order(make_order()).id for _ in range(4)]
+    orders.update_order_status(ids[2], OrderStatus.CONFIRMED.value)
+    orders.update_order_status(ids[0], OrderStatus.CONFIRMED.value)
+    orders.update_order_status(ids[0], OrderStatus.READY.value)
+
+    assert [o.id for o in orders.list_orders(status="pending")] == [ids[1], ids[3]]
+    assert [o.id for o in orders.list_orders(status="confirmed")] == [ids[2]]
+    assert [o.id for o in orders.list_orders(status="ready")] == [ids[0]]
+    assert orders.list_orders(status="delivered") == []
+    assert [o.id for o in orders.list_orders(after_id=ids[1], limit=1, status="pending")] == [ids[3]]
+    assert orders.list_orders(status="ready")[0].items[0].quantity == 2
+    assert orders.count_orders_by_status() == {"pending": 2, "confirmed": 1, "ready": 1, "delivered": 0}
+
+
+def test_update_order_status(orders):
+    """Test that status updates are persisted"""
+    order = orders.add_order(make_order())
+    updated = orders.update_order_status(order.id, OrderStatus.CONFIRMED.value)
+    assert updated.status == OrderStatus.CONFIRMED
+    assert orders.get_order(order.id).status == OrderStatus.CONFIRMED
+
+
+def test_updates_bump_order_version(orders):
+    """Test that every status change and replacement advances the version"""
+    order = orders.add_order(make_order())
+    assert order.version == 1
+    assert orders.update_order_status(order.id, OrderStatus.CONFIRMED.value).version == 2
+    assert orders.update_order(order.id, make_order(quantity=3)).version == 3
+    assert orders.get_order(order.id).version == 3
+
+
+def test_status_compare_and_swap_conflicts(orders):
+    """Test that a stale expected status or version changes nothing"""
+    order = orders.add_order(make_order())
+    with pytest.raises(OrderVersionConflict) as conflict:
+        orders.update_order_status(order.id, "ready", expected_status="confirmed")
+    assert conflict.value.order.status == OrderStatus.PENDING
+    with pytest.raises(OrderVersionConflict):
+        orders.update_order_status(order.id, "confirmed", expected_version=2)
+    with pytest.raises(OrderVersionConflict):
+        orders.update_order(order.id, make_order(quantity=5), expected_version=2)
+
+    stored = orders.get_order(order.id)
+    assert (stored.status, stored.version, stored.items[0].quantity) == (OrderStatus.PENDING, 1, 2)
+    assert orders.count_orders_by_status()["pending"] == 1
+
+    updated = orders.update_order_status(order.id, "confirmed", expected_status="pending", expected_version=1)
+    assert (updated.status, updated.version) == (OrderStatus.CONFIRMED, 2)
+    assert orders.update_order_status(999, "confirmed", expected_version=1) is None
+
+
+def test_concurrent_transitions_have_one_winner_per_step(orders):
+    """Test that threads racing on one order never apply a step twice"""
+    order = orders.add_order(make_order())
+    steps = [("pending", "confirmed"), ("confirmed", "ready"), ("ready", "delivered")]
+    threads = 8
+    for current, target in steps:
+        seen_version = orders.get_order(order.id).version
+        barrier = threading.Barrier(threads)
+        outcomes = []
+
+        def attempt():
+            barrier.wait()
+            try:
+                orders.update_order_status(
+                    order.id, target, expected_status=current, expected_version=seen_version
+                )
+                outcomes.append("won")
+            except OrderVersionConflict:
+                outcomes.append("conflict")
+
+        workers = [threading.Thread(target=attempt) for _ in range(threads)]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+        assert sorted(outcomes) == ["conflict"] * (threads - 1) + ["won"]
+        assert orders.get_order(order.id).version == seen_version + 1
+
+    stored = orders.get_order(order.id)
+    assert (stored.status, stored.version) == (OrderStatus.DELIVERED, 4)
+    assert orders.count_orders_by_status() == {"pending": 0, "confirmed": 0, "ready": 0, "delivered": 1}
+
+
+def test_order_keeps_menu_version(orders):
+    """Test that the menu version an order was priced against is stored with it"""
+    order = make_order()
+    order.menu_version = 7
+    order = orders.add_order(order)
+    assert orders.get_order(order.id).menu_version == 7
+    assert orders.list_orders()[0].menu_version == 7
+    replacement = make_order(quantity=3)
+    replacement.menu_version = 9
+    orders.update_order(order.id, replacement)
+    assert orders.get_order(order.id).menu_version == 9
+    assert orders.get_order(orders.add_order(make_order()).id).menu_version is None
+
+
+def test_orders_record_when_they_enter_each_status(orders):
+    """Test that storage stamps creation and every transition, and keeps the times"""
+    before = utc_now()
+    order = orders.add_order(make_order())
+    assert before <= order.created_at <= utc_now()
+    assert order.created_at.tzinfo == timezone.utc
+    assert (order.confirmed_at, order.ready_at, order.delivered_at) == (None, None, None)
+
+    for status, field in [("confirmed", "confirmed_at"), ("ready", "ready_at"), ("delivered", "delivered_at")]:
+        updated = orders.update_order_status(order.id, status)
+        assert updated.created_at == order.created_at
+        assert getattr(updated, field) >= before
+    stored = orders.get_order(order.id)
+    assert stored.created_at == order.created_at
+    assert stored.created_at <= stored.confirmed_at <= stored.ready_at <= stored.delivered_at
+    assert orders.list_orders()[0].delivered_at == stored.delivered_at
+
+    # A replacement keeps the earlier times it does not carry itself
+    orders.update_order(order.id, make_order(quantity=3))
+    replaced = orders.get_order(order.id)
+    assert (replaced.status, replaced.created_at) == ("pending", order.created_at)
+    assert (replaced.confirmed_at, replaced.ready_at, replaced.delivered_at) == (None, None, None)
+
+
+def test_given_timestamps_are_kept(orders):
+    """Test that orders stored with timestamps keep them exactly, to the microsecond"""
+    order = make_order()
+    order.created_at = datetime(2026, 3, 1, 12, 30, 15, 123456, tzinfo=timezone.utc)
+    order = orders.add_order(order)
+    assert orders.get_order(order.id).created_at == datetime(2026, 3, 1, 12, 30, 15, 123456, tzinfo=timezone.utc)
+
+
+def test_list_orders_by_time(orders):
+    """Test time windows, oldest first with ties by ID, and cursor pages"""
+    base = datetime(2026, 3, 1, 12, 0, tzinfo=timezone.utc)
+    batch = []
+    for minute in [5, 1, 3, 3, 0, 9]:
+        order = make_order()
+        order.created_at = base + timedelta(minutes=minute)
+        batch.append(order)
+    ids = [order.id for order in orders.add_orders(batch)]
+    by_minute = lambda order: int((order.created_at - base).total_seconds() // 60)
+
+    everything = orders.list_orders_by_time()
+    assert [by_minute(order) for order in everything] == [0, 1, 3, 3, 5, 9]
+    assert [order.id for order in everything][2:4] == [ids[2], ids[3]]
+
+    window = orders.list_orders_by_time(base + timedelta(minutes=1), base + timedelta(minutes=5))
+    assert [by_minute(order) for order in window] == [1, 3, 3]
+    assert orders.list_orders_by_time(start=base + timedelta(minutes=6)) == orders.list_orders_by_time(
+        end=base + timedelta(minutes=100), after_id=ids[0]
+    )
+    assert orders.list_orders_by_time(end=base) == []
+    # Naive times are UTC
+    assert len(orders.list_orders_by_time(start=datetime(2026, 3, 1, 12, 4))) == 2
+
+    pages, after = [], None
+    while True:
+        page = orders.list_orders_by_time(base, after_id=after, limit=2)
+        if not page:
+            break
+        pages.append([order.id for order in page])
+        after = page[-1].id
+    assert pages == [[ids[4], ids[1]], [ids[2], ids[3]], [ids[0], ids[5]]]
+
+
+def test_order_stats_follow_every_write(orders):
+    """Test that the running aggregates always equal totals recomputed from the orders"""
+    first = orders.add_order(make_order(menu_item_id=1, quantity=2))
+    second, _ = orders.add_orders([make_order(menu_item_id=2), make_order(menu_item_id=1, quantity=1)])
+    orders.update_order_status(first.id, OrderStatus.CONFIRMED.value)
+    orders.update_order(second.id, make_order(menu_item_id=3, quantity=4))
+    assert stats_differences(orders.get_order_stats(), recompute_order_stats(export_order_columns(orders))) == []
+
+    stats = orders.get_order_stats()
+    assert stats.orders_by_status == {"pending": 2, "confirmed": 1, "ready": 0, "delivered": 0}
+    assert stats.revenue_by_status["confirmed"] == Decimal("31.98")
+    assert stats.revenue_by_status["pending"] == Decimal("79.95")
+    assert stats.items[1] == ItemSales("Margherita Pizza", 3, Decimal("47.97"))
+    assert 2 not in stats.items
+
+    orders.clear()
+    stats = orders.get_order_stats()
+    assert (set(stats.revenue_by_status.values()), stats.items) == ({Decimal("0")}, {})
+
+
+def test_order_stats_are_exact_cents_in_every_backend(orders):
+    """Test that revenue is the exact sum of the prices, including ones a float cannot hold (0.29 * 100 is
+    28.999...), so every backend reports the same cents"""
+    prices = ["0.29", "1.15", "4.35", "9999.99", "0.07"]
+    for menu_item_id, price in enumerate(prices, 1):
+        order = make_order()
+        order.items = [OrderItem(menu_item_id=menu_item_id, menu_item_name="Dish", quantity=3, unit_price=price)]
+        orders.add_order(order)
+    stats = orders.get_order_stats()
+    assert stats.revenue_by_status["pending"] == 3 * sum(Decimal(price) for price in prices)
+    assert [stats.items[n].revenue for n in range(1, 6)] == [3 * Decimal(price) for price in prices]
+    assert stats_differences(stats, recompute_order_stats(export_order_columns(orders))) == []
+
+
+def test_update_status_of_missing_order(orders):
+    """Test that updating an unknown order returns None"""
+    assert orders.update_order_status(999, OrderStatus.CONFIRMED.value) is None
+
+
+def test_update_order(orders):
+    """Test that an order can be replaced as a whole"""
+    order = orders.add_order(make_order())
+    updated = orders.update_order(order.id, make_order(quantity=5))
+    assert updated.id == order.id
+    assert orders.get_order(order.id).items[0].quantity == 5
+
+
+def test_clear_orders(orders):
+    """Test that clearing removes every order"""
+    orders.add_order(make_order())
+    orders.clear()
+    assert orders.get_all_orders() == {}
+    assert orders.list_orders(status="pending") == []
+    assert orders.count_orders_by_status()["pending"] == 0
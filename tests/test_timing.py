@@ -0,0 +1,74 @@
+import pytest
+from fastapi.testclient import TestClient
+from app.core.config import settings
+from app.core.timing import NULL_TIMER, StageStats, request_timer, stage_stats
+from app.database.connection import reset_database
+from app.main import app
+
+client = TestClient(app)
+
+ORDER_STAGES = ["lookup", "items", "order", "insert", "publish", "serialize", "total"]
+
+
+@pytest.fixture(autouse=True)
+def clear_state():
+    """Start every test with an empty database and no recorded timings"""
+    reset_database()
+    stage_stats.reset()
+    yield
+    reset_database()
+
+
+@pytest.fixture
+def order_data():
+    item = client.post("/menu/", json={"name": "Pizza", "category": "main_course", "price": 9.99}).json()
+    return {
+        "customer": {"name": "Alice Smith", "phone": "5551234567", "address": "123 Oak Street"},
+        "items": [{"menu_item_id": item["id"], "quantity": 2}]
+    }
+
+
+def test_server_timing_header_lists_create_order_stages(order_data, monkeypatch):
+    """Test that every stage of create_order is reported in Server-Timing"""
+    monkeypatch.setattr(settings, "SERVER_TIMING", True)
+    response = client.post("/orders/", json=order_data)
+    assert response.status_code == 201
+    entries = [entry.split(";dur=") for entry in response.headers["Server-Timing"].split(", ")]
+    assert [name for name, _ in entries] == ORDER_STAGES
+    assert all(float(duration) >= 0 for _, duration in entries)
+
+
+def test_debug_endpoint_aggregates_stages(order_data, monkeypatch):
+    """Test that stage durations are aggregated and can be reset"""
+    monkeypatch.setattr(settings, "SERVER_TIMING", True)
+    for _ in range(3):
+        client.post("/orders/", json=order_data)
+
+    data = client.get("/debug/timings").json()
+    assert data["enabled"] is True
+    stages = data["operations"]["create_order"]
+    assert list(stages) == ORDER_STAGES
+    assert stages["insert"]["count"] == 3
+    assert 0 <= stages["insert"]["p50_ms"] <= stages["insert"]["max_ms"]
+
+    assert client.delete("/debug/timings").status_code == 204
+    assert client.get("/debug/timings").json()["operations"] == {}
+
+
+def test_timing_disabled_by_default(order_data):
+    """Test that without SERVER_TIMING nothing is timed or recorded"""
+    assert request_timer("create_order") is NULL_TIMER
+    response = client.post("/orders/", json=order_data)
+    assert "Server-Timing" not in response.headers
+    assert client.get("/debug/timings").json() == {"enabled": False, "operations": {}}
+
+
+def test_stage_stats_keep_bounded_recent_samples():
+    """Test that percentiles come from the most recent samples only"""
+    stats = StageStats(recent=10)
+    for ms in range(100):
+        stats.record("op", [("stage", ms / 1e3)])
+    summary = stats.snapshot()["op"]["stage"]
+    assert summary["count"] == 100
+    assert summary["max_ms"] == pytest.approx(99)
+    assert summary["p50_ms"] == pytest.approx(95)